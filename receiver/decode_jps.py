@@ -10,7 +10,6 @@ Javad Receiver GREIS messages decoder
 """
 
 import argparse
-from binascii import hexlify
 import bitstruct.c as bs
 from enum import IntEnum
 from glob import glob
@@ -21,9 +20,21 @@ from pathlib import Path
 import struct as st
 
 from cssrlib.gnss import epoch2time, time2gpst, prn2sat, uGNSS, uTYP, rSigRnx
-from cssrlib.gnss import Obs, rCST, gpst2time, uSIG, copy_buff
+from cssrlib.gnss import rCST, gpst2time, uSIG, copy_buff
 from cssrlib.rawnav import rcvDec, rcvOpt
 
+from rcvcrc import crc8
+from rcvarc import nav_arc
+from rcveph import ephCache
+from rcvidx import time_window
+from rcvio import open_mmap, open_stream, stream_frames
+from rcvobs import rcvEpoch
+from rcvpar import chunk_frames, decode_chunks
+from rcvscan import enabled
+from rcvstat import rcvStat
+from rcvtap import tap_page
+from rcvwrt import fileWriter, write_nav
+
 
 def istxt(c):
     if '0' <= chr(c) and chr(c) <= '~':
@@ -96,6 +107,12 @@ class SIG(IntEnum):
 class jps(rcvDec):
     tow = -1
     week = -1
+    preamble = rb'(?<=[\r\n])[0-~]{2}[0-9A-F]{3}'
+    frame_sep = rb'[\r\n]*'
+    sync_len = 5
+    crc_len = 0
+    epoch_mid = '~~'
+    ep = None
     sat = []
     sys = []
     prn = []
@@ -136,6 +153,58 @@ class jps(rcvDec):
     rec = []
     mid_decoded = []
 
+    # message handlers (head, method, rcvOpt flags) in order of precedence,
+    # '?' in head matches a key of ch_t and '*' a key of ch_t in any case.
+    # The handler is dropped if none of the flags is set, None marks a
+    # known message that is skipped.
+    obs_f = ('flg_rnxobs',)
+    nav_f = ('flg_rnxnav',)
+    msg_t = [
+        ('~~', 'decode_rt', ()),
+        ('RE', None, ()),
+        ('::', 'decode_et', obs_f),
+        ('GT', 'decode_gt', ()),
+        ('RD', 'decode_rd', ()),
+        ('SX', 'decode_sx', obs_f),
+        ('SI', None, ()), ('EL', None, ()), ('AZ', None, ()),
+        ('DP', None, ()), ('TO', None, ()), ('DO', None, ()),
+        ('PM', None, ()),
+        ('MF', 'decode_mf', ()),
+        ('NN', 'decode_nn', obs_f),
+        ('qd', 'decode_qd', nav_f),
+        ('xd', 'decode_xd', ('flg_qzsl6',)),
+        ('cd', 'decode_cd', ('flg_rnxnav', 'flg_bdsb2b')),
+        ('gd', 'decode_gd', ('flg_rnxnav', 'flg_gpslnav')),
+        ('id', 'decode_id', nav_f),
+        ('lD', 'decode_ld', nav_f),
+        ('ud', 'decode_ud', nav_f),
+        ('ED', 'decode_ed', ('flg_rnxnav', 'flg_galinav', 'flg_galfnav',
+                             'flg_gale6')),
+        ('WD', 'decode_wd', ('flg_sbas',)),
+        ('r?', 'decode_ipr', obs_f),
+        ('?p', 'decode_icp', obs_f),
+        ('?r', 'decode_irpr', obs_f),
+        ('s?', 'decode_cno', obs_f),
+        ('j?', 'decode_cnod', obs_f),
+        ('ID', None, ()),
+        ('?m', 'decode_prc', obs_f),
+        ('?f', 'decode_cpc', obs_f),
+        ('R*', 'decode_pr', obs_f),
+        ('P*', 'decode_cp', obs_f),
+        ('c?', None, ()),
+        ('D*', 'decode_dop', obs_f),
+        ('E*', 'decode_cnr', obs_f),
+        ('*E', 'decode_cnr4', obs_f),
+        ('GE', 'decode_ephem', nav_f), ('QE', 'decode_ephem', nav_f),
+        ('EN', 'decode_ephem', nav_f), ('CN', 'decode_ephem', nav_f),
+        ('NE', None, ()), ('WE', None, ()),
+        ('F*', 'decode_flags', obs_f),
+        ('?d', None, ()),
+        ('ST', None, ()), ('SP', None, ()), ('PV', None, ()),
+        ('PG', None, ()), ('IE', None, ()), ('UO', None, ()),
+    ]
+    eph_t = {'GE': GNSS.GPS, 'QE': GNSS.QZS, 'EN': GNSS.GAL, 'CN': GNSS.BDS}
+
     def __init__(self, opt=None, prefix='', gnss_t='GECJ'):
         super().__init__(opt, prefix, gnss_t)
 
@@ -232,20 +301,32 @@ class jps(rcvDec):
                 uTYP.S: [rSigRnx('IS5A'), rSigRnx('IS1X')],
             }
 
+        self.sidx_l1c = -1
         self.sidx_l1cb = -1
         if uGNSS.QZS in self.sig_tab.keys():  # record index for L1C/B
             for k, sig_ in enumerate(self.sig_tab[uGNSS.QZS][uTYP.L]):
+                if sig_.sig == uSIG.L1C:
+                    self.sidx_l1c = k
                 if sig_.sig == uSIG.L1E:
                     self.sidx_l1cb = k
 
+        # JPS system -> (column index of sig_tab, index in types)
+        self.sig_idx = {}
+        for gnss, sys in self.sys_t.items():
+            if sys not in self.sig_tab.keys():
+                continue
+            types = self.types[gnss-1]
+            self.sig_idx[gnss] = [
+                (kk, types.index(sig_.sig))
+                for kk, sig_ in enumerate(self.sig_tab[sys][uTYP.L])
+                if sig_.sig in types]
+
         if opt is not None:
             self.init_param(opt=opt, prefix=prefix)
+        self.init_handler()
 
     def crc8(self, src, cnt):
-        res = 0
-        for k in range(cnt):
-            res = (((res << 2) | (res >> 6)) ^ src[k]) & 0xff
-        return ((res << 2) | (res >> 6)) & 0xff
+        return crc8(src[:cnt])
 
     def sync(self, buff, k):
         c = chr(buff[k])
@@ -254,6 +335,28 @@ class jps(rcvDec):
             return True
         return False
 
+    def msg_len(self, msg, k):
+        return int(bytes(msg[k+2:k+5]), 16)+5
+
+    def msg_id(self, msg, k):
+        return bytes(msg[k:k+2]).decode()
+
+    def msg_time(self, msg, k):
+        if msg[k:k+2] != b'GT':
+            return None
+        tow, wn, cycle = st.unpack_from('<LHB', msg, k+5)
+        return (wn+cycle*1024)*604800+tow*1e-3
+
+    def check_crc(self, msg, k):
+        if msg[k:k+2] == b'RE':  # [RE] has no checksum
+            return True
+        len_ = self.msg_len(msg, k)
+        if self.crc8(msg[k:k+len_-1], len_-1) != msg[k+len_-1]:
+            if self.monlevel > 0:
+                print("cs error")
+            return False
+        return True
+
     def decode_eph(self, buff, sys, len_):
         j = 5
         tgd = [0, 0, 0]
@@ -320,11 +423,6 @@ class jps(rcvDec):
         return fn
 
     def decode_obs(self):
-        obs = Obs()
-        obs.sig = self.sig_tab
-
-        obs.time = gpst2time(self.week, self.tow)
-
         nsig_max = 0
         for s in self.sig_tab:
             if len(self.sig_tab[s][uTYP.L]) > nsig_max:
@@ -335,15 +433,11 @@ class jps(rcvDec):
         self.nsig[uTYP.D] = nsig_max
         self.nsig[uTYP.S] = nsig_max
 
-        obs.sat = []
-        nsat = len(self.prn)
+        if self.ep is None:
+            self.ep = rcvEpoch(nsig_max)
+        ep = self.ep
 
-        obs.P = np.zeros((nsat, self.nsig[uTYP.C]), dtype=np.float64)
-        obs.L = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.float64)
-        obs.D = np.zeros((nsat, self.nsig[uTYP.D]), dtype=np.float64)
-        obs.S = np.zeros((nsat, self.nsig[uTYP.S]), dtype=np.float64)
-        obs.lli = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.int32)
-        j = 0
+        nsat = len(self.prn)
         kr = 0
         for k in range(nsat):
             if self.sys[k] == GNSS.GLO:
@@ -360,38 +454,24 @@ class jps(rcvDec):
             if sys == uGNSS.SBS and self.prn[k] > 156:
                 continue
             sat = prn2sat(sys, prn)
-            if sat in obs.sat:
-                jn = obs.sat.index(sat)
-            else:
-                jn = j
-
-            for kk, sig_ in enumerate(self.sig_tab[sys][uTYP.L]):
-                if sig_.sig in self.types[self.sys[k]-1]:
-                    # L1C/A -> L1C/B for QZS in prn_l1cb
-                    if sys == uGNSS.QZS and prn in self.prn_l1cb and \
-                            self.sidx_l1cb > 0 and sig_.sig == uSIG.L1C:
-                        kk_ = self.sidx_l1cb
-                    else:
-                        kk_ = kk
-
-                    idx = self.types[self.sys[k]-1].index(sig_.sig)
-                    obs.P[jn][kk_] = self.pr[k][idx]*rCST.CLIGHT
-                    obs.L[jn][kk_] = self.cp[k][idx]
-                    obs.D[jn][kk_] = self.dp[k][idx]
-                    obs.S[jn][kk_] = self.CNO[k][idx]
-                    if self.code[k][idx] & 0x0020:
-                        obs.lli[jn][kk_] += 1
-
-            if sat not in obs.sat:
-                obs.sat += [sat]
-                j += 1
-
-        nsat = len(obs.sat)
-        obs.P = obs.P[:nsat]
-        obs.L = obs.L[:nsat]
-        obs.D = obs.D[:nsat]
-        obs.S = obs.S[:nsat]
-        obs.lli = obs.lli[:nsat]
+            jn = ep.slot(sat)
+
+            # L1C/A -> L1C/B for QZS in prn_l1cb
+            l1cb = sys == uGNSS.QZS and prn in self.prn_l1cb and \
+                self.sidx_l1cb > 0
+
+            for kk, idx in self.sig_idx[self.sys[k]]:
+                if l1cb and kk == self.sidx_l1c:
+                    kk = self.sidx_l1cb
+
+                ep.P[jn, kk] = self.pr[k][idx]*rCST.CLIGHT
+                ep.L[jn, kk] = self.cp[k][idx]
+                ep.D[jn, kk] = self.dp[k][idx]
+                ep.S[jn, kk] = self.CNO[k][idx]
+                if self.code[k][idx] & 0x0020:
+                    ep.lli[jn, kk] += 1
+
+        obs = ep.finalize(gpst2time(self.week, self.tow), self.sig_tab)
 
         obs.P[np.isnan(obs.P)] = 0
         obs.L[np.isnan(obs.L)] = 0
@@ -434,529 +514,529 @@ class jps(rcvDec):
                 self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
         if sys == uGNSS.GPS and self.flg_gpslnav:
-            self.fh_gpslnav.write(
-                "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                format(self.week, time_, prn, type_, len_*4,
-                       hexlify(b).decode()))
+            write_nav(self.fh_gpslnav, self.week, time_, prn, type_, len_*4, b)
+
+    def decode_rt(self, buff, len_, head):
+        """ receiver time [RT] (epoch start) """
+        self.tod = st.unpack_from('<L', buff, 5)[0]*1e-3
+        if self.monlevel > 1:
+            print("[RT] tod={:.1f}".format(self.tod))
+
+    def decode_et(self, buff, len_, head):
+        """ epoch time [ET] (epoch end) """
+        self.tod = st.unpack_from('<L', buff, 5)[0]*1e-3
+        if self.monlevel > 1:
+            print("[ET] tod={:.1f}".format(self.tod))
+
+        obs = self.decode_obs()
+        if self.flg_rnxobs and obs is not None:
+            self.obs = obs
+            self.re.rnx_obs_header(obs.time, self.fh_rnxobs)
+            self.re.rnx_obs_body(obs, self.fh_rnxobs)
+
+    def decode_gt(self, buff, len_, head):
+        """ GPS time [GT] """
+        tow, wn, cycle = st.unpack_from('<LHB', buff, 5)  # ms
+        self.week = wn+cycle*1024
+        self.tow = tow*1e-3
+        if self.monlevel > 1:
+            print("[GT] tow={:.1f} week={:4d}".format(self.tow, self.week))
+
+    def decode_rd(self, buff, len_, head):
+        """ Receiver Date and Receiver Time """
+        # base 0:GPS,1:UTC USNO,2:GLO,3:UTC SU
+        year, month, day, base = st.unpack_from('<HBBB', buff, 5)
+        if self.tod >= 0:
+            h = self.tod // 3600
+            tmp = (self.tod % 3600)
+            m = tmp//60
+            s = tmp-m*60
+            ep = [year, month, day, h, m, s]
+            self.week, self.tow = time2gpst(epoch2time(ep))
+
+        if self.monlevel > 1:
+            print("[RD] {:d}/{:d}/{:d} {:d}".
+                  format(year, month, day, base))
+
+    def decode_sx(self, buff, len_, head):
+        """ satellite index """
+        sys = []
+        prn = []
+        nsat = (len_-6)//2
+        esi = st.unpack_from('<'+'B'*2*nsat, buff, 5)
+        self.nsat = nsat
+        self.freqn = np.zeros(nsat, dtype=int)
+        for k in range(nsat):
+            ssid = esi[k*2]
+            svid = esi[k*2+1]
+            if ssid == GNSS.GLO:
+                if svid > 127:
+                    self.freqn[k] = svid-256
+                else:
+                    self.freqn[k] = svid
+            sys += [ssid]
+            prn += [svid]
+            #  print("{:d} {:3d}".format(sys[k],prn[k]))
+        self.sys = sys
+        self.prn = prn
+
+    def decode_mf(self, buff, len_, head):
+        """ messages format """
+        if self.monlevel >= 1:
+            print(bytes(buff[5:len_-2]))
+
+    def decode_nn(self, buff, len_, head):
+        """ GLONASS Satellite system number """
+        self.nsat_glo = (len_-6)//1
+        self.osn = st.unpack_from('B'*self.nsat_glo, buff, 5)
+
+    def decode_qd(self, buff, len_, head):
+        """ QZSS Raw Navigation Data """
+        self.decode_nd(buff, sys=uGNSS.QZS)
+
+    def decode_xd(self, buff, len_, head):
+        """ QZSS L6 Message Data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        if self.monlevel > 1:
+            print("[xd] prn={:d} tow={:d} type={:d} len={:d}".
+                  format(prn, time_, type_, len_))
+        if self.week >= 0:
+            if self.prn_ref > 0 and prn != self.prn_ref:
+                return
+            msg_l6 = buff[12:12+len_]
+            if self.flg_qzsl6:
+                write_nav(self.fh_qzsl6, self.week, time_, prn, type_, len_,
+                          msg_l6)
+            tap_page(self, 'qzsl6', self.week, time_, prn, type_,
+                     bytes(msg_l6))
 
-    def decode(self, buff, len_, sys=[], prn=[]):
-        head = buff[0:2].decode()
-        if head == 'RE':
-            if self.monlevel > 1:
-                print("[{:2s}] {:}".format(head, buff[5:5+len_].decode()))
-
-        elif self.crc8(buff, len_-1) != buff[-1]:
-            print("cs error")
-            return -1
-
-        if head == '~~':  # receiver time [RT] (epoch start)
-            self.tod = st.unpack_from('<L', buff, 5)[0]*1e-3
-            if self.monlevel > 1:
-                print("[RT] tod={:.1f}".format(self.tod))
-        elif head == 'RE':
+        # errCorr = st.unpack_from('<B', buff, 12+len_)
+
+    def decode_cd(self, buff, len_, head):
+        """ BeiDou Navigation data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        time_ = (time_ + 14) % 604800  # BDST -> GPST
+        ch = type_ & 0x3f
+        B2bq = (type_ >> 6) & 1
+        D2 = (type_ >> 7) & 1
+        if self.monlevel >= 2:
+            s = "{:2d} B2bq:{:1d} D2-GEO:{:1d}".format(ch, B2bq, D2)
+            print("[cd] prn={:2d} tow={:6d} type={:s} len={:d}".
+                  format(prn, time_, s, len_))
+
+        # type_[0:5] 0:B1,1:B2,2:B3,3:B1C,5:B2a,6:B2b
+        msg = st.unpack_from('>'+len_*'L', buff, 12)
+        b = bytes(np.array(msg, dtype='uint32'))
+
+        sat = prn2sat(uGNSS.BDS, prn)
+        if self.week < 0:
             return
-        elif head == '::':  # epoch time [ET] (epoch end)
-            self.tod = st.unpack_from('<L', buff, 5)[0]*1e-3
-            if self.monlevel > 1:
-                print("[ET] tod={:.1f}".format(self.tod))
-
-            obs = self.decode_obs()
-            if self.flg_rnxobs and obs is not None:
-                self.obs = obs
-                self.re.rnx_obs_header(obs.time, self.fh_rnxobs)
-                self.re.rnx_obs_body(obs, self.fh_rnxobs)
-
-        elif head == 'GT':  # GPS time [GT]
-            tow, wn, cycle = st.unpack_from('<LHB', buff, 5)  # ms
-            self.week = wn+cycle*1024
-            self.tow = tow*1e-3
-            if self.monlevel > 1:
-                print("[GT] tow={:.1f} week={:4d}".format(self.tow, self.week))
-        elif head == 'RD':  # Receiver Date and Receiver Time
-            # base 0:GPS,1:UTC USNO,2:GLO,3:UTC SU
-            year, month, day, base = st.unpack_from('<HBBB', buff, 5)
-            if self.tod >= 0:
-                h = self.tod // 3600
-                tmp = (self.tod % 3600)
-                m = tmp//60
-                s = tmp-m*60
-                ep = [year, month, day, h, m, s]
-                self.week, self.tow = time2gpst(epoch2time(ep))
-
-            if self.monlevel > 1:
-                print("[RD] {:d}/{:d}/{:d} {:d}".
-                      format(year, month, day, base))
-        elif head == 'SX':  # satellite index
-            sys = []
-            prn = []
-            nsat = (len_-6)//2
-            esi = st.unpack_from('<'+'B'*2*nsat, buff, 5)
-            self.nsat = nsat
-            self.freqn = np.zeros(nsat, dtype=int)
-            for k in range(nsat):
-                ssid = esi[k*2]
-                svid = esi[k*2+1]
-                if ssid == GNSS.GLO:
-                    if svid > 127:
-                        self.freqn[k] = svid-256
-                    else:
-                        self.freqn[k] = svid
-                sys += [ssid]
-                prn += [svid]
-                #  print("{:d} {:3d}".format(sys[k],prn[k]))
-            self.sys = sys
-            self.prn = prn
-        elif head == 'SI':  # satellite index (obsolete)
-            nsat = (len_-6)//1
-            # si = st.unpack_from('b'*nsat, buff, 5)
-        elif head == 'EL':  # elevation
-            nsat = (len_-6)//1
-            # el = st.unpack_from('b'*nsat, buff, 5)
-        elif head == 'AZ':  # azimuth
-            nsat = (len_-6)//1
-            # az = st.unpack_from('b'*nsat, buff, 5)
-        elif head == 'DP':  # DOP
-            nsat = (len_-6)//1
-            hdop, vdop, tdop, soltype, edop = st.unpack_from('<fffBf', buff, 5)
-        elif head == 'TO':  # Reference Time to Receiver Time Offset
-            nsat = (len_-6)//1
-            val, sval = st.unpack_from('dd', buff, 5)
-        elif head == 'DO':  # Derivative of Receiver Time Offset
-            nsat = (len_-6)//1
-            val, sval = st.unpack_from('ff', buff, 5)
-        elif head == 'PM':  # parameters
-            None
-            # print(buff[5:len-4])
-        elif head == 'MF':  # messages format
-            if self.monlevel >= 1:
-                print(buff[5:len_-2])
-        elif head == 'NN':  # GLONASS Satellite system number
-            self.nsat_glo = (len_-6)//1
-            self.osn = st.unpack_from('B'*self.nsat_glo, buff, 5)
-
-        elif head == 'qd':  # QZSS Raw Navigation Data
-            self.decode_nd(buff, sys=uGNSS.QZS)
-
-        elif head == 'xd':  # QZSS L6 Message Data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
-            if self.monlevel > 1:
-                print("[xd] prn={:d} tow={:d} type={:d} len={:d}".
-                      format(prn, time_, type_, len_))
-            if self.week >= 0:
-                if self.flg_qzsl6:
-                    if self.prn_ref > 0 and prn != self.prn_ref:
-                        return
-                    msg_l6 = buff[12:12+len_]
-                    self.fh_qzsl6.write(
-                        "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                        format(self.week, time_, prn, type_, len_,
-                               hexlify(msg_l6).decode()))
-
-            # errCorr = st.unpack_from('<B', buff, 12+len_)
-        elif head == 'cd':  # BeiDou Navigation data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
-            time_ = (time_ + 14) % 604800  # BDST -> GPST
-            ch = type_ & 0x3f
-            B2bq = (type_ >> 6) & 1
-            D2 = (type_ >> 7) & 1
-            if self.monlevel >= 2:
-                s = "{:2d} B2bq:{:1d} D2-GEO:{:1d}".format(ch, B2bq, D2)
-                print("[cd] prn={:2d} tow={:6d} type={:s} len={:d}".
-                      format(prn, time_, s, len_))
 
-            # type_[0:5] 0:B1,1:B2,2:B3,3:B1C,5:B2a,6:B2b
-            msg = st.unpack_from('>'+len_*'L', buff, 12)
-            b = bytes(np.array(msg, dtype='uint32'))
+        if self.flg_rnxnav:
+            eph = None
+            if ch == 0:  # B1 (D1/D2)
+                if D2 == 0:
+                    eph = self.rn.decode_bds_d1(self.week, time_, sat, b)
+                else:
+                    eph = self.rn.decode_bds_d2(self.week, time_, sat, b)
+            elif ch == 3:  # B1C
+                eph = self.rn.decode_bds_b1c(self.week, time_, sat, b)
+            elif ch == 5:  # B2a
+                eph = self.rn.decode_bds_b2a(self.week, time_, sat, b)
+            elif ch == 6 and prn < 59 and B2bq == 0:  # B2b
+                eph = self.rn.decode_bds_b2b(self.week, time_, sat, b, 0)
 
-            sat = prn2sat(uGNSS.BDS, prn)
-            if self.week < 0:
-                return
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-            if self.flg_rnxnav:
-                eph = None
-                if ch == 0:  # B1 (D1/D2)
-                    if D2 == 0:
-                        eph = self.rn.decode_bds_d1(self.week, time_, sat, b)
-                    else:
-                        eph = self.rn.decode_bds_d2(self.week, time_, sat, b)
-                elif ch == 3:  # B1C
-                    eph = self.rn.decode_bds_b1c(self.week, time_, sat, b)
-                elif ch == 5:  # B2a
-                    eph = self.rn.decode_bds_b2a(self.week, time_, sat, b)
-                elif ch == 6 and prn < 59 and B2bq == 0:  # B2b
-                    eph = self.rn.decode_bds_b2b(self.week, time_, sat, b, 0)
+        if ch == 6 and prn >= 59:  # B2b: BDS PPP
+            if self.flg_bdsb2b:
+                write_nav(self.fh_bdsb2b, self.week, time_, prn, type_,
+                          len_*4, b)
+            tap_page(self, 'bdsb2b', self.week, time_, prn, type_, b)
 
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+    def decode_gd(self, buff, len_, head):
+        """ GPS Navigation data """
+        self.decode_nd(buff, sys=uGNSS.GPS)
 
-            if ch == 6 and self.flg_bdsb2b and prn >= 59:  # B2b: BDS PPP
-                self.fh_bdsb2b.write(
-                    "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                    format(self.week, time_, prn, type_, len_*4,
-                           hexlify(b).decode()))
+    def decode_id(self, buff, len_, head):
+        """ NavIC Navigation data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        sat = prn2sat(uGNSS.IRN, prn)
+        # type 0 - L5, 1 - S, 2 - reserved(L1), 3 - L1
+        msg = st.unpack_from('>'+len_*'L', buff, 12)
+        b = bytes(np.array(msg, dtype='uint32'))
 
-        elif head == 'gd':  # GPS Navigation data
-            self.decode_nd(buff, sys=uGNSS.GPS)
+        if self.flg_rnxnav:
+            eph = None
+            if type_ == 0:
+                eph = self.rn.decode_irn_lnav(self.week, time_, sat, b)
+            elif type_ == 2 or type_ == 3:
+                # for L1
+                # data[0] – subframe 1 (toi)
+                # data[1…19] – subframe 2
+                # data[20…28] – subframe 3
 
-        elif head == 'id':  # NavIC Navigation data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
-            sat = prn2sat(uGNSS.IRN, prn)
-            # type 0 - L5, 1 - S, 2 - reserved(L1), 3 - L1
-            msg = st.unpack_from('>'+len_*'L', buff, 12)
-            b = bytes(np.array(msg, dtype='uint32'))
+                msg = bytearray(228)  # recover original L1C msg structure
+                # toi: 9b, data2: 600b, data3: 274b
+                toi = bs.unpack_from('u32', b, 0)[0]
+                bs.pack_into('u9', msg, 0, toi)
+                copy_buff(b, msg, 32, 52, 600)
+                copy_buff(b, msg, 640, 1252, 274)
+                msg = bytes(msg)
+                eph = self.rn.decode_irn_l1nav(self.week, time_, sat, msg)
 
-            if self.flg_rnxnav:
-                eph = None
-                if type_ == 0:
-                    eph = self.rn.decode_irn_lnav(self.week, time_, sat, b)
-                elif type_ == 2 or type_ == 3:
-                    # for L1
-                    # data[0] – subframe 1 (toi)
-                    # data[1…19] – subframe 2
-                    # data[20…28] – subframe 3
-
-                    msg = bytearray(228)  # recover original L1C msg structure
-                    # toi: 9b, data2: 600b, data3: 274b
-                    toi = bs.unpack_from('u32', b, 0)[0]
-                    bs.pack_into('u9', msg, 0, toi)
-                    copy_buff(b, msg, 32, 52, 600)
-                    copy_buff(b, msg, 640, 1252, 274)
-                    msg = bytes(msg)
-                    eph = self.rn.decode_irn_l1nav(self.week, time_, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+        if self.monlevel >= 2:
+            print(f"[id] time={time_:6d} prn={prn:2d} type={type_}")
 
-            if self.monlevel >= 2:
-                print(f"[id] time={time_:6d} prn={prn:2d} type={type_}")
+    def decode_ld(self, buff, len_, head):
+        """ Glonass Raw Navigation data """
+        svn, fcn, time_, type_, len_ = st.unpack_from('<BbLBB', buff, 5)
+        # type 0 - L1, 2 - L2C, 3 - P1, 4 - P2
+        msg = st.unpack_from('>'+len_*'L', buff, 13)
+        b = bytes(np.array(msg, dtype='uint32'))
+        sat = prn2sat(uGNSS.GLO, svn)
+
+        # get 77 bit (25x3+2) in frame without hamming and time mark
+        if type_ == 0:
+            buff = bytearray(12)
+            for k in range(4):
+                d = bs.unpack_from('u32', b, 32*k)[0]
+                if k < 3:
+                    bs.pack_into('u25', buff, 25*k, d & 0x1ffffff)
+                else:
+                    bs.pack_into('u2', buff, 25*k, (d >> 23) & 0x3)
 
-        elif head == 'lD':  # Glonass Raw Navigation data
-            svn, fcn, time_, type_, len_ = st.unpack_from('<BbLBB', buff, 5)
-            # type 0 - L1, 2 - L2C, 3 - P1, 4 - P2
-            msg = st.unpack_from('>'+len_*'L', buff, 13)
-            b = bytes(np.array(msg, dtype='uint32'))
-            sat = prn2sat(uGNSS.GLO, svn)
+        if self.flg_rnxnav and type_ == 0:
+            geph = self.rn.decode_glo_fdma(
+                self.week, self.tow, sat, buff, fcn)
 
-            # get 77 bit (25x3+2) in frame without hamming and time mark
-            if type_ == 0:
-                buff = bytearray(12)
-                for k in range(4):
-                    d = bs.unpack_from('u32', b, 32*k)[0]
-                    if k < 3:
-                        bs.pack_into('u25', buff, 25*k, d & 0x1ffffff)
-                    else:
-                        bs.pack_into('u2', buff, 25*k, (d >> 23) & 0x3)
+            if geph is not None:
+                self.re.rnx_gnav_body(geph, self.fh_rnxnav)
 
-            if self.flg_rnxnav and type_ == 0:
-                geph = self.rn.decode_glo_fdma(
-                    self.week, self.tow, sat, buff, fcn)
+        if self.monlevel >= 2:
+            print(f"[lD] time={time_:6d} svn={svn:2d} fcn{fcn:2d} " +
+                  f"type={type_}")
 
-                if geph is not None:
-                    self.re.rnx_gnav_body(geph, self.fh_rnxnav)
+    def decode_ud(self, buff, len_, head):
+        """ Glonass CDMA Raw Navigation data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        # type: 0 - L1, 1 - L2, 3 - L3
+        sat = prn2sat(uGNSS.GLO, prn)
+        msg = st.unpack_from('>'+len_*'L', buff, 12)
+        b = bytes(np.array(msg, dtype='uint32'))
 
-            if self.monlevel >= 2:
-                print(f"[lD] time={time_:6d} svn={svn:2d} fcn{fcn:2d} " +
-                      f"type={type_}")
-        elif head == 'ud':  # Glonass CDMA Raw Navigation data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
-            # type: 0 - L1, 1 - L2, 3 - L3
-            sat = prn2sat(uGNSS.GLO, prn)
-            msg = st.unpack_from('>'+len_*'L', buff, 12)
-            b = bytes(np.array(msg, dtype='uint32'))
+        if self.flg_rnxnav:
+            geph = None
+            if type_ == 0:  # L1OC
+                geph = self.rn.decode_glo_l1oc(self.week, self.tow, sat, b)
+            elif type_ == 1:  # L2CSI
+                None
+            elif type_ == 2:  # L3OC
+                geph = self.rn.decode_glo_l3oc(self.week, self.tow, sat, b)
 
-            if self.flg_rnxnav:
-                geph = None
-                if type_ == 0:  # L1OC
-                    geph = self.rn.decode_glo_l1oc(self.week, self.tow, sat, b)
-                elif type_ == 1:  # L2CSI
-                    None
-                elif type_ == 2:  # L3OC
-                    geph = self.rn.decode_glo_l3oc(self.week, self.tow, sat, b)
+            if geph is not None:
+                self.re.rnx_gnav_body(geph, self.fh_rnxnav)
 
-                if geph is not None:
-                    self.re.rnx_gnav_body(geph, self.fh_rnxnav)
+        if self.monlevel >= 2:
+            print(f"[ud] time={time_:6d} prn={prn:2d} type={type_}")
 
-            if self.monlevel >= 2:
-                print(f"[ud] time={time_:6d} prn={prn:2d} type={type_}")
+    def decode_ed(self, buff, len_, head):
+        """ Galileo Raw Navigation data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        sat = prn2sat(uGNSS.GAL, prn)
+        if self.monlevel >= 2:
+            print(f"[ED] time={time_:6d} prn={prn:2d} type={type_}")
+
+        # [I/NAV]
+        # even/odd,page-type,data(1/2),tail => 1,1,112,6
+        # evan/odd,page-type,data(2/2),field1,crc,field2,tail
+        # => 1,1,16,64,24,8,6
+        # For E1B: field1(64) = OSNMA(40)+SAR(22)+spare(2), field2(8)=SSP
+        # For E5B: field1(64) = resv, field2(8) = resv
 
-        elif head == 'ED':  # Galileo Raw Navigation data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
-            sat = prn2sat(uGNSS.GAL, prn)
+        # [FNAV]
+        # page-type(6), nav(208), crc(24), tail(6)
+
+        # type_ = 0:E1B(INAV), 1:E5a(FNAV), 2:E5b(INAV), 6:E6(CNAV)
+        if type_ == 0 or type_ == 2:  # INAV
+            b = bytes(buff[12:])
+            if self.flg_rnxnav:
+                eph = self.rn.decode_gal_inav(
+                    self.week, time_, sat, type_, b)
+                if eph is not None:
+                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            if self.flg_galinav and self.week >= 0:
+                write_nav(self.fh_galinav, self.week, time_, prn, type_,
+                          len_, b)
+        elif type_ == 1:  # FNAV
+            b = bytes(buff[12:])
+            if self.flg_rnxnav:
+                eph = self.rn.decode_gal_fnav(
+                    self.week, time_, sat, type_, b)
+                if eph is not None:
+                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            if self.flg_galfnav and self.week >= 0:
+                write_nav(self.fh_galfnav, self.week, time_, prn, type_,
+                          len_, b)
+        elif type_ == 6:  # CNAV
+            if self.week >= 0:
+                if self.flg_gale6:
+                    write_nav(self.fh_gale6, self.week, time_, prn, type_,
+                              len_, buff[12:])
+                tap_page(self, 'gale6', self.week, time_, prn, type_,
+                         bytes(buff[12:]))
+
+    def decode_wd(self, buff, len_, head):
+        """ SBAS Navigation data """
+        prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+        if self.monlevel >= 2:
+            print("[WD] prn={:d} tow={:d} type={:d}".
+                  format(prn, time_, type_))
+
+        sat = prn2sat(uGNSS.SBS, prn)
+        b = bytes(buff[12:])
+        if self.flg_sbas and self.flg_rnxnav:
+            seph = self.rn.decode_sbs_l1(self.week, time_, sat, b)
+            if seph is not None:
+                self.re.rnx_snav_body(seph, self.fh_rnxnav)
+
+        if self.flg_sbas and self.week >= 0:
+            if self.sbs_ref > 0 and prn != self.sbs_ref:
+                return
+            write_nav(self.fh_sbas, self.week, time_, prn, type_, len_, b)
+
+    def decode_ipr(self, buff, len_, head):
+        """ Integer Pseudo-ranges """
+        ch = self.ch_t[head[1]]
+        nsat = (len_-6)//4
+        Ksys_t = {GNSS.GPS: 1e-11, GNSS.GLO: 1e-11, GNSS.GAL: 2e-11,
+                  GNSS.SBS: 1e-11, GNSS.QZS: 2e-11, GNSS.BDS: 2e-11,
+                  GNSS.IRN: 2e-11}
+        Asys_t = {GNSS.GPS: 0.075, GNSS.GLO: 0.075, GNSS.GAL: 0.085,
+                  GNSS.SBS: 0.125, GNSS.QZS: 0.125, GNSS.BDS: 0.105,
+                  GNSS.IRN: 0.105}
+
+        if self.sys == []:
+            return
+        spr = st.unpack_from('<'+'i'*nsat, buff, 5)
+        for k in range(nsat):
+            Ksys = Ksys_t[self.sys[k]]
+            Asys = Asys_t[self.sys[k]]
+            pr_ = (spr[k]*Ksys+Asys)*rCST.CLIGHT
+            if head[1] == 'x' or head[1] == 'c':
+                self.pr_ref[k] = pr_
+            else:
+                self.pr[k, ch] = pr_
             if self.monlevel >= 2:
-                print(f"[ED] time={time_:6d} prn={prn:2d} type={type_}")
-
-            # [I/NAV]
-            # even/odd,page-type,data(1/2),tail => 1,1,112,6
-            # evan/odd,page-type,data(2/2),field1,crc,field2,tail
-            # => 1,1,16,64,24,8,6
-            # For E1B: field1(64) = OSNMA(40)+SAR(22)+spare(2), field2(8)=SSP
-            # For E5B: field1(64) = resv, field2(8) = resv
-
-            # [FNAV]
-            # page-type(6), nav(208), crc(24), tail(6)
-
-            # type_ = 0:E1B(INAV), 1:E5a(FNAV), 2:E5b(INAV), 6:E6(CNAV)
-            if type_ == 0 or type_ == 2:  # INAV
-                b = buff[12:]
-                if self.flg_rnxnav:
-                    eph = self.rn.decode_gal_inav(
-                        self.week, time_, sat, type_, b)
-                    if eph is not None:
-                        self.re.rnx_nav_body(eph, self.fh_rnxnav)
-                if self.flg_galinav and self.week >= 0:
-                    self.fh_galinav.write(
-                        "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n"
-                        .format(self.week, time_, prn, type_, len_,
-                                hexlify(b).decode()))
-            elif type_ == 1:  # FNAV
-                b = buff[12:]
-                if self.flg_rnxnav:
-                    eph = self.rn.decode_gal_fnav(
-                        self.week, time_, sat, type_, b)
-                    if eph is not None:
-                        self.re.rnx_nav_body(eph, self.fh_rnxnav)
-                if self.flg_galfnav and self.week >= 0:
-                    self.fh_galfnav.write(
-                        "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n"
-                        .format(self.week, time_, prn, type_, len_,
-                                hexlify(b).decode()))
-            elif type_ == 6:  # CNAV
-                if self.flg_gale6 and self.week >= 0:
-                    self.fh_gale6.write(
-                        "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n"
-                        .format(self.week, time_, prn, type_, len_,
-                                hexlify(buff[12:]).decode()))
-
-        elif head == 'WD':  # SBAS Navigation data
-            prn, time_, type_, len_ = st.unpack_from('<BLBB', buff, 5)
+                print("{:2s} {:d} {:3d} {:14.3f}".
+                      format(head, self.sys[k], self.prn[k], pr_))
+
+    def decode_icp(self, buff, len_, head):
+        """ Integer Carrier-Phase """
+        ch = self.ch_t[head[0]]
+        nsat = (len_-6)//4
+        if self.sys == []:
+            return
+        rcp = st.unpack_from('<'+'i'*nsat, buff, 5)
+        for k in range(nsat):
+            if rcp[k] == 0x7fffffff or self.pr_ref[k] == 0:
+                continue
+            ref = self.pr_ref[k]/rCST.CLIGHT
+            freq, code = self.tofreq(head[0], self.sys[k])
+            fn = self.freq_sys(self.sys[k], freq, self.freqn[k])
+            # self.fn_t[ch]
+            self.cp[k, ch] = (rcp[k]*rCST.P2_40+ref)*fn
+            self.code[k, ch] = code
+            # if self.sys[k] == GNSS.QZS:
+            #    cp = self.cp[k, ch]
             if self.monlevel >= 2:
-                print("[WD] prn={:d} tow={:d} type={:d}".
-                      format(prn, time_, type_))
-
-            sat = prn2sat(uGNSS.SBS, prn)
-            b = buff[12:]
-            if self.flg_sbas and self.flg_rnxnav:
-                seph = self.rn.decode_sbs_l1(self.week, time_, sat, b)
-                if seph is not None:
-                    self.re.rnx_snav_body(seph, self.fh_rnxnav)
-
-            if self.flg_sbas and self.week >= 0:
-                if self.sbs_ref > 0 and prn != self.sbs_ref:
-                    return
-                self.fh_sbas.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                                   format(self.week, time_, prn, type_, len_,
-                                          hexlify(b).decode()))
-
-        elif head[0] == 'r' and head[1] in self.ch_t.keys():
-            # Integer Pseudo-ranges
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//4
-            Ksys_t = {GNSS.GPS: 1e-11, GNSS.GLO: 1e-11, GNSS.GAL: 2e-11,
-                      GNSS.SBS: 1e-11, GNSS.QZS: 2e-11, GNSS.BDS: 2e-11,
-                      GNSS.IRN: 2e-11}
-            Asys_t = {GNSS.GPS: 0.075, GNSS.GLO: 0.075, GNSS.GAL: 0.085,
-                      GNSS.SBS: 0.125, GNSS.QZS: 0.125, GNSS.BDS: 0.105,
-                      GNSS.IRN: 0.105}
-
-            if self.sys == []:
-                return
-            spr = st.unpack_from('<'+'i'*nsat, buff, 5)
-            for k in range(nsat):
-                Ksys = Ksys_t[self.sys[k]]
-                Asys = Asys_t[self.sys[k]]
-                pr_ = (spr[k]*Ksys+Asys)*rCST.CLIGHT
-                if head[1] == 'x' or head[1] == 'c':
-                    self.pr_ref[k] = pr_
-                else:
-                    self.pr[k, ch] = pr_
-                if self.monlevel >= 2:
-                    print("{:2s} {:d} {:3d} {:14.3f}".
-                          format(head, self.sys[k], self.prn[k], pr_))
-
-        elif head[1] == 'p' and head[0] in self.ch_t.keys():
-            # Integer Carrier-Phase
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//4
-            if self.sys == []:
-                return
-            rcp = st.unpack_from('<'+'i'*nsat, buff, 5)
-            for k in range(nsat):
-                if rcp[k] == 0x7fffffff or self.pr_ref[k] == 0:
-                    continue
-                ref = self.pr_ref[k]/rCST.CLIGHT
-                freq, code = self.tofreq(head[0], self.sys[k])
-                fn = self.freq_sys(self.sys[k], freq, self.freqn[k])
-                # self.fn_t[ch]
-                self.cp[k, ch] = (rcp[k]*rCST.P2_40+ref)*fn
-                self.code[k, ch] = code
-                if self.sys[k] == GNSS.GPS and self.prn[k] == 24:
-                    sys = self.sys[k]
-                # if self.sys[k] == GNSS.QZS:
-                #    cp = self.cp[k, ch]
-                if self.monlevel >= 2:
-                    print("{:2s} {:d} {:3d} {:14.3f}".
-                          format(head, self.sys[k], self.prn[k],
-                                 self.cp[k, ch]))
-
-        elif head[1] == 'r' and head[0] in self.ch_t.keys():
-            # Integer Relative Pseudo-ranges
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//2
-            if self.sys == []:
-                return
-            srpr = st.unpack_from('<'+'h'*nsat, buff, 5)
-            for k in range(nsat):
-                if srpr[k] == 0x7fff or self.pr_ref[k] == 0:
-                    continue
-                ref = self.pr_ref[k]
-                self.pr[k, ch] = (1e-11*srpr[k]+2e-7)*rCST.CLIGHT+ref
-                # if self.sys[k] == GNSS.QZS:
-                #    pr = self.pr[k, ch]
-                if self.monlevel >= 2:
-                    print("{:2s} {:d} {:3d} {:14.3f}".
-                          format(head, self.sys[k], self.prn[k],
-                                 self.pr[k, ch]))
-
-        elif head[0] == 's' and head[1] in self.ch_t.keys():  # CNO x 256
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//2
-            self.CNO[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
+                print("{:2s} {:d} {:3d} {:14.3f}".
+                      format(head, self.sys[k], self.prn[k],
+                             self.cp[k, ch]))
+
+    def decode_irpr(self, buff, len_, head):
+        """ Integer Relative Pseudo-ranges """
+        ch = self.ch_t[head[0]]
+        nsat = (len_-6)//2
+        if self.sys == []:
+            return
+        srpr = st.unpack_from('<'+'h'*nsat, buff, 5)
+        for k in range(nsat):
+            if srpr[k] == 0x7fff or self.pr_ref[k] == 0:
+                continue
+            ref = self.pr_ref[k]
+            self.pr[k, ch] = (1e-11*srpr[k]+2e-7)*rCST.CLIGHT+ref
+            # if self.sys[k] == GNSS.QZS:
+            #    pr = self.pr[k, ch]
             if self.monlevel >= 2:
-                print("[{:2s}] nsat={:d}".format(head, nsat))
-
-        elif head[0] == 'j' and head[1] in self.ch_t.keys():  # CNO x 256 data
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//2
-            self.CNO[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
-            if self.monlevel >= 1:
-                print("[{:2s}] nsat={:d}".format(head, nsat))
-
-        elif head == 'ID':  # ionosphere delay
-            nsat = (len_-6)//4
-            # iono = st.unpack_from('<'+'f'*nsat, buff, 5)
-
-        elif head[1] == 'm' and head[0] in self.ch_t.keys():
-            # Pseudo-ranges correction
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//2
-            self.prc[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
-            mode = st.unpack_from('b', buff, 5+nsat*2)[0]
-            if self.monlevel >= 1:
-                print("[{:2s}] nsat={:d} mode={:d}".format(head, nsat, mode))
-
-        elif head[1] == 'f' and head[0] in self.ch_t.keys():  # CP correction
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//2
-            self.cpc[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
-            mode = st.unpack_from('b', buff, 5+nsat*2)[0]
-            if self.monlevel >= 1:
-                print("[{:2s}] nsat={:d} mode={:d}".format(head, nsat, mode))
-
-        elif head[0] == 'R' and head[1].lower() in self.ch_t.keys():  # PR
-            ch = self.ch_t[head[1].lower()]
-            nsat = (len_-6)//8
-            pr_ = np.array(st.unpack_from('d'*nsat, buff, 5))
-            if self.navic_work_around:
-                pr_[pr_ < 0 & (np.array(self.sys) == GNSS.IRN)] = np.nan
-            if head[1] == 'X':  # [RX]
-                self.PR_REF[:nsat] = pr_
-            else:
-                self.pr[:nsat, ch] = pr_
-
-        elif head[0] == 'P' and head[1].lower() in self.ch_t.keys():
-            # Carrier-Phase
-            ch = self.ch_t[head[1].lower()]
-            nsat = (len_-6)//8
-            cp_ = np.array(st.unpack_from('d'*nsat, buff, 5))
-            if self.navic_work_around:
-                cp_[cp_ < 0 & (np.array(self.sys) == GNSS.IRN)] = np.nan
-            self.cp[:nsat, ch] = cp_
-
-        elif head[0] == 'c' and head[1] in self.ch_t.keys():
-            # smoothing corrections
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//2
-            # smooth = st.unpack_from('h'*nsat, buff, 5)
-        elif head[0] == 'D' and head[1].lower() in self.ch_t.keys():
-            # doppler [Hz*1e-4]
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//4
-            dp = st.unpack_from('<'+'l'*nsat, buff, 5)
-            for k in range(nsat):
-                self.dp[k, ch] = dp[k]*1e-4
-                if dp[k] == 2147483647:
-                    self.dp[k, ch] = 0.0
-
-        elif head[0] == 'E' and head[1].lower() in self.ch_t.keys():
-            # C/N [dB-Hz]
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//1
-            cnr = st.unpack_from('b'*nsat, buff, 5)
-            for k in range(nsat):
-                if cnr[k] == -1:
-                    continue
-                if self.monlevel >= 2:
-                    print("{:2s} {:d} {:3d} {:3d}".
-                          format(head, self.sys[k], self.prn[k], cnr[k]))
-
-        elif head[1] == 'E' and head[0].lower() in self.ch_t.keys():
-            # C/Nx4 [dB-Hz]
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//1
-            cnr = st.unpack_from('B'*nsat, buff, 5)
-            for k in range(nsat):
-                if cnr[k] == 255:
-                    continue
-                self.CNO[k, ch] = cnr[k]*0.25
-        # elif head == 'SE':  # security (skip)
-        #    data = st.unpack_from('bbbbb', buff, 5)
-        elif head == 'GE':  # GPS ephemeris
-            self.decode_eph(buff, GNSS.GPS, len_)
-        elif head == 'QE':  # QZS ephemeris
-            self.decode_eph(buff, GNSS.QZS, len_)
-        elif head == 'EN':  # Galileo ephemeris
-            self.decode_eph(buff, GNSS.GAL, len_)
-        elif head == 'CN':  # BDS ephemeris
-            self.decode_eph(buff, GNSS.BDS, len_)
-        elif head == 'NE':  # GLO ephemeris
-            sv, frqnum, dne, tk, tb = st.unpack_from('<Bbhll', buff, 5)
-        elif head == 'WE':  # SBAS ephemeris
-            sbasprn, gpsprn, iod, acc, tod = st.unpack_from('<BBBBL', buff, 5)
-        elif head[0] == 'F' and head[1].lower() in self.ch_t.keys():
-            # signal lock loop flags
-            ch = self.ch_t[head[1]]
-            nsat = (len_-6)//2
-            flags = st.unpack_from('<'+'H'*nsat, buff, 5)
-            self.code[:nsat, ch] = flags
-
-        elif head[1] == 'd' and head[0] in self.ch_t.keys():
-            # relative doppler [Hz*1e-4]
-            ch = self.ch_t[head[0]]
-            nsat = (len_-6)//2
-            # srdp = st.unpack_from('h'*nsat, buff, 5)
-        elif head in ('ST', 'SP', 'PV', 'PG', 'IE', 'UO'):
-            # [ST] Solution Time-Tag
-            # [SP] Position Covariance Matrix
-            # [PV] Cartesian Position and Velocity
-            # [PG] Geodetic Position
-            # [IE] IRNSS Ephemeris
-            # [UO] GPS UTC Time Parameters
-            pass
+                print("{:2s} {:d} {:3d} {:14.3f}".
+                      format(head, self.sys[k], self.prn[k],
+                             self.pr[k, ch]))
+
+    def decode_cno(self, buff, len_, head):
+        """ CNO x 256 """
+        ch = self.ch_t[head[1]]
+        nsat = (len_-6)//2
+        self.CNO[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
+        if self.monlevel >= 2:
+            print("[{:2s}] nsat={:d}".format(head, nsat))
+
+    def decode_cnod(self, buff, len_, head):
+        """ CNO x 256 data """
+        ch = self.ch_t[head[1]]
+        nsat = (len_-6)//2
+        self.CNO[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
+        if self.monlevel >= 1:
+            print("[{:2s}] nsat={:d}".format(head, nsat))
+
+    def decode_prc(self, buff, len_, head):
+        """ Pseudo-ranges correction """
+        ch = self.ch_t[head[0]]
+        nsat = (len_-6)//2
+        self.prc[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
+        mode = st.unpack_from('b', buff, 5+nsat*2)[0]
+        if self.monlevel >= 1:
+            print("[{:2s}] nsat={:d} mode={:d}".format(head, nsat, mode))
+
+    def decode_cpc(self, buff, len_, head):
+        """ CP correction """
+        ch = self.ch_t[head[0]]
+        nsat = (len_-6)//2
+        self.cpc[0:nsat, ch] = st.unpack_from('<'+'h'*nsat, buff, 5)
+        mode = st.unpack_from('b', buff, 5+nsat*2)[0]
+        if self.monlevel >= 1:
+            print("[{:2s}] nsat={:d} mode={:d}".format(head, nsat, mode))
+
+    def decode_pr(self, buff, len_, head):
+        """ Pseudo-ranges """
+        ch = self.ch_t[head[1].lower()]
+        nsat = (len_-6)//8
+        pr_ = np.array(st.unpack_from('d'*nsat, buff, 5))
+        if self.navic_work_around and len(self.sys) == nsat:
+            pr_[(pr_ < 0) & (np.array(self.sys) == GNSS.IRN)] = np.nan
+        if head[1] == 'X':  # [RX]
+            self.PR_REF[:nsat] = pr_
         else:
+            self.pr[:nsat, ch] = pr_
+
+    def decode_cp(self, buff, len_, head):
+        """ Carrier-Phase """
+        ch = self.ch_t[head[1].lower()]
+        nsat = (len_-6)//8
+        cp_ = np.array(st.unpack_from('d'*nsat, buff, 5))
+        if self.navic_work_around and len(self.sys) == nsat:
+            cp_[(cp_ < 0) & (np.array(self.sys) == GNSS.IRN)] = np.nan
+        self.cp[:nsat, ch] = cp_
+
+    def decode_dop(self, buff, len_, head):
+        """ doppler [Hz*1e-4] """
+        ch = self.ch_t[head[1]]
+        nsat = (len_-6)//4
+        dp = st.unpack_from('<'+'l'*nsat, buff, 5)
+        for k in range(nsat):
+            self.dp[k, ch] = dp[k]*1e-4
+            if dp[k] == 2147483647:
+                self.dp[k, ch] = 0.0
+
+    def decode_cnr(self, buff, len_, head):
+        """ C/N [dB-Hz] """
+        nsat = (len_-6)//1
+        cnr = st.unpack_from('b'*nsat, buff, 5)
+        for k in range(nsat):
+            if cnr[k] == -1:
+                continue
+            if self.monlevel >= 2:
+                print("{:2s} {:d} {:3d} {:3d}".
+                      format(head, self.sys[k], self.prn[k], cnr[k]))
+
+    def decode_cnr4(self, buff, len_, head):
+        """ C/Nx4 [dB-Hz] """
+        ch = self.ch_t[head[0]]
+        nsat = (len_-6)//1
+        cnr = st.unpack_from('B'*nsat, buff, 5)
+        for k in range(nsat):
+            if cnr[k] == 255:
+                continue
+            self.CNO[k, ch] = cnr[k]*0.25
+
+    def decode_flags(self, buff, len_, head):
+        """ signal lock loop flags """
+        ch = self.ch_t[head[1]]
+        nsat = (len_-6)//2
+        flags = st.unpack_from('<'+'H'*nsat, buff, 5)
+        self.code[:nsat, ch] = flags
+
+    def decode_ephem(self, buff, len_, head):
+        """ GPS, QZS, Galileo and BDS ephemeris """
+        self.decode_eph(buff, self.eph_t[head], len_)
+
+    def init_handler(self):
+        """ set up the message handlers for the enabled output """
+        keys = set(self.ch_t.keys())
+        self.handler = {}
+        for head, name, flags in self.msg_t:
+            if head[0] in '?*':
+                heads = [c+head[1] for c in self.head_t(head[0], keys)]
+            elif head[1] in '?*':
+                heads = [head[0]+c for c in self.head_t(head[1], keys)]
+            else:
+                heads = [head]
+            if name is not None and flags and \
+               not any(enabled(self, f) for f in flags):
+                name = None
+            for h in heads:
+                self.handler.setdefault(
+                    h, None if name is None else getattr(self, name))
+
+    def head_t(self, c, keys):
+        """ characters matched by '?' (key of ch_t) or '*' (in any case) """
+        if c == '?':
+            return keys
+        return keys | {c_.upper() for c_ in keys}
+
+    def register(self, head, handler):
+        """ register handler(buff, len_, head) for the message [head] """
+        self.handler[head] = handler
+
+    def msg_skip(self, mid):
+        return mid in self.handler and self.handler[mid] is None
+
+    def decode(self, buff, len_, sys=[], prn=[]):
+        head = bytes(buff[0:2]).decode()
+        if head == 'RE' and self.monlevel > 1:
+            print("[{:2s}] {:}".format(head, bytes(buff[5:len_]).decode()))
+
+        if head not in self.handler:
             print("[{:s}] undef".format(head))
+        elif self.handler[head] is not None:
+            self.handler[head](buff, len_, head)
         return 0
 
 
-def decode(f, opt, args):
+def decode(f, opt, args, rng=None, prefix=None):
 
-    print("Decoding {}".format(f))
+    if rng is None:
+        print("Decoding {}".format(f))
+    else:
+        print("Decoding {} [{}:{}]".format(f, rng[1], rng[2]))
 
     bdir, fname = os.path.split(f)
 
-    prefix = fname[4:].removesuffix('.jps')+'_'
-    prefix = str(Path(bdir) / prefix) if bdir else prefix
+    if prefix is None and f == '-':
+        prefix = 'stdin_'
+    elif prefix is None:
+        prefix = fname[4:].removesuffix('.jps')+'_'
+        prefix = str(Path(bdir) / prefix) if bdir else prefix
     jpsdec = jps(opt=opt, prefix=prefix, gnss_t=args.gnss)
     jpsdec.monlevel = 1
+    if args.stat:
+        rcvStat(jpsdec, prefix+'stat.json')
+    if args.npy and rng is None:  # chunks are merged into the archive
+        nav_arc(jpsdec)
 
     # jpsdec.prn_ref = 199
     jpsdec.prn_ref = -1
@@ -970,19 +1050,30 @@ def decode(f, opt, args):
         jpsdec.re.rectype = args.receiver
 
     path = str(Path(bdir) / fname) if bdir else fname
-    blen = os.path.getsize(path)
-    with open(path, 'rb') as f:
-        msg = f.read(blen)
-        maxlen = len(msg)-5
-        # maxlen = 400000
-        for k in range(maxlen):
-            stat = jpsdec.sync(msg, k)
-            if not stat:
-                continue
-            k += 1
-            len_ = int(msg[k+2:k+5], 16)+5
+    if rng is None and f != '-' and (args.start or args.end):
+        rng = time_window(jpsdec, path, args.start, args.end)
+
+    if rng is None and args.chunks > 1:
+        decode_chunks(decode, jpsdec, path, opt, args)
+        jpsdec.file_close()
+        return
+
+    if not args.ephall:
+        ephCache(jpsdec)
+    if not args.sync:
+        fileWriter(jpsdec)
+
+    if args.stream or f == '-':
+        with open_stream(path) as stream:
+            for msg, len_ in stream_frames(jpsdec, stream,
+                                           follow=args.follow):
+                jpsdec.decode(msg, len_)
+        jpsdec.file_close()
+        return
+
+    with open_mmap(path) as msg:
+        for k, len_ in chunk_frames(jpsdec, msg, rng):
             jpsdec.decode(msg[k:k+len_], len_)
-            k += len_
 
     jpsdec.file_close()
 
@@ -1009,6 +1100,35 @@ def main():
     parser.add_argument("-j", "--jobs", default=int(mp.cpu_count() / 2),
                         type=int, help='Max. number of parallel processes')
 
+    parser.add_argument("-c", "--chunks", default=0, type=int,
+                        help="Number of chunks per file decoded in parallel"
+                        " [0: off]")
+    parser.add_argument("--overlap", default=4096, type=int,
+                        help="Lead-in size before each chunk in kB [4096]")
+    parser.add_argument("-s", "--stream", action='store_true',
+                        help="Streaming decoding of a pipe or growing file,"
+                        " '-' reads from stdin")
+    parser.add_argument("--follow", default=0.0, type=float,
+                        help="Wait time for new data in streaming mode in s"
+                        " [0: stop at end of file]")
+    parser.add_argument("--stat", action='store_true',
+                        help="Write per message statistics to *stat.json")
+    parser.add_argument("--npy", action='store_true',
+                        help="Write navigation message logs as binary"
+                        " archives *.npy")
+    parser.add_argument("--ephall", action='store_true',
+                        help="Write all decoded ephemerides, also unchanged"
+                        " ones")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    parser.add_argument("--start", default=None,
+                        help="Start of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+    parser.add_argument("--end", default=None,
+                        help="End of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+
     # Retrieve all command line arguments
     #
     args = parser.parse_args()
@@ -1033,8 +1153,17 @@ def main():
 
     # Start processing pool
     #
-    with mp.Pool(processes=args.jobs) as pool:
-        pool.starmap(decode, [(f, opt, args) for f in glob(args.inpFileName)])
+    if args.inpFileName == '-':
+        decode('-', opt, args)
+    elif args.chunks > 1:
+        # Files are processed one by one, each in parallel chunks
+        #
+        for f in glob(args.inpFileName):
+            decode(f, opt, args)
+    else:
+        with mp.Pool(processes=args.jobs) as pool:
+            pool.starmap(decode, [(f, opt, args)
+                                  for f in glob(args.inpFileName)])
 
 
 # Call main function
@@ -15,14 +15,25 @@ from binascii import hexlify
 import bitstruct.c as bs
 from glob import glob
 import multiprocessing as mp
-import numpy as np
 import os
 from pathlib import Path
 import struct as st
 
-from cssrlib.gnss import uGNSS, uTYP, prn2sat, Obs, rSigRnx, gpst2time, uSIG, \
+from cssrlib.gnss import uGNSS, uTYP, prn2sat, rSigRnx, gpst2time, uSIG, \
     timediff, gtime_t, copy_buff
 
+from rcvcrc import crc32
+from rcvarc import nav_arc
+from rcveph import ephCache
+from rcvidx import time_window
+from rcvio import open_mmap, open_stream, stream_frames
+from rcvobs import rcvEpoch
+from rcvpar import chunk_frames, decode_chunks
+from rcvscan import msg_set
+from rcvstat import rcvStat
+from rcvtap import tap_page
+from rcvwrt import fileWriter, write_nav
+
 CPSTD_VALID = 0.2           # stdev threshold of valid carrier-phase
 
 
@@ -30,6 +41,30 @@ class nov(rcvDec):
     """ class for Novatel Binary Format decoder """
     tow = -1
     week = -1
+    preamble = rb'\xaa\x44\x12'
+    sync_len = 28
+    crc_len = 4
+    ep = None
+
+    # messages {id: rcvOpt flags} decoded if any of the flags is set or no
+    # flags are given, other messages are skipped
+    mid_t = {
+        25: ('flg_gpslnav',),  # RAWGPSSUBFRAME
+        43: ('flg_rnxobs',),  # RANGEB
+        722: ('flg_gloca',),  # GLORAWSTRING
+        1330: ('flg_qzslnav',),  # QZSSRAWSUBFRAME
+        1413: ('flg_galfnav',),  # GALFNAVRAWPAGE
+        1414: ('flg_galinav',),  # GALINAVRAWWORD
+        1695: ('flg_bdsd12',),  # BDSRAWNAVSUBFRAME
+        2105: ('flg_irnnav',),  # NAVICRAWSUBFRAME
+        2185: ('flg_sbas',),  # RAWSBASFRAME2
+        2239: ('flg_gale6',),  # GALCNAVRAWPAGE
+        2261: ('flg_qzscnav',),  # QZSSCNAVRAWMESSAGE
+        2262: ('flg_gpscnav',),  # GPSCNAVRAWMESSAGE
+        2373: ('flg_bdsb1c',),  # BDSBCNAV1RAWMESSAGE
+        2374: ('flg_bdsb2a',),  # BDSBCNAV2RAWMESSAGE
+        2411: ('flg_bdsb2b',),  # BDSBCNAV3RAWMESSAGE
+    }
 
     def __init__(self, opt=None, prefix='', gnss_t='GECJ'):
         super().__init__(opt, prefix, gnss_t)
@@ -92,6 +127,16 @@ class nov(rcvDec):
                 self.sig_tab[sys][uTYP.D].append(rSigRnx(sys, uTYP.D, sig))
                 self.sig_tab[sys][uTYP.S].append(rSigRnx(sys, uTYP.S, sig))
 
+        # signal type -> column index of sig_tab, -1 if not used
+        self.sig_idx = {}
+        for sys in self.sig_t:
+            self.sig_idx[sys] = [-1]*32
+            for key in self.sig_t[sys]:
+                sig = self.sig_t[sys][key][uTYP.L]
+                if sig in self.sig_tab[sys][uTYP.L]:
+                    self.sig_idx[sys][key] = \
+                        self.sig_tab[sys][uTYP.L].index(sig)
+
         self.bds_cnv1 = {}
         for k in range(uGNSS.BDSMAX):
             self.bds_cnv1[k] = bytearray(124)
@@ -99,29 +144,33 @@ class nov(rcvDec):
         self.head_len = 28
         self.time_p = gtime_t()
 
+        self.mid_use = msg_set(self, self.mid_t)
+
     def sync(self, buff, k):
         return buff[k] == 0xAA and buff[k+1] == 0x44 and buff[k+2] == 0x12
 
     def msg_len(self, msg, k):
         return st.unpack_from('<H', msg, k+8)[0]+28
 
+    def msg_id(self, msg, k):
+        return st.unpack_from('<H', msg, k+4)[0]
+
+    def msg_skip(self, mid):
+        return mid not in self.mid_use
+
+    def msg_time(self, msg, k):
+        sts, week, tow = st.unpack_from('<BHI', msg, k+13)
+        if sts == 20 or week == 0:
+            return None
+        return week*604800+tow*1e-3
+
     def crc32(self, data, len_):
-        poly_crc32 = 0xedb88320
-        crc = 0
-
-        for i in range(len_):
-            crc ^= data[i]
-            for _ in range(8):
-                if crc & 1:
-                    crc = (crc >> 1) ^ poly_crc32
-                else:
-                    crc >>= 1
-        return crc
+        return crc32(data[:len_])
 
     def check_crc(self, msg, k):
         len_ = st.unpack_from('<H', msg, k+8)[0]+28
         crc_ = st.unpack_from('<I', msg, k+len_)[0]
-        crc = self.crc32(msg[k:k+len_], len_)
+        crc = crc32(msg[k:k+len_])
         if crc_ != crc:
             if self.monlevel > 0:
                 print("checksum error.")
@@ -132,10 +181,6 @@ class nov(rcvDec):
         """ decode RANGEB """
         k = self.head_len
 
-        obs = Obs()
-        obs.time = self.time
-        obs.sig = self.sig_tab
-
         nsig_max = 0
         for s in self.sig_tab:
             if len(self.sig_tab[s][uTYP.L]) > nsig_max:
@@ -146,13 +191,9 @@ class nov(rcvDec):
         self.nsig[uTYP.D] = nsig_max
         self.nsig[uTYP.S] = nsig_max
 
-        obs.sat = np.empty(0, dtype=np.int32)
-
-        pr = {}
-        cp = {}
-        dp = {}
-        lli = {}
-        cn = {}
+        if self.ep is None:
+            self.ep = rcvEpoch(nsig_max)
+        ep = self.ep
 
         nobs = st.unpack_from('<I', buff, k)[0]
         k += 4
@@ -196,55 +237,28 @@ class nov(rcvDec):
             if sys not in self.sig_t.keys():
                 continue
 
-            sig = self.sig_t[sys][code][uTYP.L]
-
-            if sig not in self.sig_tab[sys][sig.typ]:
+            idx = self.sig_idx[sys][code]
+            if idx < 0:
                 if self.monlevel > 1:
-                    print("skip code={:}".format(sig))
+                    print("skip code={:}".format(code))
                 continue
-            idx = self.sig_tab[sys][sig.typ].index(sig)
-
-            if sat not in pr.keys():
-                pr[sat] = {}
-                cp[sat] = {}
-                dp[sat] = {}
-                lli[sat] = {}
-                cn[sat] = {}
 
             slip = 0x01 if lockt == 0 else 0
             lli_ = slip + halfc*0
 
-            pr[sat][idx] = pr_
-            cp[sat][idx] = cp_
-            dp[sat][idx] = dop_
-            lli[sat][idx] = lli_
-            cn[sat][idx] = cn0
-
-            if sat not in obs.sat:
-                obs.sat = np.append(obs.sat, sat)
+            j = ep.slot(sat)
+            ep.P[j, idx] = pr_
+            ep.L[j, idx] = cp_
+            ep.D[j, idx] = dop_
+            ep.lli[j, idx] = lli_
+            ep.S[j, idx] = cn0
 
             # print(f"OBS {gnss}:{prn:3d} {svid} {sigid:2d}")
 
-        nsat = len(obs.sat)
-        if nsat == 0:
+        if ep.n == 0:
             return None
 
-        obs.sat.sort()
-        obs.P = np.zeros((nsat, self.nsig[uTYP.C]), dtype=np.float64)
-        obs.L = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.float64)
-        obs.D = np.zeros((nsat, self.nsig[uTYP.D]), dtype=np.float64)
-        obs.S = np.zeros((nsat, self.nsig[uTYP.S]), dtype=np.float64)
-        obs.lli = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.int32)
-
-        for k, sat in enumerate(obs.sat):
-            for i in pr[sat].keys():
-                obs.P[k][i] = pr[sat][i]
-                obs.L[k][i] = cp[sat][i]
-                obs.D[k][i] = dp[sat][i]
-                obs.S[k][i] = cn[sat][i]
-                obs.lli[k][i] = lli[sat][i]
-
-        return obs
+        return ep.finalize(self.time, self.sig_tab)
 
     def decode_gps_lnav(self, buff, sys, prn, k):
         sat = prn2sat(sys, prn)
@@ -269,15 +283,10 @@ class nov(rcvDec):
 
         fh_ = self.fh_qzscnav if sys == uGNSS.QZS else self.fh_gpscnav
 
-        fh_.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                  format(self.week, int(self.tow), prn, type_, blen))
         msg = bytearray(40)
-        for i in range(38):
-            d = st.unpack_from('<B', buff, k)[0]
-            fh_.write("{:02x}".format(d))
-            msg[i] = d
-            k += 1
-        fh_.write("\n")
+        msg[:38] = buff[k:k+38]
+        k += 38
+        write_nav(fh_, self.week, int(self.tow), prn, type_, blen, msg[:38])
 
         eph = self.rn.decode_gps_cnav(
             self.week, self.tow, sat, msg)
@@ -355,17 +364,11 @@ class nov(rcvDec):
 
             if self.flg_galfnav:
                 type_ = 0
-                self.fh_galfnav.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                      format(self.week, int(self.tow), prn,
-                                             type_, 27))
-
                 msg = bytearray(31)
-                for i in range(27):
-                    d = st.unpack_from('<B', buff, k)[0]
-                    self.fh_galfnav.write("{:02x}".format(d))
-                    msg[i] = buff[k]
-                    k += 1
-                self.fh_galfnav.write("\n")
+                msg[:27] = buff[k:k+27]
+                k += 27
+                write_nav(self.fh_galfnav, self.week, int(self.tow), prn,
+                          type_, 27, msg[:27])
 
                 eph = self.rn.decode_gal_fnav(self.week, self.tow, sat, 1, msg)
                 if eph is not None:
@@ -385,19 +388,13 @@ class nov(rcvDec):
                 else:
                     return -1
 
-                self.fh_galinav.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                      format(self.week, int(self.tow), prn,
-                                             type_, 30))
-
                 msg = bytearray(20)
                 copy_buff(buff, msg, k*8, 2, 112)
                 copy_buff(buff, msg, (k+14)*8, 122, 16)
 
-                for i in range(16):
-                    d = st.unpack_from('<B', buff, k)[0]
-                    self.fh_galinav.write("{:02x}".format(d))
-                    k += 1
-                self.fh_galinav.write("\n")
+                write_nav(self.fh_galinav, self.week, int(self.tow), prn,
+                          type_, 30, buff[k:k+16])
+                k += 16
 
                 eph = self.rn.decode_gal_inav(self.week, self.tow,
                                               sat, 2, msg)
@@ -495,17 +492,13 @@ class nov(rcvDec):
             ch, prn, id_, page = st.unpack_from('<IIHH', buff, k)
             k += 12
 
+            blen = 58
+            type_ = 6
             if self.flg_gale6:
-                blen = 58
-                type_ = 6
-                self.fh_gale6.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                    format(self.week, int(self.tow), prn,
-                                           type_, blen))
-                for i in range(58):
-                    d = st.unpack_from('<B', buff, k)[0]
-                    self.fh_gale6.write("{:02x}".format(d))
-                    k += 1
-                self.fh_gale6.write("\n")
+                write_nav(self.fh_gale6, self.week, int(self.tow), prn,
+                          type_, blen, buff[k:k+58])
+            tap_page(self, 'gale6', self.week, int(self.tow), prn, type_,
+                     bytes(buff[k:k+58]))
 
         elif id_ == 2262:  # GPSCNAVRAWMESSAGE
             if self.flg_gpscnav:
@@ -579,16 +572,26 @@ class nov(rcvDec):
         return 0
 
 
-def decode(f, opt, args):
+def decode(f, opt, args, rng=None, prefix=None):
 
-    print("Decoding {}".format(f))
+    if rng is None:
+        print("Decoding {}".format(f))
+    else:
+        print("Decoding {} [{}:{}]".format(f, rng[1], rng[2]))
 
     bdir, fname = os.path.split(f)
 
-    prefix = fname[4:].removesuffix('.nvr')+'_'
-    prefix = str(Path(bdir) / prefix) if bdir else prefix
+    if prefix is None and f == '-':
+        prefix = 'stdin_'
+    elif prefix is None:
+        prefix = fname[4:].removesuffix('.nvr')+'_'
+        prefix = str(Path(bdir) / prefix) if bdir else prefix
     novdec = nov(opt, prefix=prefix, gnss_t=args.gnss)
     novdec.monlevel = 1
+    if args.stat:
+        rcvStat(novdec, prefix+'stat.json')
+    if args.npy and rng is None:  # chunks are merged into the archive
+        nav_arc(novdec)
     nep = 0
     nep_max = 0
 
@@ -600,27 +603,30 @@ def decode(f, opt, args):
         novdec.re.rectype = args.receiver
 
     path = str(Path(bdir) / fname) if bdir else fname
-    blen = os.path.getsize(path)
-    with open(path, 'rb') as f:
-        msg = f.read(blen)
-        maxlen = len(msg)-8
-        # maxlen = 7000000+10000
-        k = 0
-        while k < maxlen:
-            stat = novdec.sync(msg, k)
-            if not stat:
-                k += 1
-                continue
-            len_ = novdec.msg_len(msg, k)
-            if k+len_ >= maxlen:
-                break
-
-            if not novdec.check_crc(msg, k):
-                k += 1
-                continue
-
+    if rng is None and f != '-' and (args.start or args.end):
+        rng = time_window(novdec, path, args.start, args.end)
+
+    if rng is None and args.chunks > 1:
+        decode_chunks(decode, novdec, path, opt, args)
+        novdec.file_close()
+        return
+
+    if not args.ephall:
+        ephCache(novdec)
+    if not args.sync:
+        fileWriter(novdec)
+
+    if args.stream or f == '-':
+        with open_stream(path) as stream:
+            for msg, len_ in stream_frames(novdec, stream,
+                                           follow=args.follow):
+                novdec.decode(msg, len_)
+        novdec.file_close()
+        return
+
+    with open_mmap(path) as msg:
+        for k, len_ in chunk_frames(novdec, msg, rng):
             novdec.decode(msg[k:k+len_], len_)
-            k += len_+4
 
             nep += 1
             if nep_max > 0 and nep >= nep_max:
@@ -651,6 +657,35 @@ def main():
     parser.add_argument("-j", "--jobs", default=int(mp.cpu_count() / 2),
                         type=int, help='Max. number of parallel processes')
 
+    parser.add_argument("-c", "--chunks", default=0, type=int,
+                        help="Number of chunks per file decoded in parallel"
+                        " [0: off]")
+    parser.add_argument("--overlap", default=4096, type=int,
+                        help="Lead-in size before each chunk in kB [4096]")
+    parser.add_argument("-s", "--stream", action='store_true',
+                        help="Streaming decoding of a pipe or growing file,"
+                        " '-' reads from stdin")
+    parser.add_argument("--follow", default=0.0, type=float,
+                        help="Wait time for new data in streaming mode in s"
+                        " [0: stop at end of file]")
+    parser.add_argument("--stat", action='store_true',
+                        help="Write per message statistics to *stat.json")
+    parser.add_argument("--npy", action='store_true',
+                        help="Write navigation message logs as binary"
+                        " archives *.npy")
+    parser.add_argument("--ephall", action='store_true',
+                        help="Write all decoded ephemerides, also unchanged"
+                        " ones")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    parser.add_argument("--start", default=None,
+                        help="Start of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+    parser.add_argument("--end", default=None,
+                        help="End of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+
     # Retrieve all command line arguments
     #
     args = parser.parse_args()
@@ -8,32 +8,67 @@ RTCM 3 messages decoder
 """
 
 import argparse
+import asyncio
 from glob import glob
+import json
 import multiprocessing as mp
 import numpy as np
 import os
 from pathlib import Path
+import struct as st
+from urllib.parse import urlparse
 
 from cssrlib.gnss import uGNSS, uTYP, rSigRnx, Obs, gtime_t, timediff
+from cssrlib.gnss import gpst2time
 from cssrlib.rawnav import rcvDec, rcvOpt
 
 from cssrlib.rtcm import rtcm
 
+from rcvidx import time_window
+from rcvio import open_mmap, open_stream, stream_frames
+from rcvlive import decode_live, url_name
+from rcvntrip import PORT, caster
+from rcvpar import chunk_frames, decode_chunks
+from rcvscan import msg_set
+from rcvstat import rcvStat
+from rcvwrt import fileWriter
+
 
 class rtcmDec(rcvDec):
     tow = -1
     week = -1
+    preamble = rb'\xd3[\x00-\x03]'
+    sync_len = 3
+    crc_len = 3
     sat = []
     sys = []
     prn = []
     nsat = 0
     nmax = 96
     nsigmax = 7
+    weekref = -1  # GPS week of the message times, see set_week()
 
     pr = []
     cp = []
     dp = []
 
+    # messages {type: rcvOpt flags} decoded if any of the flags is set or
+    # no flags are given, other messages are skipped
+    mid_t = {
+        1005: (), 1006: (), 1007: (), 1008: (), 1033: (),  # station
+        1230: ('flg_rnxobs',),  # GLONASS code-phase biases
+    }
+    mid_t.update(dict.fromkeys(  # MSM1-7
+        [m+i for m in range(1070, 1140, 10) for i in range(1, 8)],
+        ('flg_rnxobs',)))
+    mid_t.update(dict.fromkeys(  # ephemerides
+        [1019, 1020, 1041, 1042, 63, 1043, 1044, 1045, 1046],
+        ('flg_rnxnav',)))
+    mid_t.update(dict.fromkeys(  # SSR, time of the ephemerides
+        list(range(1057, 1069))+list(range(1240, 1264)) +
+        list(range(1265, 1271))+[4076],
+        ('flg_rnxnav',)))
+
     def __init__(self, opt=None, prefix='', gnss_t='GECJ'):
         super().__init__(opt, prefix, gnss_t)
 
@@ -97,66 +132,141 @@ class rtcmDec(rcvDec):
                 uTYP.S: [rSigRnx('IS5A'), rSigRnx('IS1X')],
             }
 
+        # signal -> column index of sig_tab
+        self.sig_idx = {}
+        for sys in self.sig_tab:
+            self.sig_idx[sys] = {}
+            for k, sig in enumerate(self.sig_tab[sys][uTYP.L]):
+                self.sig_idx[sys][sig.sig] = k
+
+        # MSM signals -> (source, destination) columns of each system
+        self.col_map = {}
+
+        nsig_max = max([len(self.sig_tab[s][uTYP.L])
+                        for s in self.sig_tab], default=0)
+        for t in (uTYP.C, uTYP.L, uTYP.D, uTYP.S):
+            self.nsig[t] = nsig_max
+
         self.rtcm = rtcm()
         self.time_p = gtime_t()
         self.obs = None
+        self.init_buf(self.nmax)
 
         if opt is not None:
             self.init_param(opt=opt, prefix=prefix)
+        self.mid_use = msg_set(self, self.mid_t)
+
+    def msg_len(self, msg, k):
+        return (st.unpack_from('>H', msg, k+1)[0] & 0x3ff)+3
+
+    def msg_id(self, msg, k):
+        return st.unpack_from('>H', msg, k+3)[0] >> 4
+
+    def msg_skip(self, mid):
+        return mid not in self.mid_use
+
+    def msg_time(self, msg, k):
+        mt = self.msg_id(msg, k)
+        # MSM1-7 of GPS, SBAS, Galileo, QZSS, BDS and NavIC
+        if mt < 1071 or mt > 1137 or mt // 10 == 108 or \
+           mt % 10 < 1 or mt % 10 > 7:
+            return None
+        tow = (st.unpack_from('>L', msg, k+6)[0] >> 2)*1e-3
+        if mt // 10 == 112:  # BDT -> GPST
+            tow += 14.0
+        return self.rtcm.week*604800+tow
+
+    def check_crc(self, msg, k):
+        return self.rtcm.checksum(msg, k, len(msg))
+
+    def set_week(self, week):
+        """ set the GPS week of the messages, the start of the week is the
+            reference time of the ephemeris weeks until a message with time
+            is decoded, the messages other than those of mid_t are skipped
+            """
+        self.weekref = week
+        self.rtcm.week = week
+        self.rtcm.time = gpst2time(week, 0.0)
+
+    def init_buf(self, nmax):
+        """ epoch buffer of nmax satellites, the rows of the pending epoch
+            are kept """
+        n = self.nobs if self.obs is not None else 0
+        nsig = self.nsig[uTYP.L]
+        buf = Obs()
+        buf.P = np.zeros((nmax, nsig))
+        buf.L = np.zeros((nmax, nsig))
+        buf.S = np.zeros((nmax, nsig))
+        buf.D = np.zeros((nmax, nsig))
+        buf.lli = np.zeros((nmax, nsig), dtype=int)
+        buf.sat = np.zeros(nmax, dtype=int)
+        if n > 0:
+            for s in ('P', 'L', 'S', 'D', 'lli', 'sat'):
+                getattr(buf, s)[:n] = getattr(self.buf, s)[:n]
+        self.buf = buf
+
+    def cols(self, sys, sigs):
+        """ source and destination columns of the MSM signals sigs """
+        key = tuple(sig.sig for sig in sigs)
+        col = self.col_map.get(sys)
+        if col is None or col[0] != key:
+            sig_idx = self.sig_idx[sys]
+            src = [k for k, s in enumerate(key) if s in sig_idx]
+            dst = [sig_idx[key[k]] for k in src]
+            col = self.col_map[sys] = (key, np.array(src, dtype=int),
+                                       np.array(dst, dtype=int))
+        return col[1], col[2]
 
     def add_obs(self, obs):
-        self.obs.sat = np.hstack((self.obs.sat, obs.sat))
         nsat = len(obs.sat)
+        n = self.nobs
+        if n+nsat > len(self.buf.sat):
+            self.init_buf(max(2*len(self.buf.sat), n+nsat))
 
         sys = list(obs.sig)[0]
         if sys not in self.obs.sig:
             self.obs.sig[sys] = obs.sig[sys]
 
-        obs_ = Obs()
-        obs_.P = np.zeros((nsat, self.nsig[uTYP.C]))
-        obs_.L = np.zeros((nsat, self.nsig[uTYP.L]))
-        obs_.S = np.zeros((nsat, self.nsig[uTYP.S]))
-        obs_.D = np.zeros((nsat, self.nsig[uTYP.D]))
-        obs_.lli = np.zeros((nsat, self.nsig[uTYP.C]), dtype=int)
-
-        obs.P[np.isnan(obs.L)] = 0.0
-        obs.L[np.isnan(obs.L)] = 0.0
-
-        for k, sig in enumerate(obs.sig[sys][uTYP.L]):
-            if sig in self.sig_tab[sys][uTYP.L]:
-                idx = self.sig_tab[sys][uTYP.L].index(sig)
-                obs_.P[:, idx] = obs.P[:, k]
-                obs_.L[:, idx] = obs.L[:, k]
-                obs_.S[:, idx] = obs.S[:, k]
-                obs_.D[:, idx] = obs.D[:, k]
-                obs_.lli[:, idx] = obs.lli[:, k]
-
-        self.obs.P = np.vstack((self.obs.P, obs_.P))
-        self.obs.L = np.vstack((self.obs.L, obs_.L))
-        self.obs.S = np.vstack((self.obs.S, obs_.S))
-        self.obs.D = np.vstack((self.obs.D, obs_.D))
-        self.obs.lli = np.vstack((self.obs.lli, obs_.lli))
-
-    def init_obs(self, time):
-        nsig_max = 0
-        for s in self.sig_tab:
-            if len(self.sig_tab[s][uTYP.L]) > nsig_max:
-                nsig_max = len(self.sig_tab[s][uTYP.L])
+        nan = np.isnan(obs.L)
+        obs.P[nan] = 0.0
+        obs.L[nan] = 0.0
 
-        self.nsig[uTYP.C] = nsig_max
-        self.nsig[uTYP.L] = nsig_max
-        self.nsig[uTYP.D] = nsig_max
-        self.nsig[uTYP.S] = nsig_max
+        src, dst = self.cols(sys, obs.sig[sys][uTYP.L])
+        buf = self.buf
+        buf.sat[n:n+nsat] = obs.sat
+        for s in ('P', 'L', 'S', 'D', 'lli'):
+            v = getattr(buf, s)[n:n+nsat]
+            if len(dst) < v.shape[1]:
+                v.fill(0)
+            v[:, dst] = getattr(obs, s)[:, src]
+        self.nobs = n+nsat
 
+    def init_obs(self, time):
         self.obs = Obs()
         self.obs.time = time
-        self.obs.P = np.empty((0, nsig_max))
-        self.obs.L = np.empty((0, nsig_max))
-        self.obs.D = np.empty((0, nsig_max))
-        self.obs.S = np.empty((0, nsig_max))
-        self.obs.lli = np.empty((0, nsig_max), dtype=int)
-        self.obs.sat = np.empty(0, dtype=int)
         self.obs.sig = {}
+        self.nobs = 0
+
+    def epoch(self):
+        """ pending epoch, the arrays are views of the epoch buffer, valid
+            until the next epoch """
+        obs = self.obs
+        n = self.nobs
+        for s in ('P', 'L', 'S', 'D', 'lli', 'sat'):
+            setattr(obs, s, getattr(self.buf, s)[:n])
+        return obs
+
+    def drop_obs(self):
+        """ discard the pending epoch """
+        self.obs = None
+        self.time_p = gtime_t()
+
+    def file_close(self):
+        # output the pending epoch
+        if self.flg_rnxobs and self.obs is not None:
+            self.re.rnx_obs_body(self.epoch(), self.fh_rnxobs)
+            self.obs = None
+        super().file_close()
 
     def decode(self, buff, len_, sys=[], prn=[]):
 
@@ -168,7 +278,7 @@ class rtcmDec(rcvDec):
 
             if timediff(self.time, self.time_p) != 0.0:
                 if self.obs is not None:
-                    self.re.rnx_obs_body(self.obs, self.fh_rnxobs)
+                    self.re.rnx_obs_body(self.epoch(), self.fh_rnxobs)
                 self.init_obs(obs.time)
 
             self.add_obs(obs)
@@ -185,44 +295,96 @@ class rtcmDec(rcvDec):
             self.re.rnx_snav_body(seph, self.fh_rnxnav)
 
 
-def decode(f, opt, args):
+def decode(f, opt, args, rng=None, prefix=None):
 
-    print("Decoding {}".format(f))
+    if rng is None:
+        print("Decoding {}".format(f))
+    else:
+        print("Decoding {} [{}:{}]".format(f, rng[1], rng[2]))
 
     bdir, fname = os.path.split(f)
 
-    prefix = fname[4:].removesuffix('.rtcm3')+'_'
-    prefix = str(Path(bdir) / prefix) if bdir else prefix
+    if prefix is None and f == '-':
+        prefix = 'stdin_'
+    elif prefix is None:
+        prefix = fname[4:].removesuffix('.rtcm3')+'_'
+        prefix = str(Path(bdir) / prefix) if bdir else prefix
     rtcmdec = rtcmDec(opt=opt, prefix=prefix, gnss_t=args.gnss)
     rtcmdec.monlevel = 1
+    if args.stat:
+        rcvStat(rtcmdec, prefix+'stat.json')
 
-    rtcmdec.rtcm.week = args.weekref
+    rtcmdec.set_week(args.weekref)
 
     path = str(Path(bdir) / fname) if bdir else fname
-    blen = os.path.getsize(path)
-    with open(path, 'rb') as f:
-        msg = f.read(blen)
-        maxlen = len(msg)-5
-        # maxlen = 400000
-        k = 0
-        for _ in range(maxlen):
-            if k > maxlen:
-                break
-            stat = rtcmdec.rtcm.sync(msg, k)
-            if stat is False:
-                k += 1
-                continue
-            if not rtcmdec.rtcm.checksum(msg, k, maxlen):
-                k += 1
-                continue
-
-            len_ = rtcmdec.rtcm.len+3
+    if rng is None and f != '-' and (args.start or args.end):
+        rng = time_window(rtcmdec, path, args.start, args.end)
+
+    if rng is None and args.chunks > 1:
+        decode_chunks(decode, rtcmdec, path, opt, args)
+        rtcmdec.file_close()
+        return
+
+    if not args.sync:
+        fileWriter(rtcmdec)
+
+    if args.stream or f == '-':
+        with open_stream(path) as stream:
+            for msg, len_ in stream_frames(rtcmdec, stream,
+                                           follow=args.follow):
+                rtcmdec.decode(msg, len_)
+        rtcmdec.file_close()
+        return
+
+    with open_mmap(path) as msg:
+        for k, len_ in chunk_frames(rtcmdec, msg, rng):
             rtcmdec.decode(msg[k:k+len_], len_)
-            k += rtcmdec.rtcm.dlen
 
     rtcmdec.file_close()
 
 
+async def decode_ntrip(opt, args):
+    """ decode the NTRIP mountpoints args.mount concurrently, the recorded
+        logs args.caster are served by a local caster for tests """
+    srv = None
+    if args.caster:
+        rtcmdec = rtcmDec(opt=rcvOpt(), prefix='', gnss_t=args.gnss)
+        rtcmdec.set_week(args.weekref)
+        mounts = {m: (rtcmdec, f) for m, f in args.caster}
+        srv = asyncio.create_task(caster(mounts, port=args.port,
+                                         speed=args.speed))
+        await asyncio.sleep(0.1)  # caster listening
+
+    decs = []
+    for url in args.mount:
+        prefix = urlparse(url).path.strip('/').replace('/', '_')+'_'
+        print("Decoding {}".format(url_name(url)))
+        rtcmdec = rtcmDec(opt=opt, prefix=prefix, gnss_t=args.gnss)
+        rtcmdec.monlevel = 1
+        if args.stat:
+            rcvStat(rtcmdec, prefix+'stat.json')
+        rtcmdec.set_week(args.weekref)
+        if not args.sync:
+            fileWriter(rtcmdec)
+        decs.append((rtcmdec, url, prefix))
+
+    try:
+        if decs:
+            await asyncio.gather(*[decode_live(rtcmdec, url,
+                                               retry=args.retry)
+                                   for rtcmdec, url, _ in decs])
+        else:
+            await srv
+    finally:
+        if srv is not None:
+            srv.cancel()
+        for rtcmdec, _, prefix in decs:
+            rtcmdec.file_close()
+            if args.stat and hasattr(rtcmdec, 'link'):
+                with open(prefix+'link.json', 'w') as fh:
+                    json.dump(rtcmdec.link.summary(), fh, indent=2)
+
+
 def main():
 
     # Parse command line arguments
@@ -231,7 +393,7 @@ def main():
 
     # Input file and folder
     #
-    parser.add_argument("inpFileName",
+    parser.add_argument("inpFileName", nargs='?',
                         help="Input RTCM3 file(s) (wildcards allowed)")
 
     parser.add_argument("--receiver", default='unknown',
@@ -248,6 +410,46 @@ def main():
     parser.add_argument("-j", "--jobs", default=int(mp.cpu_count() / 2),
                         type=int, help='Max. number of parallel processes')
 
+    parser.add_argument("-c", "--chunks", default=0, type=int,
+                        help="Number of chunks per file decoded in parallel"
+                        " [0: off]")
+    parser.add_argument("--overlap", default=4096, type=int,
+                        help="Lead-in size before each chunk in kB [4096]")
+    parser.add_argument("-s", "--stream", action='store_true',
+                        help="Streaming decoding of a pipe or growing file,"
+                        " '-' reads from stdin")
+    parser.add_argument("--follow", default=0.0, type=float,
+                        help="Wait time for new data in streaming mode in s"
+                        " [0: stop at end of file]")
+    parser.add_argument("--stat", action='store_true',
+                        help="Write per message statistics to *stat.json")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    parser.add_argument("-m", "--mount", action='append', default=[],
+                        help="Decode the NTRIP mountpoint"
+                        " ntrip://[user:pw@]host[:port]/MOUNT[?ver=1]"
+                        " to MOUNT_* (repeatable)")
+    parser.add_argument("--retry", default=5.0, type=float,
+                        help="Wait time before reconnecting to a mountpoint"
+                        " in s [5.0, 0: stop at end of stream]")
+    parser.add_argument("--caster", nargs=2, action='append', default=[],
+                        metavar=('MOUNT', 'FILE'),
+                        help="Serve the recorded RTCM3 FILE as mountpoint"
+                        " MOUNT by a local caster (repeatable)")
+    parser.add_argument("--port", default=PORT, type=int,
+                        help="Port of the local caster [2101]")
+    parser.add_argument("--speed", default=1.0, type=float,
+                        help="Speed of the local caster as multiple of real"
+                        " time [1.0, 0: no wait]")
+
+    parser.add_argument("--start", default=None,
+                        help="Start of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+    parser.add_argument("--end", default=None,
+                        help="End of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+
     # Retrieve all command line arguments
     #
     args = parser.parse_args()
@@ -257,10 +459,27 @@ def main():
     opt.flg_rnxobs = True
     opt.flg_rnxnav = True
 
+    if args.inpFileName is None and not (args.mount or args.caster):
+        parser.error("no input file or mountpoint given")
+
     # Start processing pool
     #
-    with mp.Pool(processes=args.jobs) as pool:
-        pool.starmap(decode, [(f, opt, args) for f in glob(args.inpFileName)])
+    if args.mount or args.caster:
+        try:
+            asyncio.run(decode_ntrip(opt, args))
+        except KeyboardInterrupt:
+            pass
+    elif args.inpFileName == '-':
+        decode('-', opt, args)
+    elif args.chunks > 1:
+        # Files are processed one by one, each in parallel chunks
+        #
+        for f in glob(args.inpFileName):
+            decode(f, opt, args)
+    else:
+        with mp.Pool(processes=args.jobs) as pool:
+            pool.starmap(decode, [(f, opt, args)
+                                  for f in glob(args.inpFileName)])
 
 
 # Call main function
@@ -13,6 +13,7 @@ Septentrio Receiver SBF messages decoder
 """
 
 import argparse
+from binascii import hexlify
 from glob import glob
 import numpy as np
 import struct as st
@@ -24,13 +25,67 @@ from pathlib import Path
 from cssrlib.gnss import uGNSS, uTYP, prn2sat, Eph, Obs, rSigRnx, gpst2time
 from cssrlib.gnss import rCST, pos2ecef
 from cssrlib.rawnav import rcvDec, rcvOpt
-from crccheck.crc import Crc16Xmodem
+
+from rcvcrc import crc16
+from rcvarc import nav_arc
+from rcveph import ephCache
+from rcvidx import time_window
+from rcvio import open_mmap, open_stream, stream_frames
+from rcvpar import chunk_frames, decode_chunks
+from rcvscan import enabled
+from rcvstat import rcvStat
+from rcvtap import tap_page
+from rcvwrt import fileWriter, write_nav
 
 
 class sbf(rcvDec):
     """ class for Septentrio Binary Format (SBF) decoder """
     tow = -1
     week = -1
+    preamble = rb'\$@'
+    sync_len = 8
+    crc_len = 0
+
+    # block handlers {block number: (method, rcvOpt flags)}, the handler
+    # is dropped if none of the flags is set, None marks a known block
+    # that is skipped
+    nav_f = ('flg_rnxnav',)
+    blk_t = {
+        4002: ('blk_galnav', nav_f),  # GALNav
+        4004: (None, ()),  # GLONav
+        4006: ('blk_pvt', ()),  # PVTCartesian
+        4007: ('blk_pvt', ()),  # PVTGeodetic
+        4017: ('blk_rawca', ('flg_gpslnav',)),  # GPSRawCA
+        4018: ('blk_rawcnav', ('flg_gpscnav',)),  # GPSRawL2C
+        4019: ('blk_rawcnav', ('flg_gpscnav',)),  # GPSRawL5
+        4020: ('blk_georaw', ('flg_sbas',)),  # GEORawL1
+        4021: ('blk_georaw', ('flg_sbas',)),  # GEORawL5
+        4022: ('blk_galrawfnav', ('flg_galfnav',)),  # GALRawFNAV
+        4023: ('blk_galrawinav', ('flg_galinav',)),  # GALRawINAV
+        4024: ('blk_galrawcnav', ('flg_gale6',)),  # GALRawCNAV
+        4026: ('blk_glorawca', ('flg_gloca',)),  # GLORawCA
+        4027: ('blk_measepoch', ('flg_rnxobs',)),  # MeasEpoch
+        4036: (None, ()),  # GLOTime
+        4047: ('blk_bdsraw', ('flg_bdsd12',)),  # BDSRaw
+        4066: ('blk_rawca', ('flg_qzslnav',)),  # QZSRawCA
+        4067: ('blk_rawcnav', ('flg_qzscnav',)),  # QZSRawL2C
+        4068: ('blk_rawcnav', ('flg_qzscnav',)),  # QZSRawL5
+        4069: ('blk_qzsrawl6', ('flg_qzsl6',)),  # QZSRawL6
+        4081: (None, ()),  # BDSNav
+        4093: ('blk_navicraw', ('flg_irnnav',)),  # NAVICRaw
+        4095: ('blk_gpsnav', nav_f),  # QZSNav
+        4218: ('blk_bdsrawb1c', ('flg_bdsb1c',)),  # BDSRawB1C
+        4219: ('blk_bdsrawb2a', ('flg_bdsb2a',)),  # BDSRawB2a
+        4221: ('blk_rawl1c', ('flg_gpscnav2',)),  # GPSRawL1C
+        4227: ('blk_rawl1c', ('flg_qzscnav2',)),  # QZSRawL1C
+        4228: ('blk_qzsrawl1s', ('flg_qzsl1s', 'flg_qzsl5s')),  # QZSRawL1S
+        4242: ('blk_bdsrawb2b', ('flg_bdsb2b',)),  # BDSRawB2b
+        4246: ('blk_qzsrawl1s', ('flg_qzsl1s', 'flg_qzsl5s')),  # QZSRawL5S
+        4262: ('blk_navicrawl1', ('flg_irnnav',)),  # NAVICRawL1
+        5891: ('blk_gpsnav', nav_f),  # GPSNav
+        5894: (None, ()),  # GPSUtc
+        5896: (None, ()),  # GEONav
+    }
 
     def __init__(self, opt=None, prefix='', gnss_t='GECJ'):
         super().__init__(opt, prefix, gnss_t)
@@ -106,15 +161,26 @@ class sbf(rcvDec):
                  uTYP.D: rSigRnx('JD5P'), uTYP.S: rSigRnx('JS5P')},
         }
 
+        self.init_handler()
+
     def sync(self, buff, k):
         return buff[k] == 0x24 and buff[k+1] == 0x40
 
     def msg_len(self, msg, k):
         return st.unpack_from('<H', msg, k+6)[0]
 
+    def msg_id(self, msg, k):
+        return st.unpack_from('<H', msg, k+4)[0] & 0x1fff
+
+    def msg_time(self, msg, k):
+        tow, wn = st.unpack_from('<LH', msg, k+8)
+        if tow == 0xffffffff or wn == 0xffff:
+            return None
+        return wn*604800+tow*1e-3
+
     def check_crc(self, msg, k):
         crc_, id_, len_ = st.unpack_from('<HHH', msg, k+2)
-        crc = Crc16Xmodem.calc(msg[k+4:k+len_])
+        crc = crc16(msg[k+4:k+len_])
         if crc_ != crc:
             if self.monlevel > 0:
                 print(f"checksum error: id={id_}.")
@@ -181,7 +247,21 @@ class sbf(rcvDec):
         self.week = wn
         return sys, prn
 
+    def init_sig_idx(self):
+        """ build signal number -> column index tables of sig_tab """
+        self.sig_idx = {}
+        for sys in self.sig_tab:
+            self.sig_idx[sys] = [-1]*64
+            for sig in self.sig_t:
+                code = self.sig_t[sig][uTYP.L]
+                if code in self.sig_tab[sys][code.typ]:
+                    self.sig_idx[sys][sig] = \
+                        self.sig_tab[sys][code.typ].index(code)
+
     def decode_obs(self, buff, k=8):
+        if not hasattr(self, 'sig_idx'):
+            self.init_sig_idx()
+
         obs = Obs()
         obs.sig = self.sig_tab
 
@@ -221,6 +301,7 @@ class sbf(rcvDec):
             if sys not in self.sig_tab:
                 k += nb2*sb2len
                 continue
+            sig_idx = self.sig_idx[sys]
 
             pr = np.zeros(nsig_max, dtype=np.float64)
             cp = np.zeros(nsig_max, dtype=np.float64)
@@ -260,12 +341,12 @@ class sbf(rcvDec):
                 else:
                     S1 = cn0*0.25 + 10.0
 
-            if code not in self.sig_tab[sys][code.typ]:
+            idx = sig_idx[sig]
+            if idx < 0:
                 if self.monlevel > 1:
                     print("skip code={:}".format(code))
                 k += nb2*sb2len
                 continue
-            idx = self.sig_tab[sys][code.typ].index(code)
 
             pr[idx] = P1
             cp[idx] = L1
@@ -319,11 +400,11 @@ class sbf(rcvDec):
                     else:
                         S2 = cn0*0.25 + 10.0
 
-                if code not in self.sig_tab[sys][code.typ]:
+                idx = sig_idx[sig]
+                if idx < 0:
                     if self.monlevel > 1:
                         print("skip code={:}".format(code))
                     continue
-                idx = self.sig_tab[sys][code.typ].index(code)
 
                 pr[idx] = P2
                 cp[idx] = L2
@@ -352,6 +433,186 @@ class sbf(rcvDec):
 
         return obs
 
+    def init_obs_bulk(self):
+        """ build lookup tables for bulk MeasEpoch decoding """
+        nsig_max = 0
+        for s in self.sig_tab:
+            if len(self.sig_tab[s][uTYP.L]) > nsig_max:
+                nsig_max = len(self.sig_tab[s][uTYP.L])
+
+        self.nsig[uTYP.C] = nsig_max
+        self.nsig[uTYP.L] = nsig_max
+        self.nsig[uTYP.D] = nsig_max
+        self.nsig[uTYP.S] = nsig_max
+
+        if not hasattr(self, 'sig_idx'):
+            self.init_sig_idx()
+
+        # svid -> satellite number, svid x signal number -> column index
+        self.sat_blk = np.zeros(256, dtype=np.int32)
+        self.idx_blk = np.full((256, 64), -1, dtype=np.int32)
+        for svid in range(256):
+            sys, prn = self.svid2prn(svid)
+            if sys not in self.sig_tab:
+                continue
+            self.sat_blk[svid] = prn2sat(sys, prn)
+            self.idx_blk[svid] = self.sig_idx[sys]
+
+        # signal number x (ObsInfo >> 3) -> wavelength
+        self.lam_blk = np.zeros((64, 32), dtype=np.float64)
+        for sig in self.sig_t:
+            code = self.sig_t[sig][uTYP.L]
+            for i in range(32):
+                ch = i-8 if sig in (8, 9, 10, 11) else 0  # GLONASS
+                freq = code.frequency(ch)
+                if freq > 0.0:
+                    self.lam_blk[sig, i] = rCST.CLIGHT/freq
+
+        self.cn0_blk = np.full(64, 10.0)
+        self.cn0_blk[[1, 2]] = 0.0
+
+    def decode_obs_bulk(self, buff, blks):
+        """ decode a batch of MeasEpoch blocks at offsets blks """
+        if not hasattr(self, 'idx_blk'):
+            self.init_obs_bulk()
+
+        dt1 = np.dtype({'names': ['typ', 'svid', 'misc', 'P0', 'dop', 'cp0',
+                                  'cp1', 'cn0', 'lock', 'info'],
+                        'formats': ['u1', 'u1', 'u1', '<u4', '<i4', '<u2',
+                                    'i1', 'u1', '<u2', 'u1'],
+                        'offsets': [1, 2, 3, 4, 8, 12, 14, 15, 16, 18],
+                        'itemsize': 20})
+        dt2 = np.dtype({'names': ['typ', 'cn0', 'ofst1', 'cp1', 'info',
+                                  'cofst0', 'cp0', 'dop0'],
+                        'formats': ['u1', 'u1', 'u1', 'i1', 'u1', '<u2',
+                                    '<u2', '<u2'],
+                        'offsets': [0, 2, 3, 4, 5, 6, 8, 10],
+                        'itemsize': 12})
+
+        # walk the sub-block chain to collect offsets of Type-1/Type-2
+        nep = len(blks)
+        tow = np.zeros(nep, dtype=np.uint32)
+        wn = np.zeros(nep, dtype=np.uint16)
+        ofst1, ep1, ofst2, par2 = [], [], [], []
+        for e, k in enumerate(blks):
+            tow[e], wn[e], nb1, sb1len, sb2len = \
+                st.unpack_from('<LHBBB', buff, k+8)
+            k += 20
+            for _ in range(nb1):
+                nb2 = buff[k+19]
+                ofst1.append(k)
+                ep1.append(e)
+                k += sb1len
+                if nb2 > 0:
+                    ofst2.extend(range(k, k+nb2*sb2len, sb2len))
+                    par2.extend([len(ofst1)-1]*nb2)
+                    k += nb2*sb2len
+
+        u8 = np.frombuffer(buff, dtype=np.uint8)
+        ofst1 = np.array(ofst1, dtype=np.int64)
+        ofst2 = np.array(ofst2, dtype=np.int64)
+        ep1 = np.array(ep1, dtype=np.int64)
+        par2 = np.array(par2, dtype=np.int64)
+        b1 = u8[ofst1[:, None]+np.arange(20)].view(dt1).ravel()
+        b2 = u8[ofst2[:, None]+np.arange(12)].view(dt2).ravel()
+
+        # Type-1: signal, column index and wavelength
+        svid = b1['svid']
+        sig1 = b1['typ'].astype(np.int64) & 0x1f
+        ext1 = sig1 == 31
+        sig1[ext1] = (b1['info'][ext1] >> 3)+32
+        idx1 = self.idx_blk[svid, sig1]
+        lam1 = self.lam_blk[sig1, b1['info'] >> 3]
+        v1 = idx1 >= 0
+
+        # number of rows used per epoch, row of each Type-1 in its epoch
+        nsat = np.bincount(ep1[v1], minlength=nep)
+        row1 = np.cumsum(v1)-1
+        row1 -= np.concatenate(([0], np.cumsum(nsat)))[ep1]
+
+        misc = b1['misc'].astype(np.int64)
+        P1 = np.where((misc & 0x1f != 0) | (b1['P0'] != 0),
+                      (misc & 0xf)*4294967.296+b1['P0']*1e-3, 0.0)
+        D1 = np.where(b1['dop'] != -(1 << 31), b1['dop']*1e-4, 0.0)
+        cp1 = b1['cp1'].astype(np.float64)
+        ok = (P1 != 0.0) & (lam1 > 0.0) & (b1['lock'] != 65535) & \
+            ((b1['cp1'] != -128) | (b1['cp0'] != 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            L1 = np.where(ok, P1/lam1+(cp1*65.536+b1['cp0']*1e-3), 0.0)
+        lli1 = np.where(ok & (b1['info'] & 4 != 0), 2, 0)
+        S1 = np.where(b1['cn0'] != 255,
+                      b1['cn0']*0.25+self.cn0_blk[sig1], 0.0)
+
+        # Type-2: relative to the Type-1 of the same satellite
+        sig2 = b2['typ'].astype(np.int64) & 0x1f
+        ext2 = sig2 == 31
+        sig2[ext2] = (b2['info'][ext2] >> 3)+32
+        idx2 = self.idx_blk[svid[par2], sig2]
+        lam2 = self.lam_blk[sig2, b1['info'][par2] >> 3]
+        v2 = v1[par2] & (idx2 >= 0)
+
+        ofst = b2['ofst1'].astype(np.int64)
+        dofst1 = ofst >> 3
+        dofst1[dofst1 >= 16] -= 32
+        cofst1 = ofst & 0x7
+        cofst1[cofst1 >= 4] -= 8
+        cp2 = b2['cp1'].astype(np.float64)
+
+        P1_ = P1[par2]
+        P2 = np.where((P1_ != 0.0) & ((cofst1 != -4) | (b2['cofst0'] != 0)),
+                      P1_+cofst1*65.536+b2['cofst0']*1e-3, 0.0)
+        ok = (P2 != 0.0) & (lam2 > 0.0) & \
+            ((b2['cp1'] != -128) | (b2['cp0'] != 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            L2 = np.where(ok, P2/lam2+cp2*65.536+b2['cp0']*1e-3, 0.0)
+            ok = (D1[par2] != 0.0) & (lam1[par2] > 0.0) & (lam2 > 0.0) & \
+                ((dofst1 != -16) | (b2['dop0'] != 0))
+            D2 = np.where(ok, D1[par2]*(lam1[par2]/lam2) +
+                          dofst1*6.5536+b2['dop0']*1e-4, 0.0)
+        lli2 = np.where((b1['lock'][par2] != 255) & (b2['info'] & 4 != 0),
+                        2, 0)
+        S2 = np.where(b2['cn0'] != 255,
+                      b2['cn0']*0.25+self.cn0_blk[sig2], 0.0)
+
+        # fill (epoch x satellite x signal) arrays
+        nsig = self.nsig[uTYP.L]
+        nmax = max(int(nsat.max(initial=0)), 1)
+        P = np.zeros((nep, nmax, nsig), dtype=np.float64)
+        L = np.zeros((nep, nmax, nsig), dtype=np.float64)
+        D = np.zeros((nep, nmax, nsig), dtype=np.float64)
+        S = np.zeros((nep, nmax, nsig), dtype=np.float64)
+        lli = np.zeros((nep, nmax, nsig), dtype=np.int32)
+        sat = np.zeros((nep, nmax), dtype=np.int32)
+
+        i1 = (ep1[v1], row1[v1], idx1[v1])
+        sat[i1[0], i1[1]] = self.sat_blk[svid[v1]]
+        P[i1], L[i1], D[i1], S[i1], lli[i1] = \
+            P1[v1], L1[v1], D1[v1], S1[v1], lli1[v1]
+
+        i2 = (ep1[par2][v2], row1[par2][v2], idx2[v2])
+        P[i2], L[i2], D[i2], S[i2], lli[i2] = \
+            P2[v2], L2[v2], D2[v2], S2[v2], lli2[v2]
+
+        for e in range(nep):
+            obs = Obs()
+            obs.sig = self.sig_tab
+            obs.time = gpst2time(int(wn[e]), float(tow[e])*1e-3)
+            n = nsat[e]
+            obs.P, obs.L, obs.D = P[e, :n], L[e, :n], D[e, :n]
+            obs.S, obs.lli, obs.sat = S[e, :n], lli[e, :n], sat[e, :n]
+            yield obs
+
+        if nep > 0:
+            self.tow = float(tow[-1])*1e-3
+            self.week = int(wn[-1])
+
+    def output_obs_bulk(self, buff, blks):
+        """ decode MeasEpoch blocks at once and write RINEX OBS """
+        for obs in self.decode_obs_bulk(buff, blks):
+            if self.flg_rnxobs:
+                self.re.rnx_obs_header(obs.time, self.fh_rnxobs)
+                self.re.rnx_obs_body(obs, self.fh_rnxobs)
+
     def decode_gpsnav(self, buff, k=8):
         sys, prn = self.decode_head(buff, k)
         sat = prn2sat(sys, prn)
@@ -458,590 +719,624 @@ class sbf(rcvDec):
 
         return eph
 
-    def decode(self, buff, len_, sys=[], prn=[]):
-        k = 2
-        _, id_, _ = st.unpack_from('<HHH', buff, k)
-        k += 6
-        blk_num = id_ & 0x1fff
-        blk_rev = (id_ >> 13) & 0x7
-        if self.monlevel > 1 and blk_num not in \
-           (4002, 4004, 4006, 4007, 4017, 4018, 4019, 4020, 4021, 4022, 4023,
-            4024, 4026, 4027, 4036, 4047, 4066, 4067, 4068, 4069, 4081, 4093,
-                4095, 4218, 4219, 4228, 4242, 4246, 4262, 5891, 5894, 5896):
-            print("block_num = {:d} rev={:d} len={:d}".format(
-                blk_num, blk_rev, len_))
+    def blk_galnav(self, buff, k, blk_num):
+        """ GAL Decoded Message """
+        eph = self.decode_galnav(buff, k)
+        if self.mode_galinav == 1 and eph is not None:
+            self.re.rnx_nav_body(eph, self.fh_rnxnav)
+
+    def blk_pvt(self, buff, k, blk_num):
+        """ PVT """
+        tow, wn, mode, err = st.unpack_from('<LHBB', buff, k)
+        k += 8
+        self.tow = tow*1e-3
+        self.week = wn
+        x, y, z, und, vx, vy, vz = st.unpack_from('<dddffff', buff, k)
+        k += 40
+        cog, cb, cd, tsys, datum, nrsv = st.unpack_from('<fdfBBB', buff, k)
+        k += 19
+        cinfo, refid, age, info, alert, nbase = st.unpack_from(
+            '<BHHLBB', buff, k)
+        k += 11
+        ppp, latency, pacc, vacc, misc = st.unpack_from(
+            '<HHHHB', buff, k)
+        k += 9
+        if blk_num == 4006:
+            self.re.pos = np.array([x, y, z])
+        else:
+            self.re.pos = pos2ecef([x, y, z])
+
+    def blk_rawca(self, buff, k, blk_num):
+        """ GPSRawCA, QZSRawCA """
+        sys, prn = self.decode_head(buff, k)
+        sat = prn2sat(sys, prn)
+        k += 7
+        crcpass, _, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if (sys == uGNSS.GPS and self.flg_gpslnav) or \
+           (sys == uGNSS.QZS and self.flg_qzslnav):
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GPSRawCA/QZSRawCA " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, src))
+                return -1
 
-        if blk_num == 4002:  # GAL Decoded Message
-            eph = self.decode_galnav(buff, k)
-            if self.mode_galinav == 1 and eph is not None:
+            fh_ = self.fh_gpslnav if sys == uGNSS.GPS else self.fh_qzslnav
+
+            blen = (300+7)//8
+            msg = bytearray(40)
+            for i in range(10):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+            msg = bytes(msg)
+            write_nav(fh_, self.week, int(self.tow), prn, src, blen, msg)
+            eph = self.rn.decode_gps_lnav(self.week, self.tow, sat, msg)
+            if eph is not None:
                 self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num in (4006, 4007):  # PVT
-            tow, wn, mode, err = st.unpack_from('<LHBB', buff, k)
-            k += 8
-            self.tow = tow*1e-3
-            self.week = wn
-            x, y, z, und, vx, vy, vz = st.unpack_from('<dddffff', buff, k)
-            k += 40
-            cog, cb, cd, tsys, datum, nrsv = st.unpack_from('<fdfBBB', buff, k)
-            k += 19
-            cinfo, refid, age, info, alert, nbase = st.unpack_from(
-                '<BHHLBB', buff, k)
-            k += 11
-            ppp, latency, pacc, vacc, misc = st.unpack_from(
-                '<HHHHB', buff, k)
-            k += 9
-            if blk_num == 4006:
-                self.re.pos = np.array([x, y, z])
-            else:
-                self.re.pos = pos2ecef([x, y, z])
+    def blk_rawcnav(self, buff, k, blk_num):
+        """ GPSRawL2C/L5, QZSRawL2C/L5 """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if (sys == uGNSS.GPS and self.flg_gpscnav) or \
+           (sys == uGNSS.QZS and self.flg_qzscnav):
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GPSRawL2C/L5, QZSRawL2C/L5 " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
+
+            fh_ = self.fh_gpscnav if sys == uGNSS.GPS else self.fh_qzscnav
+
+            blen = (300+7)//8
+            msg = bytearray(40)
+            for i in range(10):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+            write_nav(fh_, self.week, int(self.tow), prn, src, blen, msg)
 
-        elif blk_num in (4017, 4066):  # GPSRawCA, QZSRawCA
-            sys, prn = self.decode_head(buff, k)
             sat = prn2sat(sys, prn)
-            k += 7
-            crcpass, _, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if (sys == uGNSS.GPS and self.flg_gpslnav) or \
-               (sys == uGNSS.QZS and self.flg_qzslnav):
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GPSRawCA/QZSRawCA " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, src))
-                    return -1
-
-                fh_ = self.fh_gpslnav if sys == uGNSS.GPS else self.fh_qzslnav
-
-                blen = (300+7)//8
-                fh_.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                          format(self.week, int(self.tow), prn, src, blen))
-
-                msg = bytearray(40)
-                for i in range(10):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    fh_.write("{:08x}".format(d))
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-                fh_.write("\n")
-                msg = bytes(msg)
-                eph = self.rn.decode_gps_lnav(self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            eph = self.rn.decode_gps_cnav(
+                self.week, self.tow, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num in (4018, 4019, 4067, 4068):  # GPSRawL2C/L5, QZSRawL2C/L5
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if (sys == uGNSS.GPS and self.flg_gpscnav) or \
-               (sys == uGNSS.QZS and self.flg_qzscnav):
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GPSRawL2C/L5, QZSRawL2C/L5 " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                fh_ = self.fh_gpscnav if sys == uGNSS.GPS else self.fh_qzscnav
-
-                blen = (300+7)//8
-                fh_.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                          format(self.week, int(self.tow), prn, src, blen))
-                msg = bytearray(40)
-                for i in range(10):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    fh_.write("{:08x}".format(d))
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-                fh_.write("\n")
+    def blk_georaw(self, buff, k, blk_num):
+        """ GEORawL1/GEORawL5 """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_sbas:
+            itype = src-24  # 0:L1, 1:L5
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GEORawL1/5 " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
+            if prn < 120 or prn > 158:
+                return 0
 
-                sat = prn2sat(sys, prn)
-                eph = self.rn.decode_gps_cnav(
-                    self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            if self.prn_ref > 0 and prn != self.prn_ref:
+                return 0
+
+            msg = bytearray(32)
+            for i in range(8):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            self.output_sbas(prn, msg, self.fh_sbas, itype)
+
+            sat = prn2sat(uGNSS.SBS, prn)
+            seph = None
+            if itype == 0:
+                seph = self.rn.decode_sbs_l1(self.week, self.tow, sat, msg)
+            if seph is not None:
+                self.re.rnx_snav_body(seph, self.fh_rnxnav)
+
+    def blk_galrawfnav(self, buff, k, blk_num):
+        """ GalRawFNAV """
+        sys, prn = self.decode_head(buff, k)
+        sat = prn2sat(sys, prn)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_galfnav:
+            if src & 0x1f == 20:  # E5a
+                type_ = 1
+            else:
+                return -1
+
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GALRawFNAV " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt,
+                                 src & 0x1f))
+                return -1
+
+            msg = bytearray(32)
+            for i in range(8):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            write_nav(self.fh_galfnav, self.week, int(self.tow), prn, type_,
+                      32, msg)
+
+            eph = self.rn.decode_gal_fnav(self.week, self.tow, sat, 1, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
+
+    def blk_galrawinav(self, buff, k, blk_num):
+        """ GALRawINAV """
+        sys, prn = self.decode_head(buff, k)
+        sat = prn2sat(sys, prn)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_galinav:
+            if src & 0x1f == 17:  # E1B
+                type_ = 0
+            elif src & 0x1f == 21:  # E5b
+                type_ = 2
+            else:
+                if self.monlevel > 0:
+                    print(f"unknown src: {src}")
+                return -1
+
+            if crcpass != 1:
+                if self.monlevel > 1:
+                    print("crc error in GALRawINAV " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt,
+                                 src & 0x1f))
+                return -1
+
+            msg = bytearray(32)
+            for i in range(8):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            # GALRawINAV is missing tail bit (6) of even page
+            # add 6 bits offset for odd page
+            msg_ = bytearray(30)
+            msg_[0:15] = msg[0:15]  # even page
+            k = 114
+            for i in range(15):
+                d = bs.unpack_from('u8', bytes(msg), k)[0]
+                bs.pack_into('u8', msg_, 120+i*8, d)
+                k += 8
+
+            write_nav(self.fh_galinav, self.week, int(self.tow), prn, type_,
+                      30, msg_)
+
+            eph = self.rn.decode_gal_inav(self.week, self.tow,
+                                          sat, 2, msg_)
+            if self.mode_galinav == 0 and eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
+
+    def blk_galrawcnav(self, buff, k, blk_num):
+        """ GALRawCNAV """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if enabled(self, 'flg_gale6'):
+            if src & 0x1f == 19:
+                type_ = 6
+            else:
+                return -1
+
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GALRawCNAV " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
+
+            blen = (492+7)//8
+            msg = bytearray(64)
+            for i in range(16):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+            if self.flg_gale6:
+                write_nav(self.fh_gale6, self.week, int(self.tow), prn, type_,
+                          blen, msg)
+            tap_page(self, 'gale6', self.week, int(self.tow), prn, type_,
+                     bytes(msg))
+
+    def blk_glorawca(self, buff, k, blk_num):
+        """ GLORawCA """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        freq -= 8
+        if self.flg_gloca:
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in GLORawCA " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
+
+            msg = bytearray(12)
+            for i in range(3):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
 
-        elif blk_num in (4020, 4021):  # GEORawL1/GEORawL5
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_sbas:
-                itype = src-24  # 0:L1, 1:L5
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GEORawL1/5 " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-                if prn < 120 or prn > 158:
-                    return 0
-
-                if self.prn_ref > 0 and prn != self.prn_ref:
-                    return 0
-
-                msg = bytearray(32)
-                for i in range(8):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-
-                self.output_sbas(prn, msg, self.fh_sbas, itype)
-
-                sat = prn2sat(uGNSS.SBS, prn)
-                seph = None
-                if itype == 0:
-                    seph = self.rn.decode_sbs_l1(self.week, self.tow, sat, msg)
-                if seph is not None:
-                    self.re.rnx_snav_body(seph, self.fh_rnxnav)
-
-        elif blk_num == 4022:  # GalRawFNAV
-            sys, prn = self.decode_head(buff, k)
             sat = prn2sat(sys, prn)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_galfnav:
-                if src & 0x1f == 20:  # E5a
-                    type_ = 1
-                else:
-                    return -1
-
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GALRawFNAV " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt,
-                                     src & 0x1f))
-                    return -1
-
-                self.fh_galfnav.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                      format(self.week, int(self.tow), prn,
-                                             type_, 32))
-                msg = bytearray(32)
-                for i in range(8):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    self.fh_galfnav.write("{:08x}".format(d))
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-
-                self.fh_galfnav.write("\n")
-
-                eph = self.rn.decode_gal_fnav(self.week, self.tow, sat, 1, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            geph = self.rn.decode_glo_fdma(self.week, self.tow,
+                                           sat, msg, freq)
+            if geph is not None:
+                self.re.rnx_gnav_body(geph, self.fh_rnxnav)
+
+    def blk_measepoch(self, buff, k, blk_num):
+        """ MeasEpoch """
+        obs = self.decode_obs(buff, k)
+        if obs is not None:
+            self.re.rnx_obs_header(obs.time, self.fh_rnxobs)
+            self.re.rnx_obs_body(obs, self.fh_rnxobs)
+
+    def blk_bdsraw(self, buff, k, blk_num):
+        """ BDSRaw """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        # src 28: B1I (2I), 29: B2I (7I), 30: B3I (6I)
+        crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_bdsd12 and src == 28:  # only D1 is supported
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in BDSRaw " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
+
+            msg = bytearray(40)
+            for i in range(10):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
 
-        elif blk_num == 4023:  # GALRawINAV
-            sys, prn = self.decode_head(buff, k)
             sat = prn2sat(sys, prn)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_galinav:
-                if src & 0x1f == 17:  # E1B
-                    type_ = 0
-                elif src & 0x1f == 21:  # E5b
-                    type_ = 2
+            eph = None
+            if src == 28:
+                if prn > 5 and prn < 59:
+                    eph = self.rn.decode_bds_d1(
+                        self.week, self.tow, sat, msg)
                 else:
-                    if self.monlevel > 0:
-                        print(f"unknown src: {src}")
-                    return -1
+                    eph = self.rn.decode_bds_d2(
+                        self.week, self.tow, sat, msg)
 
-                if crcpass != 1:
-                    if self.monlevel > 1:
-                        print("crc error in GALRawINAV " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt,
-                                     src & 0x1f))
-                    return -1
-
-                self.fh_galinav.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                      format(self.week, int(self.tow), prn,
-                                             type_, 30))
-                msg = bytearray(32)
-                for i in range(8):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-
-                # GALRawINAV is missing tail bit (6) of even page
-                # add 6 bits offset for odd page
-                msg_ = bytearray(30)
-                msg_[0:15] = msg[0:15]  # even page
-                k = 114
-                for i in range(15):
-                    d = bs.unpack_from('u8', bytes(msg), k)[0]
-                    bs.pack_into('u8', msg_, 120+i*8, d)
-                    k += 8
-
-                for i in range(30):
-                    self.fh_galinav.write("{:02x}".format(msg_[i]))
-                self.fh_galinav.write("\n")
-
-                eph = self.rn.decode_gal_inav(self.week, self.tow,
-                                              sat, 2, msg_)
-                if self.mode_galinav == 0 and eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num == 4024:  # GALRawCNAV
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_gale6:
-                if src & 0x1f == 19:
-                    type_ = 6
-                else:
-                    return -1
-
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GALRawCNAV " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                blen = (492+7)//8
-                self.fh_gale6.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                    format(self.week, int(self.tow), prn,
-                                           type_, blen))
-                for i in range(16):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    self.fh_gale6.write("{:08x}".format(d))
-                    k += 4
-                self.fh_gale6.write("\n")
-
-        elif blk_num == 4026:  # GLORawCA
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            freq -= 8
-            if self.flg_gloca:
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GLORawCA " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                msg = bytearray(12)
-                for i in range(3):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
+    def blk_qzsrawl6(self, buff, k, blk_num):
+        """ QZSRawL6 """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        parity, rscnt, src, res, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if parity == 0:
+            if self.monlevel > 2:
+                print("crc error in QZSRawL6 " +
+                      "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                      format(int(self.tow), prn, parity, rscnt, src))
+            return -1
+
+        if enabled(self, 'flg_qzsl6'):
+            msg = bytearray(252)
+            for i in range(63):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+            if self.flg_qzsl6:
+                self.fh_qzsl6.write(
+                    "{:4d}\t{:6.1f}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
+                    format(self.week, self.tow, prn, src, 252,
+                           hexlify(msg).decode()))
+            tap_page(self, 'qzsl6', self.week, self.tow, prn, src,
+                     bytes(msg))
+
+    def blk_navicraw(self, buff, k, blk_num):
+        """ NAVICRaw """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_irnnav:
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in NAVICRaw " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, cnt, src))
+                return -1
 
-                sat = prn2sat(sys, prn)
-                geph = self.rn.decode_glo_fdma(self.week, self.tow,
-                                               sat, msg, freq)
-                if geph is not None:
-                    self.re.rnx_gnav_body(geph, self.fh_rnxnav)
-
-        elif blk_num == 4027:  # MeasEpoch
-            obs = self.decode_obs(buff, k)
-            if obs is not None:
-                self.re.rnx_obs_header(obs.time, self.fh_rnxobs)
-                self.re.rnx_obs_body(obs, self.fh_rnxobs)
+            msg = bytearray(40)
+            for i in range(10):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
 
-        elif blk_num == 4047:  # BDSRaw
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            # src 28: B1I (2I), 29: B2I (7I), 30: B3I (6I)
-            crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_bdsd12 and src == 28:  # only D1 is supported
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in BDSRaw " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                msg = bytearray(40)
-                for i in range(10):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
+            sat = prn2sat(sys, prn)
+            eph = self.rn.decode_irn_lnav(self.week, self.tow, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-                sat = prn2sat(sys, prn)
-                eph = None
-                if src == 28:
-                    if prn > 5 and prn < 59:
-                        eph = self.rn.decode_bds_d1(
-                            self.week, self.tow, sat, msg)
-                    else:
-                        eph = self.rn.decode_bds_d2(
-                            self.week, self.tow, sat, msg)
+    def blk_bdsrawb1c(self, buff, k, blk_num):
+        """ BDSRawB1C """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcsf2, crcsf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_bdsb1c and crcsf2 == 1 and crcsf3 == 1:
+            # self.fh_bdsb1c.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
+            #                     format(self.week, int(self.tow), prn,
+            #                            src, 225))
+            # 1800 deinterleaved symbols of a BeiDou B1C
+            # (B-CNAV1) navigation frame
+            # 24 unused bits in NAVBits[56]
+            # SF1 72sym, SF2 1200sym, SF3 528sym
+            # BCH(21,6)+BCH(51,8)  64ary LDPC(200,100) 64ary LDPC(88,44)
+            v = bytearray(228)
+            for i in range(57):
+                d = st.unpack_from('<L', buff, k)[0]
+                k += 4
+                st.pack_into('>L', v, i*4, d)
+                # self.fh_bdsb1c.write("{:08x}".format(d))
+            # self.fh_bdsb1c.write("\n")
+            v = bytes(v)
+            prn_ = bs.unpack_from('u6', v, 0)[0]
+            if prn != prn_:
+                return
+
+            # data2: 600b, errCorr2: 8b, data3: 264b, soh: 8b
+            msg = bytearray(228)
+            msg[0:75] = v[9:84]
+            msg[75] = crcsf2 << 1 | crcsf3
+            msg[76:109] = v[159:225]
+            msg[109] = bs.unpack_from('u8', v, 21)[0]
+            msg = bytes(msg)
 
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            sat = prn2sat(sys, prn)
+            eph = self.rn.decode_bds_b1c(self.week, self.tow, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num == 4069:  # QZSRawL6
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            parity, rscnt, src, res, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if parity == 0:
+    def blk_bdsrawb2a(self, buff, k, blk_num):
+        """ BDSRawB2a """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_bdsb2a:
+            if crcpass != 1:
                 if self.monlevel > 2:
-                    print("crc error in QZSRawL6 " +
+                    print("crc error in BDSRawB2a " +
                           "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                          format(int(self.tow), prn, parity, rscnt, src))
+                          format(int(self.tow), prn, crcpass, cnt, src))
                 return -1
 
-            if self.flg_qzsl6:
-                self.fh_qzsl6.write("{:4d}\t{:6.1f}\t{:3d}\t{:1d}\t{:3d}\t".
-                                    format(self.week, self.tow, prn, src, 252))
-                for i in range(63):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    self.fh_qzsl6.write("{:08x}".format(d))
-                    k += 4
-                self.fh_qzsl6.write("\n")
-
-        elif blk_num == 4093:  # NAVICRaw
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_irnnav:
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in NAVICRaw " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                msg = bytearray(40)
-                for i in range(10):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
+            msg = bytearray(40)
+            for i in range(10):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
 
-                sat = prn2sat(sys, prn)
-                eph = self.rn.decode_irn_lnav(self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            sat = prn2sat(sys, prn)
+            eph = self.rn.decode_bds_b2a(self.week, self.tow, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num == 4218:  # BDSRawB1C
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcsf2, crcsf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_bdsb1c and crcsf2 == 1 and crcsf3 == 1:
-                # self.fh_bdsb1c.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                #                     format(self.week, int(self.tow), prn,
-                #                            src, 225))
-                # 1800 deinterleaved symbols of a BeiDou B1C
-                # (B-CNAV1) navigation frame
-                # 24 unused bits in NAVBits[56]
-                # SF1 72sym, SF2 1200sym, SF3 528sym
-                # BCH(21,6)+BCH(51,8)  64ary LDPC(200,100) 64ary LDPC(88,44)
-                v = bytearray(228)
-                for i in range(57):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    k += 4
-                    st.pack_into('>L', v, i*4, d)
-                    # self.fh_bdsb1c.write("{:08x}".format(d))
-                # self.fh_bdsb1c.write("\n")
-                v = bytes(v)
-                prn_ = bs.unpack_from('u6', v, 0)[0]
-                if prn != prn_:
-                    return
-
-                # data2: 600b, errCorr2: 8b, data3: 264b, soh: 8b
-                msg = bytearray(228)
-                msg[0:75] = v[9:84]
-                msg[75] = crcsf2 << 1 | crcsf3
-                msg[76:109] = v[159:225]
-                msg[109] = bs.unpack_from('u8', v, 21)[0]
-                msg = bytes(msg)
+    def blk_rawl1c(self, buff, k, blk_num):
+        """ GPSRawL1C, QZSRawL1C """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcsf2, crcsf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if (sys == uGNSS.GPS and self.flg_gpscnav2) or \
+           (sys == uGNSS.QZS and self.flg_qzscnav2):
+            if crcsf2 != 1 or crcsf3 != 1:
+                if self.monlevel > 2:
+                    print("crc error in GPSRawL1C, QZSRawL1C " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn,
+                                 crcsf2, crcsf3, src))
+                return -1
 
-                sat = prn2sat(sys, prn)
-                eph = self.rn.decode_bds_b1c(self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            fh_ = self.fh_gpscnav2 if sys == uGNSS.GPS \
+                else self.fh_qzscnav2
 
-        elif blk_num == 4219:  # BDSRawB2a
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, cnt, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_bdsb2a:
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in BDSRawB2a " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, cnt, src))
-                    return -1
-
-                msg = bytearray(40)
-                for i in range(10):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
+            blen = (1800+7)//8
+            msg = bytearray(228)
+            for i in range(57):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+            write_nav(fh_, self.week, int(self.tow), prn, src, blen, msg)
 
-                sat = prn2sat(sys, prn)
-                eph = self.rn.decode_bds_b2a(self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            sat = prn2sat(sys, prn)
+            eph = self.rn.decode_gps_cnav2(self.week, self.tow, sat, msg)
+            if eph is not None:
+                self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num in (4221, 4227):  # GPSRawL1C, QZSRawL1C
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcsf2, crcsf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if (sys == uGNSS.GPS and self.flg_gpscnav2) or \
-               (sys == uGNSS.QZS and self.flg_qzscnav2):
-                if crcsf2 != 1 or crcsf3 != 1:
-                    if self.monlevel > 2:
-                        print("crc error in GPSRawL1C, QZSRawL1C " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn,
-                                     crcsf2, crcsf3, src))
-                    return -1
-
-                fh_ = self.fh_gpscnav2 if sys == uGNSS.GPS \
-                    else self.fh_qzscnav2
-
-                blen = (1800+7)//8
-                fh_.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                          format(self.week, int(self.tow), prn, src, blen))
-                msg = bytearray(228)
-                for i in range(57):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    fh_.write("{:08x}".format(d))
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-                fh_.write("\n")
+    def blk_qzsrawl1s(self, buff, k, blk_num):
+        """ QZSRawL1S, QZSRawL5S """
+        src_t = {24: 0, 25: 1, 33: 2, 39: 3}  # L1C/A, L5, L1S, L5S
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crc, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if sys == uGNSS.QZS and (self.flg_qzsl1s or self.flg_qzsl5s):
+            if crc != 1:
+                if self.monlevel > 2:
+                    print("crc error in QZSRawL1S, QZSRawL5S " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crc, cnt, src))
+                return -1
 
-                sat = prn2sat(sys, prn)
-                eph = self.rn.decode_gps_cnav2(self.week, self.tow, sat, msg)
-                if eph is not None:
-                    self.re.rnx_nav_body(eph, self.fh_rnxnav)
+            if src not in src_t.keys():
+                if self.monlevel > 0:
+                    print("src not recognized in QZSRawL1S/QZSRawL5S " +
+                          "{:2d}".format(src))
+                return -1
+
+            msg = bytearray(32)
+            for i in range(8):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            itype = src_t[src]
+            self.output_sbas(prn, msg, self.fh_sbas, itype)
+
+    def blk_bdsrawb2b(self, buff, k, blk_num):
+        """ BDSRawB2b """
+        sys, prn = self.decode_head(buff, k)
+        k += 7
+        crcpass, _, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+
+        if enabled(self, 'flg_bdsb2b'):
+            flg_bdsppp = True if prn >= 59 else False
 
-        elif blk_num in (4228, 4246):  # QZSRawL1S, QZSRawL5S
-            src_t = {24: 0, 25: 1, 33: 2, 39: 3}  # L1C/A, L5, L1S, L5S
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crc, cnt, src, freq, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if sys == uGNSS.QZS and (self.flg_qzsl1s or self.flg_qzsl5s):
-                if crc != 1:
-                    if self.monlevel > 2:
-                        print("crc error in QZSRawL1S, QZSRawL5S " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crc, cnt, src))
-                    return -1
-
-                if src not in src_t.keys():
-                    if self.monlevel > 0:
-                        print("src not recognized in QZSRawL1S/QZSRawL5S " +
-                              "{:2d}".format(src))
-                    return -1
-
-                msg = bytearray(32)
-                for i in range(8):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-
-                itype = src_t[src]
-                self.output_sbas(prn, msg, self.fh_sbas, itype)
-
-        elif blk_num == 4242:  # BDSRawB2b
-            sys, prn = self.decode_head(buff, k)
-            k += 7
-            crcpass, _, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-
-            if self.flg_bdsb2b:
-                flg_bdsppp = True if prn >= 59 else False
-
-                if crcpass != 1:
-                    if self.monlevel > 2:
-                        print("crc error in BDSRawB2b " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crcpass, src))
-                    return -1
-
-                if flg_bdsppp:
-                    self.fh_bdsb2b.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t".
-                                         format(self.week, int(self.tow), prn,
-                                                src, 64))
-                # 984 symbols of a BeiDou B2b navigation frame
-                # 8 unused bits in NAVBits[30]
-                msg = bytearray(64)
-                for i in range(16):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
-
-                    if flg_bdsppp:
-                        if i == 0:
-                            self.fh_bdsb2b.write("{:05x}".format(d & 0xfffff))
-                        elif i == 15:
-                            self.fh_bdsb2b.write(
-                                "{:05x}{:06x}".format((d >> 12) & 0xffffc, 0))
-                        else:
-                            self.fh_bdsb2b.write("{:08x}".format(d))
-
-                if flg_bdsppp:
-                    self.fh_bdsb2b.write("\n")
-                else:  # B2b-CNAV3
-                    sat = prn2sat(sys, prn)
-                    eph = self.rn.decode_bds_b2b(self.week, self.tow, sat, msg)
-                    if eph is not None:
-                        self.re.rnx_nav_body(eph, self.fh_rnxnav)
-
-        elif blk_num == 4262:  # NAVICRawL1
-            sys, prn = self.decode_head(buff, k, sysref=uGNSS.IRN)
-            k += 7
-            crc_sf2, crc_sf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
-            k += 5
-            if self.flg_irnnav:
-                if crc_sf2 != 1 or crc_sf3 != 1:
-                    if self.monlevel > 2:
-                        print("crc error in NAVICRawL1 " +
-                              "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
-                              format(int(self.tow), prn, crc_sf2, crc_sf3,
-                                     src))
-                    return -1
-
-                msg = bytearray(228)
-                for i in range(57):
-                    d = st.unpack_from('<L', buff, k)[0]
-                    st.pack_into('>L', msg, i*4, d)
-                    k += 4
+            if crcpass != 1:
+                if self.monlevel > 2:
+                    print("crc error in BDSRawB2b " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crcpass, src))
+                return -1
 
+            # 984 symbols of a BeiDou B2b navigation frame
+            # 8 unused bits in NAVBits[30]
+            msg = bytearray(64)
+            for i in range(16):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            if flg_bdsppp:
+                # bits 12-497 of the frame, zero padded to 64 bytes
+                d = (int.from_bytes(msg, 'big') >> 14) & ((1 << 486)-1)
+                msg_ = (d << 26).to_bytes(64, 'big')
+                if self.flg_bdsb2b:
+                    write_nav(self.fh_bdsb2b, self.week, int(self.tow), prn,
+                              src, 64, msg_)
+                tap_page(self, 'bdsb2b', self.week, int(self.tow), prn, src,
+                         msg_)
+            elif self.flg_bdsb2b:  # B2b-CNAV3
                 sat = prn2sat(sys, prn)
-                eph = self.rn.decode_irn_l1nav(self.week, self.tow, sat, msg)
+                eph = self.rn.decode_bds_b2b(self.week, self.tow, sat, msg)
                 if eph is not None:
                     self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num in (4095, 5891):  # GPS/QZS Decoded Message
-            eph = self.decode_gpsnav(buff, k)
+    def blk_navicrawl1(self, buff, k, blk_num):
+        """ NAVICRawL1 """
+        sys, prn = self.decode_head(buff, k, sysref=uGNSS.IRN)
+        k += 7
+        crc_sf2, crc_sf3, src, _, ch = st.unpack_from('<BBBBB', buff, k)
+        k += 5
+        if self.flg_irnnav:
+            if crc_sf2 != 1 or crc_sf3 != 1:
+                if self.monlevel > 2:
+                    print("crc error in NAVICRawL1 " +
+                          "{:6d}\t{:2d}\t{:1d}\t{:1d}\t{:2d}".
+                          format(int(self.tow), prn, crc_sf2, crc_sf3,
+                                 src))
+                return -1
+
+            msg = bytearray(228)
+            for i in range(57):
+                d = st.unpack_from('<L', buff, k)[0]
+                st.pack_into('>L', msg, i*4, d)
+                k += 4
+
+            sat = prn2sat(sys, prn)
+            eph = self.rn.decode_irn_l1nav(self.week, self.tow, sat, msg)
             if eph is not None:
                 self.re.rnx_nav_body(eph, self.fh_rnxnav)
 
-        elif blk_num == 5894:  # GPS UTC Decoded Message
-            pass
+    def blk_gpsnav(self, buff, k, blk_num):
+        """ GPS/QZS Decoded Message """
+        eph = self.decode_gpsnav(buff, k)
+        if eph is not None:
+            self.re.rnx_nav_body(eph, self.fh_rnxnav)
+
+    def init_handler(self):
+        """ set up the block handlers for the enabled output """
+        self.handler = {}
+        for blk_num, (name, flags) in self.blk_t.items():
+            if name is None:
+                continue
+            if flags and not any(enabled(self, f) for f in flags):
+                continue
+            self.handler[blk_num] = getattr(self, name)
+
+    def register(self, blk_num, handler):
+        """ register handler(buff, k, blk_num) for an SBF block """
+        self.handler[blk_num] = handler
+
+    def msg_skip(self, mid):
+        return mid not in self.handler
+
+    def decode(self, buff, len_, sys=[], prn=[]):
+        k = 2
+        _, id_, _ = st.unpack_from('<HHH', buff, k)
+        k += 6
+        blk_num = id_ & 0x1fff
+        blk_rev = (id_ >> 13) & 0x7
+        if self.monlevel > 1 and blk_num not in self.blk_t and \
+           blk_num not in self.handler:
+            print("block_num = {:d} rev={:d} len={:d}".format(
+                blk_num, blk_rev, len_))
 
-        elif blk_num == 5896:  # SBAS L1 Decoded Message
-            pass
+        # time of the block header, also of the blocks without handler for
+        # the enabled output
+        tow, wn = st.unpack_from('<LH', buff, k)
+        if tow != 0xffffffff and wn != 0xffff:
+            self.tow = tow*1e-3
+            self.week = wn
 
-        return 0
+        handler = self.handler.get(blk_num)
+        if handler is None:
+            return 0
+        ret = handler(buff, k, blk_num)
+        return 0 if ret is None else ret
 
 
-def decode(f, opt, args):
+def decode(f, opt, args, rng=None, prefix=None):
 
-    print("Decoding {}".format(f))
+    if rng is None:
+        print("Decoding {}".format(f))
+    else:
+        print("Decoding {} [{}:{}]".format(f, rng[1], rng[2]))
 
     bdir, fname = os.path.split(f)
 
-    prefix = fname.removesuffix('.sbf')[-4:]+'_'
-    prefix = str(Path(bdir) / prefix) if bdir else prefix
+    if prefix is None and f == '-':
+        prefix = 'stdin_'
+    elif prefix is None:
+        prefix = fname.removesuffix('.sbf')[-4:]+'_'
+        prefix = str(Path(bdir) / prefix) if bdir else prefix
     sbfdec = sbf(opt, prefix=prefix, gnss_t=args.gnss)
     sbfdec.monlevel = 1
+    if args.stat:
+        rcvStat(sbfdec, prefix+'stat.json')
+    if args.npy and rng is None:  # chunks are merged into the archive
+        nav_arc(sbfdec)
     nep = 0
     nep_max = 0
 
@@ -1056,31 +1351,50 @@ def decode(f, opt, args):
         sbfdec.re.rectype = args.receiver
 
     path = str(Path(bdir) / fname) if bdir else fname
-    blen = os.path.getsize(path)
-    with open(path, 'rb') as f:
-        msg = f.read(blen)
-        maxlen = len(msg)-5
-        # maxlen = 400000
-        k = 0
-        while k < maxlen:
-            stat = sbfdec.sync(msg, k)
-            if not stat:
-                k += 1
-                continue
-            if not sbfdec.check_crc(msg, k):
-                k += 1
-                continue
-            len_ = sbfdec.msg_len(msg, k)
-            if k+len_ >= maxlen:
-                break
-
-            sbfdec.decode(msg[k:k+len_], len_)
-            k += len_
+    if rng is None and f != '-' and (args.start or args.end):
+        rng = time_window(sbfdec, path, args.start, args.end)
+
+    if rng is None and args.chunks > 1:
+        decode_chunks(decode, sbfdec, path, opt, args)
+        sbfdec.file_close()
+        return
+
+    if not args.ephall:
+        ephCache(sbfdec)
+    if not args.sync:
+        fileWriter(sbfdec)
+
+    if args.stream or f == '-':
+        with open_stream(path) as stream:
+            for msg, len_ in stream_frames(sbfdec, stream,
+                                           follow=args.follow):
+                sbfdec.decode(msg, len_)
+        sbfdec.file_close()
+        return
+
+    k0 = 0 if rng is None else rng[1]
+    with open_mmap(path) as msg:
+        blks = []
+        for k, len_ in chunk_frames(sbfdec, msg, rng):
+
+            # collect MeasEpoch blocks for bulk decoding, the blocks in
+            # the lead-in section of a chunk are decoded one by one
+            blk_num = st.unpack_from('<H', msg, k+4)[0] & 0x1fff
+            if args.bulk > 0 and blk_num == 4027 and k >= k0:
+                blks.append(k)
+                if len(blks) >= args.bulk:
+                    sbfdec.output_obs_bulk(msg, blks)
+                    blks = []
+            else:
+                sbfdec.decode(msg[k:k+len_], len_)
 
             nep += 1
             if nep_max > 0 and nep >= nep_max:
                 break
 
+        if len(blks) > 0:
+            sbfdec.output_obs_bulk(msg, blks)
+
     sbfdec.file_close()
 
 
@@ -1106,6 +1420,38 @@ def main():
     parser.add_argument("-j", "--jobs", default=int(mp.cpu_count() / 2),
                         type=int, help='Max. number of parallel processes')
 
+    parser.add_argument("-c", "--chunks", default=0, type=int,
+                        help="Number of chunks per file decoded in parallel"
+                        " [0: off]")
+    parser.add_argument("--overlap", default=4096, type=int,
+                        help="Lead-in size before each chunk in kB [4096]")
+    parser.add_argument("-s", "--stream", action='store_true',
+                        help="Streaming decoding of a pipe or growing file,"
+                        " '-' reads from stdin")
+    parser.add_argument("--follow", default=0.0, type=float,
+                        help="Wait time for new data in streaming mode in s"
+                        " [0: stop at end of file]")
+    parser.add_argument("--stat", action='store_true',
+                        help="Write per message statistics to *stat.json")
+    parser.add_argument("--npy", action='store_true',
+                        help="Write navigation message logs as binary"
+                        " archives *.npy")
+    parser.add_argument("--ephall", action='store_true',
+                        help="Write all decoded ephemerides, also unchanged"
+                        " ones")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    parser.add_argument("--start", default=None,
+                        help="Start of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+    parser.add_argument("--end", default=None,
+                        help="End of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+
+    parser.add_argument("-b", "--bulk", default=0, type=int,
+                        help="MeasEpoch bulk decoding batch size [0: off]")
+
     # Retrieve all command line arguments
     #
     args = parser.parse_args()
@@ -1142,8 +1488,17 @@ def main():
 
     # Start processing pool
     #
-    with mp.Pool(processes=args.jobs) as pool:
-        pool.starmap(decode, [(f, opt, args) for f in glob(args.inpFileName)])
+    if args.inpFileName == '-':
+        decode('-', opt, args)
+    elif args.chunks > 1:
+        # Files are processed one by one, each in parallel chunks
+        #
+        for f in glob(args.inpFileName):
+            decode(f, opt, args)
+    else:
+        with mp.Pool(processes=args.jobs) as pool:
+            pool.starmap(decode, [(f, opt, args)
+                                  for f in glob(args.inpFileName)])
 
 
 # Call main function
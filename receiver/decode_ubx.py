@@ -10,7 +10,6 @@ u-blox Receiver UBX messages decoder
 """
 
 import argparse
-from binascii import hexlify
 import bitstruct.c as bs
 from glob import glob
 import multiprocessing as mp
@@ -19,9 +18,21 @@ import os
 from pathlib import Path
 import struct as st
 
-from cssrlib.gnss import uGNSS, uTYP, prn2sat, Obs, rSigRnx, gpst2time, uSIG
+from cssrlib.gnss import uGNSS, uTYP, prn2sat, rSigRnx, gpst2time, uSIG
 from cssrlib.rawnav import rcvDec, rcvOpt
 
+from rcvcrc import fletcher8
+from rcvarc import nav_arc
+from rcveph import ephCache
+from rcvidx import time_window
+from rcvio import open_mmap, open_stream, stream_frames
+from rcvobs import rcvEpoch
+from rcvpar import chunk_frames, decode_chunks
+from rcvscan import msg_set
+from rcvstat import rcvStat
+from rcvtap import tap_page
+from rcvwrt import fileWriter, write_nav
+
 CPSTD_VALID = 0.2           # stdev threshold of valid carrier-phase
 
 
@@ -29,6 +40,23 @@ class ubx(rcvDec):
     """ class for u-blox Binary Format (UBX) decoder """
     tow = -1
     week = -1
+    preamble = rb'\xb5\x62'
+    sync_len = 8
+    crc_len = 0
+    ep = None
+
+    # messages {class<<8|id: rcvOpt flags} decoded if any of the flags is
+    # set or no flags are given, other messages are skipped
+    nav_f = ('flg_rnxnav', 'flg_gpslnav', 'flg_gpscnav', 'flg_qzslnav',
+             'flg_qzscnav', 'flg_galinav', 'flg_galfnav', 'flg_gale6',
+             'flg_bdsd12', 'flg_bdsb1c', 'flg_bdsb2a', 'flg_gloca',
+             'flg_sbas')
+    mid_t = {
+        0x0120: (),  # UBX-NAV-TIMEGPS
+        0x0215: (),  # UBX-RXM-RAWX (also sets the receiver time)
+        0x0213: nav_f,  # UBX-RXM-SFRBX
+        0x0273: ('flg_qzsl6',),  # UBX-RXM-QZSSL6
+    }
 
     def __init__(self, opt=None, prefix='', gnss_t='GECJ'):
         super().__init__(opt, prefix, gnss_t)
@@ -87,26 +115,48 @@ class ubx(rcvDec):
                 self.sig_tab[sys][uTYP.D].append(rSigRnx(sys, uTYP.D, sig))
                 self.sig_tab[sys][uTYP.S].append(rSigRnx(sys, uTYP.S, sig))
 
+        # signal id -> column index of sig_tab, -1 if not used
+        self.sig_idx = {}
+        for sys in self.sig_t:
+            self.sig_idx[sys] = [-1]*256
+            for key in self.sig_t[sys]:
+                sig = self.sig_t[sys][key][uTYP.L]
+                if sig in self.sig_tab[sys][uTYP.L]:
+                    self.sig_idx[sys][key] = \
+                        self.sig_tab[sys][uTYP.L].index(sig)
+
         self.bds_cnv1 = {}
         for k in range(uGNSS.BDSMAX):
             self.bds_cnv1[k] = bytearray(124)
 
+        self.mid_use = msg_set(self, self.mid_t)
+
     def sync(self, buff, k):
         return buff[k] == 0xB5 and buff[k+1] == 0x62
 
     def msg_len(self, msg, k):
         return st.unpack_from('<H', msg, k+4)[0]+8
 
+    def msg_id(self, msg, k):
+        return st.unpack_from('>H', msg, k+2)[0]  # class, id
+
+    def msg_skip(self, mid):
+        return mid not in self.mid_use
+
+    def msg_name(self, mid):
+        return "{:02x}-{:02x}".format(mid >> 8, mid & 0xff)
+
+    def msg_time(self, msg, k):
+        if self.msg_id(msg, k) != 0x0215:  # UBX-RXM-RAWX
+            return None
+        tow, wn = st.unpack_from('<dH', msg, k+6)
+        return wn*604800+tow
+
     def check_crc(self, msg, k):
         len_ = st.unpack_from('<H', msg, k+4)[0]+8
         i = k+len_-2
         cka_, ckb_ = msg[i:i+2]
-        cka = ckb = 0
-        for j in range(len_-4):
-            cka += msg[k+j+2]
-            cka &= 0xff
-            ckb += cka
-            ckb &= 0xff
+        cka, ckb = fletcher8(msg[k+2:i])
 
         if cka_ != cka or ckb_ != ckb:
             if self.monlevel > 0:
@@ -125,9 +175,6 @@ class ubx(rcvDec):
         return sys, prn
 
     def decode_obs(self, buff, k=6):
-        obs = Obs()
-        obs.sig = self.sig_tab
-
         nsig_max = 0
         for s in self.sig_tab:
             if len(self.sig_tab[s][uTYP.L]) > nsig_max:
@@ -138,21 +185,17 @@ class ubx(rcvDec):
         self.nsig[uTYP.D] = nsig_max
         self.nsig[uTYP.S] = nsig_max
 
-        obs.sat = np.empty(0, dtype=np.int32)
+        if self.ep is None:
+            self.ep = rcvEpoch(nsig_max)
+        ep = self.ep
 
         tow, wn, leapS, nm, stat, ver = st.unpack_from('<dHbBBB', buff, k)
         k += 16
 
-        obs.time = gpst2time(wn, tow)
+        time = gpst2time(wn, tow)
         self.tow = tow
         self.week = wn
 
-        pr = {}
-        cp = {}
-        dp = {}
-        lli = {}
-        cn = {}
-
         for i in range(nm):
             pr_, cp_, dop_, gnss, svid, sigid, freqid = st.unpack_from(
                 '<ddfBBBB', buff, k)
@@ -183,20 +226,11 @@ class ubx(rcvDec):
 
             # ch = freqid-7 if sys == uGNSS.GLO else 0
             sat = prn2sat(sys, prn)
-            sig = self.sig_t[sys][sigid][uTYP.L]
-
-            if sig not in self.sig_tab[sys][sig.typ]:
+            idx = self.sig_idx[sys][sigid]
+            if idx < 0:
                 if self.monlevel > 1:
-                    print("skip code={:}".format(sig))
+                    print("skip sigid={:}".format(sigid))
                 continue
-            idx = self.sig_tab[sys][sig.typ].index(sig)
-
-            if sat not in pr.keys():
-                pr[sat] = {}
-                cp[sat] = {}
-                dp[sat] = {}
-                lli[sat] = {}
-                cn[sat] = {}
 
             slip = 0x01 if locktime == 0 else 0
             halfv = 0x02 if (trk & 4) == 0 else 0
@@ -204,37 +238,19 @@ class ubx(rcvDec):
 
             lli_ = slip + halfv
 
-            pr[sat][idx] = pr_
-            cp[sat][idx] = cp_
-            dp[sat][idx] = dop_
-            lli[sat][idx] = lli_
-            cn[sat][idx] = cn0
-
-            if sat not in obs.sat:
-                obs.sat = np.append(obs.sat, sat)
+            j = ep.slot(sat)
+            ep.P[j, idx] = pr_
+            ep.L[j, idx] = cp_
+            ep.D[j, idx] = dop_
+            ep.lli[j, idx] = lli_
+            ep.S[j, idx] = cn0
 
             # print(f"OBS {gnss}:{prn:3d} {svid} {sigid:2d}")
 
-        nsat = len(obs.sat)
-        if nsat == 0:
+        if ep.n == 0:
             return None
 
-        obs.sat.sort()
-        obs.P = np.zeros((nsat, self.nsig[uTYP.C]), dtype=np.float64)
-        obs.L = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.float64)
-        obs.D = np.zeros((nsat, self.nsig[uTYP.D]), dtype=np.float64)
-        obs.S = np.zeros((nsat, self.nsig[uTYP.S]), dtype=np.float64)
-        obs.lli = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.int32)
-
-        for k, sat in enumerate(obs.sat):
-            for i in pr[sat].keys():
-                obs.P[k][i] = pr[sat][i]
-                obs.L[k][i] = cp[sat][i]
-                obs.D[k][i] = dp[sat][i]
-                obs.S[k][i] = cn[sat][i]
-                obs.lli[k][i] = lli[sat][i]
-
-        return obs
+        return ep.finalize(time, self.sig_tab)
 
     def decode_nav(self, buff, k=6):
         if self.week == -1:
@@ -374,9 +390,12 @@ class ubx(rcvDec):
                 itype = 0 if sigid == 0 else 1
                 self.output_sbas(prn, b[:blen], fh_, itype)
             else:
-                fh_.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                          format(self.week, int(self.tow+0.01), prn, type_,
-                                 blen, hexlify(b[:blen]).decode()))
+                write_nav(fh_, self.week, int(self.tow+0.01), prn, type_,
+                          blen, b[:blen])
+
+        if sys == uGNSS.GAL and sigid == 8 and blen > 0:  # E6B
+            tap_page(self, 'gale6', self.week, int(self.tow+0.01), prn, 6,
+                     bytes(b[:blen]))
 
         if self.monlevel > 1:
             print(f"NAV gnss={gnss}:prn={svid:3d}({freqid:2d}):sig={sigid:2d}")
@@ -388,9 +407,8 @@ class ubx(rcvDec):
         b = buff[k:k+250]
         print(f"L6 {svid}:{ch}")
         if self.flg_qzsl6:
-            self.fh_qzsl6.write("{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".
-                                format(self.week, self.tow, svid, ch, 250,
-                                       hexlify(b).decode()))
+            write_nav(self.fh_qzsl6, self.week, self.tow, svid, ch, 250, b)
+        tap_page(self, 'qzsl6', self.week, self.tow, svid, ch, bytes(b))
 
     def decode_timegps(self, buff, k=6):
         """ decode NAV-TIMEGPS """
@@ -426,16 +444,26 @@ class ubx(rcvDec):
         return 0
 
 
-def decode(f, opt, args):
+def decode(f, opt, args, rng=None, prefix=None):
 
-    print("Decoding {}".format(f))
+    if rng is None:
+        print("Decoding {}".format(f))
+    else:
+        print("Decoding {} [{}:{}]".format(f, rng[1], rng[2]))
 
     bdir, fname = os.path.split(f)
 
-    prefix = fname.removesuffix('.ubx')[-4:]+'_'
-    prefix = str(Path(bdir) / prefix) if bdir else prefix
+    if prefix is None and f == '-':
+        prefix = 'stdin_'
+    elif prefix is None:
+        prefix = fname.removesuffix('.ubx')[-4:]+'_'
+        prefix = str(Path(bdir) / prefix) if bdir else prefix
     ubxdec = ubx(opt, prefix=prefix, gnss_t=args.gnss)
     ubxdec.monlevel = 1
+    if args.stat:
+        rcvStat(ubxdec, prefix+'stat.json')
+    if args.npy and rng is None:  # chunks are merged into the archive
+        nav_arc(ubxdec)
     nep = 0
     nep_max = 0
 
@@ -450,27 +478,30 @@ def decode(f, opt, args):
         ubxdec.re.rectype = args.receiver
 
     path = str(Path(bdir) / fname) if bdir else fname
-    blen = os.path.getsize(path)
-    with open(path, 'rb') as f:
-        msg = f.read(blen)
-        maxlen = len(msg)-8
-        # maxlen = 7000000+10000
-        k = 0
-        while k < maxlen:
-            stat = ubxdec.sync(msg, k)
-            if not stat:
-                k += 1
-                continue
-            len_ = ubxdec.msg_len(msg, k)
-            if k+len_ >= maxlen:
-                break
-
-            if not ubxdec.check_crc(msg, k):
-                k += 1
-                continue
-
+    if rng is None and f != '-' and (args.start or args.end):
+        rng = time_window(ubxdec, path, args.start, args.end)
+
+    if rng is None and args.chunks > 1:
+        decode_chunks(decode, ubxdec, path, opt, args)
+        ubxdec.file_close()
+        return
+
+    if not args.ephall:
+        ephCache(ubxdec)
+    if not args.sync:
+        fileWriter(ubxdec)
+
+    if args.stream or f == '-':
+        with open_stream(path) as stream:
+            for msg, len_ in stream_frames(ubxdec, stream,
+                                           follow=args.follow):
+                ubxdec.decode(msg, len_)
+        ubxdec.file_close()
+        return
+
+    with open_mmap(path) as msg:
+        for k, len_ in chunk_frames(ubxdec, msg, rng):
             ubxdec.decode(msg[k:k+len_], len_)
-            k += len_
 
             nep += 1
             if nep_max > 0 and nep >= nep_max:
@@ -501,6 +532,35 @@ def main():
     parser.add_argument("-j", "--jobs", default=int(mp.cpu_count() / 2),
                         type=int, help='Max. number of parallel processes')
 
+    parser.add_argument("-c", "--chunks", default=0, type=int,
+                        help="Number of chunks per file decoded in parallel"
+                        " [0: off]")
+    parser.add_argument("--overlap", default=4096, type=int,
+                        help="Lead-in size before each chunk in kB [4096]")
+    parser.add_argument("-s", "--stream", action='store_true',
+                        help="Streaming decoding of a pipe or growing file,"
+                        " '-' reads from stdin")
+    parser.add_argument("--follow", default=0.0, type=float,
+                        help="Wait time for new data in streaming mode in s"
+                        " [0: stop at end of file]")
+    parser.add_argument("--stat", action='store_true',
+                        help="Write per message statistics to *stat.json")
+    parser.add_argument("--npy", action='store_true',
+                        help="Write navigation message logs as binary"
+                        " archives *.npy")
+    parser.add_argument("--ephall", action='store_true',
+                        help="Write all decoded ephemerides, also unchanged"
+                        " ones")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    parser.add_argument("--start", default=None,
+                        help="Start of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+    parser.add_argument("--end", default=None,
+                        help="End of time window in GPST"
+                        " 'YYYY-MM-DDThh:mm:ss' (uses <file>.idx)")
+
     # Retrieve all command line arguments
     #
     args = parser.parse_args()
@@ -534,8 +594,17 @@ def main():
 
     # Start processing pool
     #
-    with mp.Pool(processes=args.jobs) as pool:
-        pool.starmap(decode, [(f, opt, args) for f in glob(args.inpFileName)])
+    if args.inpFileName == '-':
+        decode('-', opt, args)
+    elif args.chunks > 1:
+        # Files are processed one by one, each in parallel chunks
+        #
+        for f in glob(args.inpFileName):
+            decode(f, opt, args)
+    else:
+        with mp.Pool(processes=args.jobs) as pool:
+            pool.starmap(decode, [(f, opt, args)
+                                  for f in glob(args.inpFileName)])
 
 
 # Call main function
@@ -0,0 +1,199 @@
+"""
+Binary archive of navigation message logs
+
+The navigation message logs (*.txt) of the decoders hold a message per
+line as week, tow, prn, type, len and the message as hex string. navArc
+takes the place of the file handle of a log and stores the messages as
+NumPy array (*.npy) of fixed-width records
+
+  wn, tow, prn, type, len : fields of the text log
+  nav                     : message bytes, zero padded to the width
+
+together with a time index <file>.idx of (time, row) for the first
+record of each epoch, where time is in s since the GPS epoch. Both are
+loaded by np.load() without parsing, see load_nav() of samples/navlog.py,
+which uses the record types and the parser of the text logs of this
+module.
+
+Existing text logs are converted with
+
+  python rcvarc.py <file(s)>
+
+"""
+
+import argparse
+from glob import glob
+import numpy as np
+import os
+
+from rcvpar import handles
+
+IDX_T = np.dtype([('time', '<f8'), ('row', '<i8')])
+
+BLK = 65536  # records per block
+
+
+def nav_dtype(width):
+    """ record type of the archive for messages of width bytes """
+    return np.dtype([('wn', '<i4'), ('tow', '<f8'), ('prn', '<i4'),
+                     ('type', '<i4'), ('len', '<i4'), ('nav', 'u1', width)])
+
+
+class navArc():
+    """ class for a navigation message archive written as text log """
+
+    def __init__(self, name):
+        self.name = name
+        self.line = ''
+        self.rec = []
+        self.blk = []
+
+    def write(self, s):
+        """ collect the text of a log and store the complete lines """
+        if '\n' not in s:
+            self.line += s
+            return
+        lines = (self.line+s).split('\n')
+        self.line = lines.pop()
+        for line in lines:
+            self.add(line)
+
+    def writelines(self, lines):
+        for s in lines:
+            self.write(s)
+
+    def add(self, line):
+        """ store a line of a log: wn tow prn type len hex, or
+            wn tow prn type : hex (SBAS) """
+        v = line.split()
+        if len(v) != 6:
+            return
+        try:
+            msg = bytes.fromhex(v[5])
+        except ValueError:
+            return
+        len_ = len(msg) if v[4] == ':' else int(v[4])
+        self.rec.append((int(v[0]), float(v[1]), int(v[2]), int(v[3]),
+                         len_, msg))
+        if len(self.rec) >= BLK:
+            self.flush()
+
+    def put_nav(self, week, tow, prn, type_, blen, msg):
+        """ store a message without the text of the log, see write_nav() of
+            rcvwrt """
+        self.rec.append((week, float(tow), prn, type_, blen, bytes(msg)))
+        if len(self.rec) >= BLK:
+            self.flush()
+
+    def flush(self):
+        """ convert the collected records into a block of the archive """
+        if len(self.rec) == 0:
+            return
+        rec = self.rec
+        width = max(len(r[5]) for r in rec)
+        blk = np.zeros(len(rec), dtype=nav_dtype(width))
+        for k, s in enumerate(('wn', 'tow', 'prn', 'type', 'len')):
+            blk[s] = [r[k] for r in rec]
+        nav = b''.join(r[5].ljust(width, b'\0') for r in rec)
+        blk['nav'] = np.frombuffer(nav, dtype='u1').reshape(-1, width)
+        self.blk.append(blk)
+        self.rec = []
+
+    def array(self):
+        """ join the stored records into a single array """
+        if self.line:
+            self.add(self.line)
+            self.line = ''
+        self.flush()
+        v = join_nav(self.blk)
+        self.blk = [v] if len(v) > 0 else []
+        return v
+
+    def close(self):
+        """ write the archive and its time index """
+        v = self.array()
+        self.blk = []
+
+        with open(self.name, 'wb') as fh:
+            np.save(fh, v)
+        with open(self.name+'.idx', 'wb') as fh:
+            np.save(fh, time_index(v))
+
+
+def time_index(v):
+    """ time index (time, row) of the first record of each epoch """
+    t = v['wn']*604800.0+v['tow']
+    row = np.flatnonzero(np.diff(t, prepend=-1.0) != 0.0)
+    idx = np.zeros(len(row), dtype=IDX_T)
+    idx['time'] = t[row]
+    idx['row'] = row
+    return idx
+
+
+def join_nav(vs):
+    """ join the records of several logs, padded to the largest width """
+    width = max([v.dtype['nav'].shape[0] for v in vs], default=1)
+    vn = np.zeros(sum(len(v) for v in vs), dtype=nav_dtype(width))
+    n = 0
+    for v in vs:
+        for s in ('wn', 'tow', 'prn', 'type', 'len'):
+            vn[s][n:n+len(v)] = v[s]
+        vn['nav'][n:n+len(v), :v.dtype['nav'].shape[0]] = v['nav']
+        n += len(v)
+    return vn
+
+
+def read_lines(file):
+    """ read a text log line by line, lines not matching the format are
+        skipped """
+    arc = navArc(None)
+    with open(file, 'r') as fh:
+        for line in fh:
+            arc.add(line)
+    return arc.array()
+
+
+def nav_arc(dec):
+    """ replace the navigation message logs of a decoder by archives """
+    for s in handles(dec):
+        if s in ('rnxobs', 'rnxnav'):
+            continue
+        fh = getattr(dec, 'fh_'+s)
+        name = fh.name
+        fh.close()
+        os.remove(name)
+        setattr(dec, 'fh_'+s, navArc(name.removesuffix('.txt')+'.npy'))
+
+
+def convert(file):
+    """ convert a text log into an archive """
+    arc = navArc(file.removesuffix('.txt')+'.npy')
+    with open(file, 'r') as fh:
+        for line in fh:
+            arc.add(line)
+    arc.close()
+    return arc.name
+
+
+def main():
+
+    # Parse command line arguments
+    #
+    parser = argparse.ArgumentParser(
+        description="Navigation message log to binary archive converter")
+
+    parser.add_argument("inpFileName",
+                        help="Input log file(s) *.txt (wildcards allowed)")
+
+    # Retrieve all command line arguments
+    #
+    args = parser.parse_args()
+
+    for f in glob(args.inpFileName):
+        print("Converting {} -> {}".format(f, convert(f)))
+
+
+# Call main function
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""
+Throughput benchmark for receiver messages decoders
+
+Synthetic receiver logs with valid checksums are generated for each
+format and decoded with RINEX OBS output only:
+
+  sbf      : Septentrio SBF MeasEpoch (4027)
+  sbf_bulk : as sbf, decoded with the bulk MeasEpoch decoder
+  ubx      : u-blox UBX-RXM-RAWX
+  nov      : NovAtel OEM7 RANGEB (43)
+  jps      : Javad GREIS [GT] [SX] [rc] [RC] [cp] [Dc] [cE] ... [::]
+  rtcm     : RTCM 3 MSM4 (1074/1094/1124/1114)
+
+The frame iteration of the JPS log alone, without decoding, is measured
+by two further cases:
+
+  jps_frames : frames() of rcvscan with the table-driven crc8() of rcvcrc
+  jps_bytes  : byte loop with sync() and the checksum computed per byte,
+               as the JPS decoder before the frame scanner
+
+The satellites are taken from GPS, Galileo, BeiDou and QZSS in turn.
+Each decoder runs in a separate process. The throughput (MB/s, epochs/s)
+and the peak resident set size of the process are reported as JSON.
+With -k mem or -k null the output is kept in memory or discarded without
+formatting the RINEX text (see rcvsink).
+
+usage: python rcvbench.py [-n nsat] [-m nsig] [-r rate] [-d duration]
+                          [-f formats] [-k sink] [-o output.json]
+"""
+
+import argparse
+from importlib.metadata import version
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import struct as st
+import sys
+import tempfile
+import time
+
+import bitstruct as bs
+
+from cssrlib.gnss import rCST
+from cssrlib.rawnav import rcvOpt
+
+from rcvcrc import crc16, crc24q, crc32, crc8, fletcher8
+from rcvio import open_mmap
+from rcvscan import frames
+from rcvsink import memSink, nullSink, set_sinks
+
+FORMATS = ['sbf', 'sbf_bulk', 'ubx', 'nov', 'jps', 'rtcm', 'jps_frames',
+           'jps_bytes']
+
+# satellites per system for the synthetic constellation
+PRN_T = {
+    'G': range(1, 33), 'E': range(1, 37), 'C': range(19, 41),
+    'J': range(193, 200),
+}
+
+# range [m] of the first satellite of each system
+RANGE_T = {'G': 2.0e7, 'E': 2.3e7, 'C': 2.2e7, 'J': 3.7e7}
+
+# carrier frequency [Hz] of the signals 1-3 of each system
+FREQ_T = {
+    'G': [rCST.FREQ_G1, rCST.FREQ_G2, rCST.FREQ_G5],
+    'E': [rCST.FREQ_E1, rCST.FREQ_E5a, rCST.FREQ_E5b],
+    'C': [rCST.FREQ_C2, rCST.FREQ_C2b, rCST.FREQ_C3],
+    'J': [rCST.FREQ_J1, rCST.FREQ_J2, rCST.FREQ_J5],
+}
+
+# signal codes 1-3 of each system
+SBF_SIG = {'G': [0, 2, 4], 'E': [17, 20, 21], 'C': [28, 29, 30],
+           'J': [6, 7, 26]}
+UBX_SIG = {'G': [0, 3, 7], 'E': [0, 4, 6], 'C': [5, 7, 4],
+           'J': [0, 5, 9]}
+NOV_SIG = {'G': [0, 9, 14], 'E': [2, 12, 17], 'C': [0, 7, 9],
+           'J': [0, 17, 14]}
+MSM_SIG = {'G': [2, 16, 23], 'E': [2, 23, 15], 'C': [2, 14, 8],
+           'J': [2, 16, 23]}
+
+JPS_CH = 'c25'
+
+UBX_GNSS = {'G': 0, 'E': 2, 'C': 3, 'J': 5}
+NOV_SYS = {'G': 0, 'E': 3, 'C': 4, 'J': 5}
+JPS_GNSS = {'G': 1, 'E': 4, 'C': 6, 'J': 5}
+MSM_TYPE = {'G': 1074, 'E': 1094, 'C': 1124, 'J': 1114}
+
+# JPS integer pseudorange scale and offset [s]
+JPS_KA = {'G': (1e-11, 0.075), 'E': (2e-11, 0.085), 'C': (2e-11, 0.105),
+          'J': (2e-11, 0.125)}
+
+
+def satellites(nsat):
+    """ list of (sys, prn) of nsat satellites, systems taken in turn """
+    prn = {s: iter(PRN_T[s]) for s in PRN_T}
+    sats = []
+    while len(sats) < nsat:
+        for s in prn:
+            p = next(prn[s], None)
+            if p is not None and len(sats) < nsat:
+                sats.append((s, p))
+    return sats
+
+
+def geometry(i, s, t):
+    """ range [m], range rate [m/s] and C/N0 [dB-Hz] of satellite i """
+    rr = 300.0*((i % 7)-3)
+    return RANGE_T[s]+5e4*i+rr*t, rr, 35+(i % 15)
+
+
+def gen_sbf(sats, nsig, week, tow, nep, dt):
+    """ SBF MeasEpoch blocks """
+    buff = bytearray()
+    svid_t = {'G': 0, 'E': 70, 'C': 140, 'J': -12}
+    for ne in range(nep):
+        t = ne*dt
+        body = bytearray()
+        for i, (s, prn) in enumerate(sats):
+            rng, rr, cn0 = geometry(i, s, t)
+            sig = SBF_SIG[s]
+            fc = FREQ_T[s]
+            code = int(rng*1e3)
+            cp = int((rng*fc[0]/rCST.CLIGHT % 1.0)*1e3)
+            dop = int(-rr*fc[0]/rCST.CLIGHT*1e4)
+            body += st.pack('<BBBBLlHbBHBB', i, sig[0], prn+svid_t[s],
+                            code >> 32, code & 0xffffffff, dop, cp, 0,
+                            (cn0-10)*4, 1000, 0x07, nsig-1)
+            for j in range(1, nsig):
+                body += st.pack('<BBBBbBHHH', sig[j], 3, (cn0-13)*4, 0,
+                                0, 0x07, j*100, j*1000, 0)
+        blk = st.pack('<LHBBBBBB', int((tow+t)*1e3) % 604800000, week,
+                      len(sats), 20, 12, 0, 0, 0)+body
+        len_ = 8+len(blk)
+        blk += bytes(-len_ % 4)
+        hdr = st.pack('<HH', 4027, len_+(-len_ % 4))
+        buff += b'$@'+st.pack('<H', crc16(hdr+blk))+hdr+blk
+    return buff
+
+
+def gen_ubx(sats, nsig, week, tow, nep, dt):
+    """ UBX-RXM-RAWX messages """
+    buff = bytearray()
+    for ne in range(nep):
+        t = ne*dt
+        nm = len(sats)*nsig
+        msg = st.pack('<dHbBBB', (tow+t) % 604800, week, 18, nm, 1, 1)
+        msg += bytes(2)
+        for i, (s, prn) in enumerate(sats):
+            rng, rr, cn0 = geometry(i, s, t)
+            svid = prn-192 if s == 'J' else prn
+            for j in range(nsig):
+                fc = FREQ_T[s][j]
+                msg += st.pack('<ddfBBBB', rng, rng*fc/rCST.CLIGHT,
+                               -rr*fc/rCST.CLIGHT, UBX_GNSS[s], svid,
+                               UBX_SIG[s][j], 0)
+                msg += st.pack('<HBBBBBx', 64000, cn0, 5, 1, 5, 0x07)
+        msg = b'\xb5\x62'+st.pack('<BBH', 0x02, 0x15, len(msg))+msg
+        buff += msg+bytes(fletcher8(msg[2:]))
+    return buff
+
+
+def gen_nov(sats, nsig, week, tow, nep, dt):
+    """ NovAtel RANGEB logs """
+    buff = bytearray()
+    for ne in range(nep):
+        t = ne*dt
+        ms = int((tow+t)*1e3) % 604800000
+        body = st.pack('<I', len(sats)*nsig)
+        for i, (s, prn) in enumerate(sats):
+            rng, rr, cn0 = geometry(i, s, t)
+            for j in range(nsig):
+                fc = FREQ_T[s][j]
+                status = (NOV_SYS[s] << 16) | (NOV_SIG[s][j] << 21) | \
+                    (1 << 12) | (1 << 10) | ((i % 32) << 5) | 0x04
+                body += st.pack('<HHdfdffffI', prn, 0, rng, 0.05,
+                                -rng*fc/rCST.CLIGHT, 0.005,
+                                -rr*fc/rCST.CLIGHT, cn0, 100.0+t, status)
+        hdr = st.pack('<3sBHBBHHBBHIIHH', b'\xaa\x44\x12', 28, 43, 0,
+                      0x20, len(body), 0, 0, 180, week, ms, 0, 0, 0)
+        msg = hdr+body
+        buff += msg+st.pack('<I', crc32(msg))
+    return buff
+
+
+def jps_msg(head, data):
+    """ GREIS message [head] with checksum, preceded by a line feed """
+    msg = head.encode()+'{:03X}'.format(len(data)+1).encode()+data
+    return b'\n'+msg+bytes([crc8(msg)])
+
+
+def gen_jps(sats, nsig, week, tow, nep, dt):
+    """ GREIS observation messages """
+    buff = bytearray()
+    n = len(sats)
+    sx = b''.join(st.pack('<BB', JPS_GNSS[s], prn) for s, prn in sats)
+    for ne in range(nep):
+        t = ne*dt
+        ms = int((tow+t)*1e3) % 604800000
+        geo = [geometry(i, s, t) for i, (s, _) in enumerate(sats)]
+
+        buff += jps_msg('~~', st.pack('<L', ms % 86400000))
+        buff += jps_msg('GT', st.pack('<LHB', ms, week % 1024, week//1024))
+        buff += jps_msg('SX', sx)
+
+        # reference pseudorange [rc], pseudoranges [RC] [R2] ..
+        spr = [int((g[0]/rCST.CLIGHT-JPS_KA[s][1])/JPS_KA[s][0])
+               for g, (s, _) in zip(geo, sats)]
+        buff += jps_msg('rc', st.pack('<'+'i'*n, *spr))
+        pr = [g[0]/rCST.CLIGHT for g in geo]
+        for ch in JPS_CH[:nsig]:
+            buff += jps_msg('R'+ch.upper(), st.pack('<'+'d'*n, *pr))
+
+        # carrier phase [cp] [2p] .., doppler [Dc] [D2] .., C/N0 [cE] ..
+        rcp = [(i % 100)*1000 for i in range(n)]
+        cnr = [int(g[2]*4) for g in geo]
+        for j, ch in enumerate(JPS_CH[:nsig]):
+            dop = [int(-g[1]*FREQ_T[s][j]/rCST.CLIGHT*1e4)
+                   for g, (s, _) in zip(geo, sats)]
+            buff += jps_msg(ch+'p', st.pack('<'+'i'*n, *rcp))
+            buff += jps_msg('D'+ch, st.pack('<'+'l'*n, *dop))
+            buff += jps_msg(ch+'E', st.pack('<'+'B'*n, *cnr))
+
+        buff += jps_msg('::', st.pack('<L', ms % 86400000))
+    return buff
+
+
+def rtcm_msg(payload):
+    """ RTCM 3 frame with CRC-24Q """
+    msg = bytes([0xd3])+st.pack('>H', len(payload))+payload
+    return msg+crc24q(msg).to_bytes(3, 'big')
+
+
+def gen_msm4(s, prn, nsig, tow, geo, mi):
+    """ MSM4 message of the satellites prn of system s """
+    rms = rCST.CLIGHT*1e-3
+    svmask = sum(1 << (64-p+(192 if s == 'J' else 0)) for p in prn)
+    sigmask = sum(1 << (32-sig) for sig in MSM_SIG[s][:nsig])
+    nsat = len(prn)
+    ncell = nsat*nsig
+    tow_ = (tow-14000) % 604800000 if s == 'C' else tow
+
+    fmt = 'u12u12u30u1u3u7u2u2u1u3u64u32'
+    val = [MSM_TYPE[s], 0, tow_, mi, 0, 0, 0, 0, 0, 0, svmask, sigmask]
+    fmt += 'u'+str(ncell)
+    val += [(1 << ncell)-1]
+
+    # rough range (integer and modulo 1 ms), fine range and phase
+    rint = [int(g[0]/rms) for g in geo]
+    rmod = [int((g[0]/rms-r)*1024) for g, r in zip(geo, rint)]
+    fmt += 'u8'*nsat+'u10'*nsat
+    val += rint+rmod
+    fine = []
+    for g, r, m in zip(geo, rint, rmod):
+        d = g[0]/rms-r-m/1024
+        fine += [int(d*2**24)]*nsig
+    fmt += 's15'*ncell+'s22'*ncell+'u4'*ncell+'u1'*ncell+'u6'*ncell
+    val += fine+[v*32 for v in fine]+[15]*ncell+[0]*ncell
+    val += [g[2] for g in geo for _ in range(nsig)]
+
+    return rtcm_msg(bs.pack(fmt, *val))
+
+
+def gen_rtcm(sats, nsig, week, tow, nep, dt):
+    """ RTCM 3 MSM4 messages, at most 64 cells per message """
+    buff = bytearray()
+    nmax = 64//nsig
+    for ne in range(nep):
+        t = ne*dt
+        ms = int((tow+t)*1e3) % 604800000
+        grp = []
+        for s in MSM_TYPE:
+            sat_ = [(i, prn) for i, (s_, prn) in enumerate(sats) if s_ == s]
+            for k in range(0, len(sat_), nmax):
+                grp.append((s, sat_[k:k+nmax]))
+        for k, (s, sat_) in enumerate(grp):
+            geo = [geometry(i, s, t) for i, _ in sat_]
+            prn = [p for _, p in sat_]
+            mi = 1 if k < len(grp)-1 else 0
+            buff += gen_msm4(s, prn, nsig, ms, geo, mi)
+    return buff
+
+
+def decoder(fmt, opt, prefix, week):
+    """ decoder instance of a format """
+    if fmt.startswith('sbf'):
+        from decode_sbf import sbf as dec_t
+    elif fmt == 'ubx':
+        from decode_ubx import ubx as dec_t
+    elif fmt == 'nov':
+        from decode_nov import nov as dec_t
+    elif fmt == 'jps':
+        from decode_jps import jps as dec_t
+    elif fmt == 'rtcm':
+        from decode_rtcm import rtcmDec as dec_t
+    dec = dec_t(opt, prefix=prefix, gnss_t='GECJ')
+    if fmt == 'rtcm':
+        dec.set_week(week)
+    dec.monlevel = 0
+    return dec
+
+
+def crc8_bytes(data):
+    """ GREIS checksum computed per byte """
+    res = 0
+    for c in data:
+        res = (((res << 2) | (res >> 6)) ^ c) & 0xff
+    return ((res << 2) | (res >> 6)) & 0xff
+
+
+def scan_jps(dec, msg, loop=False):
+    """ offsets of the JPS messages with valid checksum found by frames(),
+        or by the byte loop with sync() if loop is True """
+    if not loop:
+        return [k for k, _ in frames(dec, msg, filt=False)]
+    ks = []
+    for k in range(len(msg)-5):
+        if not dec.sync(msg, k):
+            continue
+        len_ = dec.msg_len(msg, k+1)
+        if k+1+len_ > len(msg):
+            continue
+        if msg[k+1:k+3] == b'RE' or \
+           crc8_bytes(msg[k+1:k+len_]) == msg[k+len_]:
+            ks.append(k+1)
+    return ks
+
+
+def run_scan(fmt, path, week, res):
+    """ iterate the frames of a JPS log and put the results into queue
+        res, the epochs are counted by the [~~] messages """
+    dec = decoder('jps', rcvOpt(), None, week)
+
+    t0 = time.perf_counter()
+    with open_mmap(path) as msg:
+        ks = scan_jps(dec, msg, loop=fmt == 'jps_bytes')
+        nep = sum(1 for k in ks if msg[k:k+2] == b'~~')
+    t1 = time.perf_counter()
+
+    res.put({'seconds': t1-t0, 'epochs': nep,
+             'peak_rss_kb': resource.getrusage(
+                 resource.RUSAGE_SELF).ru_maxrss})
+
+
+def run(fmt, path, prefix, week, nbulk, sink, res):
+    """ decode a log into sink ('file', 'mem' or 'null') and put the
+        results into queue res """
+    opt = rcvOpt()
+    opt.flg_rnxobs = True
+    dec = decoder(fmt, opt, prefix, week)
+    if sink == 'mem':
+        set_sinks(dec, lambda s, name: memSink(name))
+    elif sink == 'null':
+        set_sinks(dec, lambda s, name: nullSink(name))
+
+    t0 = time.perf_counter()
+    with open_mmap(path) as msg:
+        blks = []
+        for k, len_ in frames(dec, msg):
+            blk_num = st.unpack_from('<H', msg, k+4)[0] & 0x1fff
+            if nbulk > 0 and blk_num == 4027:
+                blks.append(k)
+                if len(blks) >= nbulk:
+                    dec.output_obs_bulk(msg, blks)
+                    blks = []
+            else:
+                dec.decode(msg[k:k+len_], len_)
+        if len(blks) > 0:
+            dec.output_obs_bulk(msg, blks)
+    dec.file_close()
+    t1 = time.perf_counter()
+
+    nep = 0
+    if sink == 'mem':
+        nep = len(dec.fh_rnxobs.obs)
+    elif sink == 'null':
+        nep = dec.fh_rnxobs.nrec
+    else:
+        with open(prefix+dec.file_rnxobs, 'r') as fh:
+            for line in fh:
+                if line.startswith('>'):
+                    nep += 1
+
+    res.put({'seconds': t1-t0, 'epochs': nep,
+             'peak_rss_kb': resource.getrusage(
+                 resource.RUSAGE_SELF).ru_maxrss})
+
+
+def bench(fmt, buff, tmp, args):
+    """ run the decoder of a format in a separate process """
+    path = os.path.join(tmp, fmt+'.log')
+    with open(path, 'wb') as fh:
+        fh.write(buff)
+
+    nbulk = args.bulk if fmt == 'sbf_bulk' else 0
+    ctx = mp.get_context('spawn')
+    res = ctx.Queue()
+    if fmt in ('jps_frames', 'jps_bytes'):
+        p = ctx.Process(target=run_scan, args=(fmt, path, args.week, res))
+    else:
+        p = ctx.Process(target=run, args=(fmt, path,
+                                          os.path.join(tmp, fmt+'_'),
+                                          args.week, nbulk, args.sink, res))
+    p.start()
+    r = res.get()
+    p.join()
+
+    mb = len(buff)/1e6
+    return {
+        'bytes': len(buff),
+        'epochs': r['epochs'],
+        'seconds': round(r['seconds'], 4),
+        'mb_per_s': round(mb/r['seconds'], 3),
+        'epochs_per_s': round(r['epochs']/r['seconds'], 2),
+        'peak_rss_mb': round(r['peak_rss_kb']/1024, 1),
+    }
+
+
+def main():
+
+    # Parse command line arguments
+    #
+    parser = argparse.ArgumentParser(
+        description="Receiver messages decoders benchmark")
+
+    parser.add_argument("-n", "--nsat", default=32, type=int,
+                        help="Number of satellites [1-97]")
+    parser.add_argument("-m", "--nsig", default=3, type=int,
+                        help="Number of signals per satellite [1-3]")
+    parser.add_argument("-r", "--rate", default=1.0, type=float,
+                        help="Observation rate in Hz")
+    parser.add_argument("-d", "--duration", default=600.0, type=float,
+                        help="Duration in s")
+    parser.add_argument("-f", "--formats", default=','.join(FORMATS),
+                        help="Comma-separated list of formats")
+    parser.add_argument("-b", "--bulk", default=100, type=int,
+                        help="MeasEpoch batch size for sbf_bulk")
+    parser.add_argument("--week", default=2380, type=int,
+                        help="GPS week of the synthetic logs")
+    parser.add_argument("-k", "--sink", default='file',
+                        choices=['file', 'mem', 'null'],
+                        help="Output of the decoders, 'null' for the decoding"
+                        " time only [file]")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output JSON file [default: stdout]")
+
+    # Retrieve all command line arguments
+    #
+    args = parser.parse_args()
+
+    nmax = sum(len(PRN_T[s]) for s in PRN_T)
+    if args.nsat < 1 or args.nsat > nmax:
+        parser.error("nsat must be in 1-{}".format(nmax))
+    if args.nsig < 1 or args.nsig > 3:
+        parser.error("nsig must be in 1-3")
+
+    fmts = args.formats.split(',')
+    for fmt in fmts:
+        if fmt not in FORMATS:
+            parser.error("unknown format {}".format(fmt))
+
+    sats = satellites(args.nsat)
+    nep = max(int(args.duration*args.rate), 1)
+    dt = 1.0/args.rate
+    tow = 86400.0
+
+    gen_t = {'sbf': gen_sbf, 'sbf_bulk': gen_sbf, 'ubx': gen_ubx,
+             'nov': gen_nov, 'jps': gen_jps, 'rtcm': gen_rtcm,
+             'jps_frames': gen_jps, 'jps_bytes': gen_jps}
+
+    res = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in fmts:
+            buff = gen_t[fmt](sats, args.nsig, args.week, tow, nep, dt)
+            res[fmt] = bench(fmt, bytes(buff), tmp, args)
+            print("{:10s} {:8.3f} MB/s {:10.2f} epochs/s"
+                  .format(fmt, res[fmt]['mb_per_s'],
+                          res[fmt]['epochs_per_s']), file=sys.stderr)
+
+    out = {
+        'cssrlib': version('cssrlib'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': {'nsat': args.nsat, 'nsig': args.nsig, 'rate': args.rate,
+                   'duration': args.duration, 'epochs': nep,
+                   'sink': args.sink},
+        'results': res,
+    }
+
+    if args.output is None:
+        print(json.dumps(out, indent=2))
+    else:
+        with open(args.output, 'w') as fh:
+            json.dump(out, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Checksums for receiver messages decoders
+
+All functions accept bytes-like objects (bytes, bytearray, memoryview)
+and do not copy the data except for padding in crc8().
+
+ [1] mosaic-X5 Reference Guide (SBF: CRC-16-CCITT, XModem)
+ [2] NovAtel OEM7 Commands and Logs Reference Manual (CRC-32)
+ [3] u-blox Interface Description (UBX: 8-bit Fletcher)
+ [4] GREIS: GNSS Receiver External Interface Specification (JPS)
+ [5] RTCM Standard 10403.4 Differential GNSS Services - Version 3 (CRC-24Q)
+
+"""
+
+from binascii import crc_hqx
+import numpy as np
+import zlib
+
+# rotate left by 2*n bits of 8-bit value
+ROTL2_T = [[((b << 2*n) | (b >> (8-2*n))) & 0xff for b in range(256)]
+           for n in range(4)]
+
+# CRC-24Q table: poly=0x1864cfb
+CRC24Q_T = []
+for _b in range(256):
+    _c = _b << 16
+    for _ in range(8):
+        _c = (_c << 1) ^ 0x1864cfb if _c & 0x800000 else _c << 1
+    CRC24Q_T.append(_c & 0xffffff)
+
+# weights n, n-1, ..., 1 for the second Fletcher sum
+_wfl = np.arange(65536+8, 0, -1, dtype=np.int64)
+
+
+def crc16(data):
+    """ CRC-16-CCITT (XModem): poly=0x1021, init=0 """
+    return crc_hqx(data, 0)
+
+
+def crc32(data):
+    """ NovAtel CRC-32: reflected poly=0xedb88320, init=0, no final xor """
+    return zlib.crc32(data, 0xffffffff) ^ 0xffffffff
+
+
+def fletcher8(data):
+    """ UBX 8-bit Fletcher checksum, returns (ck_a, ck_b) """
+    b = np.frombuffer(data, dtype=np.uint8)
+    cka = int(b.sum(dtype=np.int64)) & 0xff
+    ckb = int(np.dot(_wfl[len(_wfl)-len(b):], b)) & 0xff
+    return cka, ckb
+
+
+def crc8(data):
+    """ GREIS checksum: rotate left by 2 bits and xor per byte """
+    # byte i is rotated (n-i) times: xor the bytes of each 4-byte lane
+    # first, then rotate the lanes through the table
+    n = len(data)
+    b = bytes(data)+bytes(-n % 4)
+    w = int(np.bitwise_xor.reduce(np.frombuffer(b, dtype='<u4')))
+    res = 0
+    for j in range(4):
+        res ^= ROTL2_T[(n-j) % 4][(w >> (8*j)) & 0xff]
+    return res
+
+
+def crc24q(data):
+    """ RTCM 3 CRC-24Q: poly=0x1864cfb, init=0 """
+    crc = 0
+    for c in data:
+        crc = ((crc << 8) & 0xffffff) ^ CRC24Q_T[(crc >> 16) ^ c]
+    return crc
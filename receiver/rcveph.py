@@ -0,0 +1,145 @@
+"""
+Ephemeris change detection for receiver messages decoders
+
+The navigation messages are rebroadcast with the same ephemeris, e.g.
+every 30 s and on several signals. ephCache is attached to a decoder and
+wraps the navigation message decoders of dec.rn:
+
+  - a page of GPS/QZSS LNAV, Galileo I/NAV and F/NAV is not decoded if
+    its ephemeris bits are the same as in the last page of the satellite
+    and subframe/word type, the time fields are not compared
+  - a decoded ephemeris is dropped if it is the same as the last one of
+    the satellite, i.e. same toe, toc and IODE/IODC/IODnav
+
+so that the RINEX NAV output holds each ephemeris once. The number of
+skipped pages and dropped ephemerides is printed when the decoder output
+files are closed by file_close(). The cache is cleared at the end of the
+muted lead-in section of a chunk or time window (see rcvpar), as the
+ephemerides decoded there are not output.
+
+"""
+
+import bitstruct.c as bs
+
+from cssrlib.gnss import gtime_t
+
+# navigation message decoders of RawNav
+DEC_T = ('decode_gps_lnav', 'decode_gps_cnav', 'decode_gps_cnav2',
+         'decode_gal_inav', 'decode_gal_fnav', 'decode_bds_d1',
+         'decode_bds_d2', 'decode_bds_b1c', 'decode_bds_b2a',
+         'decode_bds_b2b', 'decode_irn_lnav', 'decode_irn_l1nav',
+         'decode_glo_fdma', 'decode_glo_l1oc', 'decode_glo_l3oc',
+         'decode_sbs_l1')
+
+# fields of an ephemeris compared for change detection
+EPH_T = ('mode', 'iode', 'iodc', 'iodn', 'toe', 'toc', 't0')
+
+
+def lnav_key(msg):
+    """ subframe id and words 3-10 of a GPS/QZSS LNAV subframe """
+    return bs.unpack_from('u3', msg, 53)[0], bytes(msg[8:40])
+
+
+def inav_key(msg):
+    """ word type and data of a Galileo I/NAV page, words 1-4 carry no
+        time fields """
+    sid = bs.unpack_from('u6', msg, 2)[0]
+    return sid, bs.unpack_from('r112p8r16', msg, 2)
+
+
+def fnav_key(msg):
+    """ page type and data of a Galileo F/NAV page """
+    return bs.unpack_from('u6', msg, 0)[0], bytes(msg[0:31])
+
+
+# page keys of the decoders, position of msg in the arguments
+MSG_T = {'decode_gps_lnav': (lnav_key, 3),
+         'decode_gal_inav': (inav_key, 4),
+         'decode_gal_fnav': (fnav_key, 4)}
+
+
+def eph_key(eph):
+    """ identity of an ephemeris """
+    key = [type(eph).__name__, eph.sat]
+    for a in EPH_T:
+        v = getattr(eph, a, None)
+        if isinstance(v, gtime_t):
+            v = (v.time, v.sec)
+        key.append(v)
+    return tuple(key)
+
+
+class ephCache():
+    """ class for the ephemeris change detection of a decoder """
+
+    def __init__(self, dec):
+        self.dec = dec
+        self.page = {}  # (decoder, sat, type): page data
+        self.eph = {}  # (type, sat, mode): ephemeris identity
+        self.nskip = 0  # pages not decoded
+        self.ndup = 0  # ephemerides dropped
+        self.neph = 0  # ephemerides output
+        self.attach()
+
+    def clear(self):
+        """ forget the pages and ephemerides seen so far """
+        self.page.clear()
+        self.eph.clear()
+
+    def new_page(self, name, sat, msg):
+        """ check if the ephemeris bits of a page have changed """
+        key_fn = MSG_T[name][0]
+        sid, data = key_fn(msg)
+        key = (name, sat, sid)
+        if self.page.get(key) == data:
+            self.nskip += 1
+            return False
+        self.page[key] = data
+        return True
+
+    def new_eph(self, eph):
+        """ check if an ephemeris has changed """
+        key = eph_key(eph)
+        k = key[:3]  # type, sat, mode
+        if self.eph.get(k) == key:
+            self.ndup += 1
+            return False
+        self.eph[k] = key
+        self.neph += 1
+        return True
+
+    def summary(self):
+        return "ephemeris cache: {:d} pages skipped, {:d} ephemerides "\
+            "dropped, {:d} output".format(self.nskip, self.ndup, self.neph)
+
+    def attach(self):
+        """ wrap the navigation message decoders of the decoder """
+        rn = self.dec.rn
+        for name in DEC_T:
+            fn = getattr(rn, name, None)
+            if fn is not None:
+                setattr(rn, name, self.wrap(name, fn))
+
+        file_close = self.dec.file_close
+
+        def file_close_():
+            file_close()
+            if self.dec.monlevel > 0:
+                print(self.summary())
+
+        self.dec.file_close = file_close_
+        self.dec.eph_cache = self
+
+    def wrap(self, name, fn):
+        pos = MSG_T[name][1] if name in MSG_T else None
+
+        def decode_(*args, **kwargs):
+            if pos is not None and \
+               not self.new_page(name, args[2], args[pos]):
+                return None
+            eph = fn(*args, **kwargs)
+            if eph is None or not self.new_eph(eph):
+                return None
+            return eph
+
+        return decode_
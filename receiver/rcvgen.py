@@ -0,0 +1,165 @@
+"""
+Observation epochs of raw receiver logs without RINEX
+
+obs_epochs() decodes a raw receiver log and yields the observation epochs
+as Obs, while the ephemerides decoded in between are added to a Nav. The
+positioning modules of cssrlib (pppos, ppprtkpos, rtkpos, stdpos) thus
+process a raw log directly, e.g.
+
+  opt = rcvOpt()
+  opt.flg_rnxobs = True
+  opt.flg_rnxnav = True
+  dec = sbf(opt, gnss_t='GE')
+  nav = Nav()
+  for obs in obs_epochs(dec, 'sep31230.sbf', nav, sigs):
+      ppp.process(obs, cs=cs)
+
+The RINEX encoder of the decoder is replaced by rnxCapture, which
+collects the epochs and ephemerides instead of writing the RINEX files,
+so that nothing is formatted or parsed in between. With sigs given, the
+observations are limited to these signals in the same layout as from
+rnxdec.decode_obs() after rnxdec.setSignals(sigs).
+
+"""
+
+from collections import deque
+import os
+import numpy as np
+
+from cssrlib.gnss import Obs, uTYP, sat2prn
+from cssrlib.rinex import rnxdec
+
+from rcvidx import time_window
+from rcvio import open_mmap
+from rcvpar import chunk_frames
+from rcvsink import copy_obs
+
+
+class rnxCapture():
+    """ class for the RINEX encoder of a decoder collecting the epochs and
+        ephemerides """
+
+    def __init__(self, dec, nav=None):
+        self.re = dec.re
+        self.nav = nav
+        self.obs = deque()
+
+        # the capture takes the place of the RINEX files, the files muted
+        # in the lead-in section of a time window are not collected
+        for s in ('rnxobs', 'rnxnav'):
+            fh = getattr(dec, 'fh_'+s)
+            if fh is not None:
+                fh.close()
+                os.remove(fh.name)
+                setattr(dec, 'fh_'+s, self)
+        dec.re = self
+
+    def __getattr__(self, name):
+        return getattr(self.re, name)
+
+    def close(self):
+        pass
+
+    def rnx_obs_header(self, ts=None, fh=None):
+        pass
+
+    def rnx_nav_header(self, fh=None):
+        pass
+
+    def rnx_obs_body(self, obs=None, fh=None):
+        if fh is self:
+            obs = copy_obs(obs)
+            obs.t = obs.time
+            self.obs.append(obs)
+
+    def rnx_nav_body(self, eph=None, fh=None):
+        if fh is self and self.nav is not None:
+            self.nav.eph.append(eph)
+
+    def rnx_gnav_body(self, geph=None, fh=None):
+        if fh is self and self.nav is not None:
+            self.nav.geph.append(geph)
+
+    def rnx_snav_body(self, seph=None, fh=None):
+        if fh is self and self.nav is not None:
+            self.nav.seph.append(seph)
+
+
+class sigSelect():
+    """ class for the selection of signals from the decoder observations """
+
+    def __init__(self, dec_tab, sigs):
+        rnx = rnxdec()
+        rnx.setSignals(sigs)
+        self.sig_tab = rnx.sig_tab
+        self.nsig = rnx.nsig
+
+        # column of each selected signal in the decoder observations
+        self.col = {}
+        for sys, tmp in self.sig_tab.items():
+            if sys not in dec_tab:
+                continue
+            self.col[sys] = {}
+            for typ, sig in tmp.items():
+                src = dec_tab[sys].get(typ, [])
+                self.col[sys][typ] = [src.index(s) if s in src else -1
+                                      for s in sig]
+
+    def select(self, obs):
+        """ observations limited to the selected signals """
+        sys = np.array([sat2prn(sat)[0] for sat in obs.sat])
+
+        v = Obs()
+        v.t = obs.t
+        v.time = obs.time
+        v.sig = self.sig_tab
+        row = np.flatnonzero(np.isin(sys, list(self.col)))
+        v.sat = obs.sat[row]
+        sys = sys[row]
+        nsat = len(v.sat)
+        v.P = np.zeros((nsat, self.nsig[uTYP.C]), dtype=np.float64)
+        v.L = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.float64)
+        v.D = np.zeros((nsat, self.nsig[uTYP.D]), dtype=np.float64)
+        v.S = np.zeros((nsat, self.nsig[uTYP.S]), dtype=np.float64)
+        v.lli = np.zeros((nsat, self.nsig[uTYP.L]), dtype=np.int32)
+
+        for s, tmp in self.col.items():
+            i = np.flatnonzero(sys == s)
+            for typ, col in tmp.items():
+                for j, c in enumerate(col):
+                    if c < 0:
+                        continue
+                    if typ == uTYP.C:
+                        v.P[i, j] = obs.P[row[i], c]
+                    elif typ == uTYP.L:
+                        v.L[i, j] = obs.L[row[i], c]
+                        v.lli[i, j] = obs.lli[row[i], c]
+                    elif typ == uTYP.D:
+                        v.D[i, j] = obs.D[row[i], c]
+                    elif typ == uTYP.S:
+                        v.S[i, j] = obs.S[row[i], c]
+        return v
+
+
+def obs_epochs(dec, path, nav=None, sigs=None, start=None, end=None):
+    """ generator of the observation epochs of a raw log as Obs, the
+        ephemerides are added to nav, the observations are limited to the
+        signals sigs and the time window [start, end] given as
+        'YYYY-MM-DDThh:mm:ss' """
+    cap = rnxCapture(dec, nav)
+    sel = None if sigs is None else sigSelect(dec.sig_tab, sigs)
+    rng = None
+    if start or end:
+        rng = time_window(dec, path, start, end)
+
+    with open_mmap(path) as buff:
+        for k, len_ in chunk_frames(dec, buff, rng):
+            dec.decode(buff[k:k+len_], len_)
+            while cap.obs:
+                obs = cap.obs.popleft()
+                yield obs if sel is None else sel.select(obs)
+
+    dec.file_close()  # output of a pending epoch
+    while cap.obs:
+        obs = cap.obs.popleft()
+        yield obs if sel is None else sel.select(obs)
@@ -0,0 +1,131 @@
+"""
+Byte-offset epoch index for raw receiver logs
+
+A raw log is scanned once and an index is stored next to it as
+<log>.idx. The index holds a row (time, mid, off) for the first frame of
+each message type of an epoch, where time is the GNSS time of the frame
+header in s since the GPS epoch, mid the message id and off the byte
+offset. The epoch time is read by msg_time(msg, k) of the decoder:
+
+  SBF  : TOW/WNc of the block header
+  UBX  : rcvTow/week of RXM-RAWX
+  NOV  : week/ms of the message header
+  JPS  : [GT], indexed at the offset of the preceding [~~]
+  RTCM : epoch time of MSM messages, week given by --weekref
+
+time_window() returns the byte range of a time window as (ks, k0, k1)
+for chunk_frames(), so that decoding starts right at the window. The
+lead-in section [ks, k0) restores the decoder state with muted output.
+epochs() returns the epoch times and byte ranges of a log, e.g. for the
+replay of a log at its real-time rate (see rcvlive, rcvntrip). The index
+is rebuilt when the log is newer than the index or, as the times of RTCM
+depend on it, when the reference week (weekref of the decoder) differs
+from that stored with the index.
+
+"""
+
+from datetime import datetime
+import os
+import numpy as np
+
+from cssrlib.gnss import epoch2time, time2gpst
+
+from rcvio import open_mmap
+from rcvscan import frames
+
+IDX_T = np.dtype([('time', '<f8'), ('mid', '<i4'), ('off', '<i8')])
+
+LEAD = 30.0  # lead-in section of the time window [s]
+
+
+def mid_int(mid):
+    """ message id as integer, two-character ids of JPS are packed """
+    if isinstance(mid, str):
+        return int.from_bytes(mid.encode(), 'big')
+    return mid
+
+
+def build(dec, buff):
+    """ build the index of the frames in buff """
+    rows = []
+    seen = set()
+    t_ = None
+    k_ep = None
+    epoch_mid = getattr(dec, 'epoch_mid', None)
+    for k, _ in frames(dec, buff, filt=False):
+        mid = dec.msg_id(buff, k)
+        if mid == epoch_mid:
+            k_ep = k
+            continue
+        t = dec.msg_time(buff, k)
+        if t is None:
+            continue
+        if t != t_:
+            seen.clear()
+            t_ = t
+        if mid not in seen:
+            seen.add(mid)
+            rows.append((t, mid_int(mid), k if k_ep is None else k_ep))
+        k_ep = None
+    return np.array(rows, dtype=IDX_T)
+
+
+def load(dec, path):
+    """ load the index of a log, the index is built if not up to date """
+    file = path+'.idx'
+    weekref = getattr(dec, 'weekref', -1)
+    if os.path.exists(file) and \
+       os.path.getmtime(file) >= os.path.getmtime(path):
+        with open(file, 'rb') as fh:
+            v = np.load(fh)
+            if 'weekref' in getattr(v, 'files', []) and \
+               v['weekref'] == weekref:
+                return v['idx']
+
+    with open_mmap(path) as buff:
+        idx = build(dec, buff)
+    with open(file, 'wb') as fh:
+        np.savez(fh, idx=idx, weekref=weekref)
+    return idx
+
+
+def parse_time(s):
+    """ GPS time 'YYYY-MM-DDThh:mm:ss' to s since the GPS epoch """
+    if s is None:
+        return None
+    t = datetime.fromisoformat(s)
+    week, tow = time2gpst(epoch2time([t.year, t.month, t.day, t.hour,
+                                      t.minute, t.second+t.microsecond*1e-6]))
+    return week*604800+tow
+
+
+def time_window(dec, path, start=None, end=None, lead=LEAD):
+    """ byte range (ks, k0, k1) of the time window [start, end] of a log,
+        start and end are given as 'YYYY-MM-DDThh:mm:ss' """
+    idx = load(dec, path)
+    n = os.path.getsize(path)
+    ts = parse_time(start)
+    te = parse_time(end)
+
+    # frames are in the order of the file, time can step back slightly
+    tmax = np.maximum.accumulate(idx['time'])
+    off = np.append(idx['off'], n)
+
+    k0 = 0 if ts is None else off[np.searchsorted(tmax, ts, 'left')]
+    ks = 0 if ts is None else off[np.searchsorted(tmax, ts-lead, 'left')]
+    k1 = n if te is None else off[np.searchsorted(tmax, te, 'right')]
+    return int(ks), int(k0), int(max(k1, k0))
+
+
+def epochs(dec, path, n):
+    """ time and byte range [off[i], off[i+1]) of the epochs of a log of n
+        bytes, the first epoch starts at the start of the log, a log
+        without epoch times (e.g. RTCM without MSM) is a single epoch """
+    idx = load(dec, path)
+    if len(idx) == 0:
+        return np.zeros(1), np.array([0, n])
+    tmax = np.maximum.accumulate(idx['time'])
+    i = np.flatnonzero(np.diff(tmax, prepend=-np.inf) > 0.0)
+    off = idx['off'][i]
+    off[0] = 0
+    return tmax[i], np.append(off, n)
@@ -0,0 +1,126 @@
+"""
+Input helpers for receiver messages decoders
+
+"""
+
+from contextlib import contextmanager
+import mmap
+import os
+import sys
+import time
+
+from rcvscan import frames
+
+
+@contextmanager
+def open_mmap(path):
+    """ map a raw receiver log read-only and return it as memoryview """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buff = memoryview(mm)
+        try:
+            yield buff
+        finally:
+            # slices still referenced by the caller keep the map alive
+            try:
+                buff.release()
+                mm.close()
+            except BufferError:
+                pass
+
+
+@contextmanager
+def open_stream(path):
+    """ open a raw receiver log for streaming, '-' is the standard input """
+    if path == '-':
+        yield sys.stdin.buffer
+        return
+    with open(path, 'rb') as f:
+        yield f
+
+
+class frameBuf():
+    """ class for the frames of a byte stream read in chunks
+
+    The chunks are read into a buffer of fixed size, a partial frame at the
+    end of a chunk is moved to the start of the buffer and completed by the
+    next chunk. The frames are memoryviews into the buffer and valid until
+    the next frame is requested. The buffer size must exceed the longest
+    frame of the decoder.
+    """
+
+    def __init__(self, dec, size=1 << 20):
+        self.dec = dec
+        self.buff = bytearray(size)
+        self.mv = memoryview(self.buff)
+        self.n = 0
+
+    def free(self):
+        """ free part of the buffer to read the next chunk into """
+        return self.mv[self.n:]
+
+    def frames(self, nr, eof=False):
+        """ yield (frame, length) of the frames completed by a chunk of nr
+            bytes read into free() """
+        mv = self.mv
+        n = self.n+nr
+        frm = frames(self.dec, mv, 0, n, eof)
+        while True:
+            try:
+                k, len_ = next(frm)
+            except StopIteration as e:
+                k = e.value
+                break
+            yield mv[k:k+len_], len_
+
+        # keep one byte before the partial frame for the look-behind
+        # of the JPS preamble
+        k = max(k-1, 0) if k < n else n
+        mv[:n-k] = mv[k:n]
+        self.n = n-k
+
+    def feed(self, data, eof=False):
+        """ yield (frame, length) of the frames completed by data, the
+            buffer is cleared if it is filled up without a frame """
+        k = 0
+        while True:
+            free = self.free()
+            if len(free) == 0:
+                self.n = 0
+                free = self.free()
+            nr = min(len(free), len(data)-k)
+            free[:nr] = data[k:k+nr]
+            k += nr
+            yield from self.frames(nr, eof and k >= len(data))
+            if k >= len(data):
+                break
+
+    def clear(self):
+        """ discard a partial frame, e.g. after a reconnection """
+        self.n = 0
+
+
+def stream_frames(dec, f, size=1 << 20, follow=0.0):
+    """ yield (frame, length) of the frames read from stream f, see
+        frameBuf. If follow > 0, the end of file is accepted after no
+        data has been appended for follow seconds (file still being
+        written).
+    """
+    buf = frameBuf(dec, size)
+    eof = False
+    t0 = time.monotonic()
+
+    while not eof:
+        nr = f.readinto1(buf.free())
+        if nr:
+            t0 = time.monotonic()
+        elif follow > 0 and time.monotonic()-t0 < follow:
+            time.sleep(min(follow, 0.2))
+            continue
+        else:
+            eof = True
+
+        yield from buf.frames(nr, eof)
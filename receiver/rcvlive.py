@@ -0,0 +1,293 @@
+"""
+Live input for receiver messages decoders
+
+The streams of receivers are read with asyncio and decoded by the
+decode(buff, len_) methods of the decoders as they arrive, several
+receivers in one process. The stream is given as URL:
+
+  tcp://host:port                 TCP client, e.g. receiver data port
+  unix:///path                    UNIX domain socket
+  serial:///dev/ttyACM0?baud=n    serial device (requires pyserial-asyncio)
+  ntrip://[user:pw@]host/MOUNT    mountpoint of an NTRIP caster, see rcvntrip
+
+The connection is opened again after a loss. The output files are
+flushed every second for a low latency of the RINEX and navigation
+message logs. A stream yields to the others after each read and data is
+not read ahead of decoding, so that a bursty stream neither starves the
+other streams nor fills the memory, the sender is held back by TCP flow
+control instead. The connections, bytes and frames of each stream are
+counted in linkStat. For tests, recorded logs are served by a replay
+server at real-time or accelerated rate, paced by the epoch times of the
+index of the log (see rcvidx), e.g.
+
+  python rcvlive.py --replay sbf sept1000.sbf tcp://127.0.0.1:28784 \\
+                    --speed 10 -r sbf tcp://127.0.0.1:28784 live_
+
+"""
+
+import argparse
+import asyncio
+import importlib
+import time
+from urllib.parse import urlparse, parse_qs
+
+from cssrlib.gnss import time2gpst, timeget, utc2gpst
+from cssrlib.rawnav import rcvOpt
+
+from rcveph import ephCache
+from rcvidx import epochs
+from rcvio import frameBuf, open_mmap
+from rcvntrip import open_ntrip, send_epochs
+from rcvpar import handles
+from rcvwrt import fileWriter
+
+# decoder module and class of the formats
+FMT_T = {'sbf': ('decode_sbf', 'sbf'), 'ubx': ('decode_ubx', 'ubx'),
+         'nov': ('decode_nov', 'nov'), 'jps': ('decode_jps', 'jps'),
+         'rtcm': ('decode_rtcm', 'rtcmDec')}
+
+# navigation message logs of the live decoders
+LOG_T = ('gpslnav', 'qzslnav', 'galinav', 'galfnav', 'gale6', 'qzsl6',
+         'bdsb2b', 'sbas')
+
+
+def decoder(fmt, prefix, gnss='GRECJ', week=None, out=True):
+    """ decoder instance of a format, week is the GPS week of RTCM, the
+        output files are opened if out is True """
+    mod, cls = FMT_T[fmt]
+    dec_t = getattr(importlib.import_module(mod), cls)
+
+    opt = rcvOpt()
+    opt.flg_rnxobs = out
+    opt.flg_rnxnav = out
+    if fmt != 'rtcm':
+        for s in LOG_T:
+            setattr(opt, 'flg_'+s, out)
+
+    dec = dec_t(opt, prefix=prefix, gnss_t=gnss)
+    dec.monlevel = 1
+    if fmt == 'rtcm':
+        if week is None:
+            week, _ = time2gpst(utc2gpst(timeget()))
+        dec.set_week(week)
+    return dec
+
+
+async def open_url(url):
+    """ open the stream of url, return (reader, writer) """
+    u = urlparse(url)
+    if u.scheme == 'tcp':
+        return await asyncio.open_connection(u.hostname, u.port)
+    if u.scheme == 'unix':
+        return await asyncio.open_unix_connection(u.path)
+    if u.scheme == 'serial':
+        import serial_asyncio
+        baud = int(parse_qs(u.query).get('baud', ['115200'])[0])
+        return await serial_asyncio.open_serial_connection(
+            url=u.path, baudrate=baud)
+    if u.scheme == 'ntrip':
+        return await open_ntrip(url)
+    raise ValueError("unknown stream {}".format(url_name(url)))
+
+
+def flush(dec):
+    """ flush the output files of a decoder """
+    for s in handles(dec):
+        getattr(dec, 'fh_'+s).flush()
+
+
+def url_name(url):
+    """ url without user and password, for the output and statistics """
+    u = urlparse(url)
+    if '@' not in u.netloc:
+        return url
+    return u._replace(netloc=u.netloc.rpartition('@')[2]).geturl()
+
+
+class linkStat():
+    """ class for the statistics of the stream of a decoder """
+
+    def __init__(self, url):
+        self.url = url_name(url)
+        self.nconn = 0   # connections
+        self.nfail = 0   # failed connection attempts
+        self.nbyte = 0   # bytes received
+        self.nframe = 0  # frames decoded
+        self.tconn = 0.0  # connected time [s]
+
+    def summary(self):
+        """ statistics as dict """
+        rate = self.nbyte/self.tconn if self.tconn > 0 else 0.0
+        return {'url': self.url, 'connections': self.nconn,
+                'failed': self.nfail, 'bytes': self.nbyte,
+                'frames': self.nframe, 'seconds': round(self.tconn, 3),
+                'bytes_per_s': round(rate, 1)}
+
+    def __str__(self):
+        r = self.summary()
+        return ("{url}: {connections} connections ({failed} failed), "
+                "{bytes} bytes, {frames} frames, {bytes_per_s:.1f} B/s"
+                .format(**r))
+
+
+async def decode_live(dec, url, size=1 << 16, retry=5.0, tflush=1.0):
+    """ decode the stream of url, the connection is opened again after
+        retry s, the stream ends at end of data if retry is 0, the
+        statistics are kept in dec.link (linkStat) """
+    buf = frameBuf(dec)
+    stat = linkStat(url)
+    name = stat.url
+    dec.link = stat
+    t0 = time.monotonic()
+    while True:
+        try:
+            reader, writer = await open_url(url)
+        except OSError as e:
+            if dec.monlevel > 0:
+                print("{}: {}".format(name, e))
+            stat.nfail += 1
+            reader = None
+
+        if reader is not None:
+            if dec.monlevel > 0:
+                print("{}: connected".format(name))
+            stat.nconn += 1
+            tc = time.monotonic()
+            try:
+                while True:
+                    data = await reader.read(size)
+                    if not data:
+                        break
+                    stat.nbyte += len(data)
+                    for msg, len_ in buf.feed(data):
+                        dec.decode(msg, len_)
+                        stat.nframe += 1
+                    if time.monotonic()-t0 >= tflush:
+                        flush(dec)
+                        t0 = time.monotonic()
+                    await asyncio.sleep(0)  # turn of the other streams
+            except OSError as e:
+                if dec.monlevel > 0:
+                    print("{}: {}".format(name, e))
+            finally:
+                stat.tconn += time.monotonic()-tc
+                writer.close()
+
+        if retry <= 0:
+            break
+        if dec.monlevel > 0:
+            print("{}: reconnecting in {:.1f} s".format(name, retry))
+        buf.clear()
+        await asyncio.sleep(retry)
+
+    for msg, len_ in buf.feed(b'', eof=True):
+        dec.decode(msg, len_)
+        stat.nframe += 1
+    if dec.monlevel > 0:
+        print(stat)
+
+
+async def replay(dec, path, url, speed=1.0):
+    """ serve the log path at url to each client, the epochs are sent at
+        speed times real time, at once if speed is 0 """
+    with open_mmap(path) as buff:
+        t, off = epochs(dec, path, len(buff))
+
+        async def client(reader, writer):
+            try:
+                await send_epochs(writer, buff, t, off, speed)
+            except ConnectionError:
+                pass
+            writer.close()
+
+        u = urlparse(url)
+        if u.scheme == 'tcp':
+            server = await asyncio.start_server(client, u.hostname, u.port)
+        elif u.scheme == 'unix':
+            server = await asyncio.start_unix_server(client, u.path)
+        else:
+            raise ValueError("unknown server {}".format(url))
+
+        async with server:
+            await server.serve_forever()
+
+
+async def run(args):
+    """ run the replay servers and the live decoders """
+    srv = []
+    for fmt, path, url in args.replay:
+        dec = decoder(fmt, '', args.gnss, args.weekref, out=False)
+        srv.append(asyncio.create_task(replay(dec, path, url, args.speed)))
+    await asyncio.sleep(0.1)  # servers listening
+
+    decs = []
+    for fmt, url, prefix in args.rcv:
+        dec = decoder(fmt, prefix, args.gnss, args.weekref)
+        if fmt != 'rtcm':
+            ephCache(dec)
+        if not args.sync:
+            fileWriter(dec)
+        decs.append((dec, url))
+
+    try:
+        if decs:
+            await asyncio.gather(*[decode_live(dec, url, retry=args.retry)
+                                   for dec, url in decs])
+        else:
+            await asyncio.gather(*srv)
+    finally:
+        for task in srv:
+            task.cancel()
+        for dec, _ in decs:
+            dec.file_close()
+
+
+def main():
+
+    # Parse command line arguments
+    #
+    parser = argparse.ArgumentParser(
+        description="Live input of receiver messages decoders")
+
+    parser.add_argument("-r", "--rcv", nargs=3, action='append', default=[],
+                        metavar=('FMT', 'URL', 'PREFIX'),
+                        help="Decode the stream at URL of a receiver, FMT is"
+                        " sbf, ubx, nov, jps or rtcm (repeatable)")
+    parser.add_argument("--replay", nargs=3, action='append', default=[],
+                        metavar=('FMT', 'FILE', 'URL'),
+                        help="Serve the recorded log FILE at URL"
+                        " (repeatable)")
+    parser.add_argument("--speed", default=1.0, type=float,
+                        help="Replay speed as multiple of real time"
+                        " [1.0, 0: no wait]")
+
+    parser.add_argument("-g", "--gnss", default='GRECJ',
+                        help="GNSS [GRECJ]")
+    parser.add_argument("--weekref", default=None, type=int,
+                        help="GPS week of RTCM streams [current week]")
+    parser.add_argument("--retry", default=5.0, type=float,
+                        help="Wait time before reconnecting in s"
+                        " [5.0, 0: stop at end of stream]")
+    parser.add_argument("--sync", action='store_true',
+                        help="Write the output files in the decoding thread")
+
+    # Retrieve all command line arguments
+    #
+    args = parser.parse_args()
+
+    for fmt, _, _ in args.rcv+args.replay:
+        if fmt not in FMT_T:
+            parser.error("unknown format {}".format(fmt))
+    if not args.rcv and not args.replay:
+        parser.error("no receiver or replay given")
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+# Call main function
+#
+if __name__ == "__main__":
+    main()
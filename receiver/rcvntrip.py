@@ -0,0 +1,216 @@
+"""
+NTRIP client and caster stand-in for RTCM 3 streams
+
+open_ntrip() requests a mountpoint of a caster over plain TCP and returns
+the stream as (reader, writer) of asyncio, see open_url() of rcvlive:
+
+  ntrip://[user:password@]host[:port]/MOUNT[?ver=1]
+
+NTRIP 2.0 (HTTP/1.1, chunked transfer encoding) is requested by default,
+NTRIP 1.0 (ICY 200 OK) with ver=1. The caster answers with the source
+table if the mountpoint is unknown, which is reported as ConnectionError
+like a refused login, so that the decoder tries again later.
+
+caster() is a minimal caster serving recorded RTCM 3 logs as mountpoints
+to NTRIP 1.0 and 2.0 clients for tests, paced by the epoch times of the
+index of the logs (see rcvidx), a log without epoch times (no MSM) is
+sent at once. send_epochs() waits for drain() of each epoch, so that a
+slow client holds back its own stream only.
+
+"""
+
+import asyncio
+from base64 import b64encode
+from urllib.parse import urlparse, parse_qs, unquote
+
+from rcvidx import epochs
+
+PORT = 2101  # default port of NTRIP casters
+
+AGENT = 'NTRIP cssrlib-data/1.0'
+
+
+def basic_auth(user, password):
+    """ value of the Authorization header for basic authentication """
+    s = '{}:{}'.format(user, password or '')
+    return 'Basic '+b64encode(s.encode()).decode()
+
+
+def request(u, ver=2):
+    """ request of the mountpoint of a parsed ntrip:// URL """
+    req = ['GET {} HTTP/1.{}'.format(u.path or '/', 1 if ver > 1 else 0),
+           'User-Agent: '+AGENT]
+    if ver > 1:
+        req += ['Host: {}:{}'.format(u.hostname, u.port or PORT),
+                'Ntrip-Version: Ntrip/2.0', 'Connection: close']
+    if u.username:
+        auth = basic_auth(unquote(u.username), unquote(u.password or ''))
+        req.append('Authorization: '+auth)
+    return ('\r\n'.join(req)+'\r\n\r\n').encode()
+
+
+class chunkReader():
+    """ reader of a stream in HTTP chunked transfer encoding """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.n = 0  # remaining bytes of the chunk
+        self.eof = False
+
+    async def read(self, n=-1):
+        """ read up to n bytes of the data, b'' at end of stream """
+        if self.eof:
+            return b''
+        try:
+            if self.n == 0:
+                size = await self.reader.readuntil(b'\r\n')
+                self.n = int(size.split(b';')[0], 16)
+                if self.n == 0:
+                    self.eof = True
+                    return b''
+            data = await self.reader.read(
+                self.n if n < 0 else min(n, self.n))
+            if not data:
+                self.eof = True
+                return b''
+            self.n -= len(data)
+            if self.n == 0:
+                await self.reader.readexactly(2)  # CRLF after the chunk
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            raise ConnectionError("invalid chunk: {}".format(e))
+        return data
+
+
+async def open_ntrip(url, ver=None):
+    """ request the mountpoint of url, return (reader, writer) of the
+        RTCM 3 stream """
+    u = urlparse(url)
+    if ver is None:
+        ver = int(parse_qs(u.query).get('ver', ['2'])[0])
+    reader, writer = await asyncio.open_connection(u.hostname,
+                                                   u.port or PORT)
+    try:
+        writer.write(request(u, ver))
+        await writer.drain()
+
+        status = (await reader.readuntil(b'\r\n')).decode(errors='replace')
+        if status.startswith('ICY 200'):  # NTRIP 1.0
+            return reader, writer
+        if not status.startswith(('HTTP/', 'SOURCETABLE')):
+            raise ConnectionError(status.strip())
+
+        hdr = {}
+        while True:
+            line = (await reader.readuntil(b'\r\n')).decode(errors='replace')
+            if line == '\r\n':
+                break
+            k, _, v = line.partition(':')
+            hdr[k.strip().lower()] = v.strip().lower()
+
+        if status.startswith('SOURCETABLE') or \
+                hdr.get('content-type') == 'gnss/sourcetable':
+            raise ConnectionError("mountpoint {} not found".format(u.path))
+        if status.split()[1:2] != ['200']:
+            raise ConnectionError(status.strip())
+        if hdr.get('transfer-encoding') == 'chunked':
+            reader = chunkReader(reader)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        writer.close()
+        raise ConnectionError("no response from {}".format(u.hostname))
+    except OSError:
+        writer.close()
+        raise
+    return reader, writer
+
+
+async def send_epochs(writer, buff, t, off, speed=1.0, chunked=False):
+    """ send the epochs buff[off[i]:off[i+1]] at their time t[i] at speed
+        times real time, at once if speed is 0, in chunked transfer encoding
+        if chunked """
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    for i in range(len(t)):
+        if speed > 0:
+            dt = (t[i]-t[0])/speed-(loop.time()-t0)
+            if dt > 0:
+                await asyncio.sleep(dt)
+        data = bytes(buff[off[i]:off[i+1]])
+        if not data:
+            continue
+        if chunked:
+            data = b'%x\r\n' % len(data)+data+b'\r\n'
+        writer.write(data)
+        await writer.drain()
+    if chunked:
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def source_table(mounts):
+    """ source table of the mountpoints """
+    s = ''.join('STR;{0};{0};RTCM 3;;2;GNSS;;;0.00;0.00;0;0;;none;N;N;0;\r\n'
+                .format(m) for m in mounts)
+    return s+'ENDSOURCETABLE\r\n'
+
+
+async def caster(mounts, host='127.0.0.1', port=PORT, speed=1.0,
+                 user=None):
+    """ serve the logs {mountpoint: (dec, path)} to NTRIP clients, user
+        is 'user:password' if a login is required, see send_epochs() for
+        speed """
+    log = {}
+    for m, (dec, path) in mounts.items():
+        with open(path, 'rb') as fh:
+            buff = fh.read()
+        log[m] = (buff,)+epochs(dec, path, len(buff))
+
+    auth = None if user is None else basic_auth(*user.split(':', 1))
+
+    async def client(reader, writer):
+        try:
+            req = (await reader.readuntil(b'\r\n\r\n')).decode(
+                errors='replace').split('\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError):
+            writer.close()
+            return
+        method, path = (req[0].split()+['', ''])[:2]
+        hdr = {}
+        for line in req[1:]:
+            k, _, v = line.partition(':')
+            hdr[k.strip().lower()] = v.strip()
+        v2 = hdr.get('ntrip-version', '').lower() == 'ntrip/2.0'
+        m = path.lstrip('/')
+
+        if method != 'GET' or m not in log:
+            s = source_table(log)
+            if v2:
+                writer.write(('HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0'
+                              '\r\nContent-Type: gnss/sourcetable\r\n'
+                              'Content-Length: {}\r\nConnection: close'
+                              '\r\n\r\n{}'.format(len(s), s)).encode())
+            else:
+                writer.write(('SOURCETABLE 200 OK\r\nContent-Type: text/plain'
+                              '\r\nContent-Length: {}\r\n\r\n{}'
+                              .format(len(s), s)).encode())
+        elif auth is not None and hdr.get('authorization') != auth:
+            writer.write(b'HTTP/1.1 401 Unauthorized\r\n\r\n' if v2 else
+                         b'ERROR - Bad Password\r\n')
+        else:
+            if v2:
+                writer.write(b'HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0'
+                             b'\r\nContent-Type: gnss/data\r\n'
+                             b'Transfer-Encoding: chunked\r\n'
+                             b'Connection: close\r\n\r\n')
+            else:
+                writer.write(b'ICY 200 OK\r\n')
+            buff, t, off = log[m]
+            try:
+                await send_epochs(writer, buff, t, off, speed, chunked=v2)
+            except ConnectionError:
+                pass
+        writer.close()
+
+    server = await asyncio.start_server(client, host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,81 @@
+"""
+Epoch assembler for receiver messages decoders
+
+The observations of an epoch are collected into preallocated arrays,
+one row per satellite. finalize() returns the epoch as Obs sorted by
+satellite number and clears the buffer for the next epoch.
+
+"""
+
+import numpy as np
+
+from cssrlib.gnss import Obs
+
+
+class rcvEpoch():
+    """ class for preallocated observation buffer of an epoch """
+
+    def __init__(self, nsig, nmax=96):
+        self.nsig = nsig
+        self.nmax = nmax
+        self.n = 0
+        self.row = {}
+
+        self.sat = np.zeros(nmax, dtype=np.int32)
+        self.P = np.zeros((nmax, nsig), dtype=np.float64)
+        self.L = np.zeros((nmax, nsig), dtype=np.float64)
+        self.D = np.zeros((nmax, nsig), dtype=np.float64)
+        self.S = np.zeros((nmax, nsig), dtype=np.float64)
+        self.lli = np.zeros((nmax, nsig), dtype=np.int32)
+
+    def grow(self):
+        """ double the number of satellite rows """
+        nmax = self.nmax*2
+        self.sat = np.resize(self.sat, nmax)
+        for v in ('P', 'L', 'D', 'S', 'lli'):
+            a = getattr(self, v)
+            b = np.zeros((nmax, self.nsig), dtype=a.dtype)
+            b[:self.n] = a[:self.n]
+            setattr(self, v, b)
+        self.nmax = nmax
+
+    def slot(self, sat):
+        """ row of satellite sat, a new row is assigned at first use """
+        i = self.row.get(sat)
+        if i is None:
+            if self.n >= self.nmax:
+                self.grow()
+            i = self.n
+            self.row[sat] = i
+            self.sat[i] = sat
+            self.n += 1
+        return i
+
+    def clear(self):
+        """ clear the buffer """
+        n = self.n
+        self.P[:n] = 0.0
+        self.L[:n] = 0.0
+        self.D[:n] = 0.0
+        self.S[:n] = 0.0
+        self.lli[:n] = 0
+        self.row.clear()
+        self.n = 0
+
+    def finalize(self, time, sig):
+        """ return the observations of the epoch sorted by satellite """
+        n = self.n
+        idx = np.argsort(self.sat[:n], kind='stable')
+
+        obs = Obs()
+        obs.time = time
+        obs.sig = sig
+        obs.sat = self.sat[idx]
+        obs.P = self.P[idx]
+        obs.L = self.L[idx]
+        obs.D = self.D[idx]
+        obs.S = self.S[idx]
+        obs.lli = self.lli[idx]
+
+        self.clear()
+        return obs
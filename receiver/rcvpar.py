@@ -0,0 +1,213 @@
+"""
+Intra-file parallel decoding for receiver messages decoders
+
+A raw receiver log is split into chunks at verified frame boundaries.
+Each chunk is decoded by a worker process into temporary output files.
+The worker starts a lead-in section before its chunk with the output
+muted, so that the decoder state crossing the chunk boundary (week/tow,
+ephemeris subframe assembly, partial epochs) is restored. The outputs of
+the chunks are merged by GNSS time:
+
+  rnx.obs    : epochs merged by epoch time, header of the first chunk
+  rnx.nav    : navigation records in chunk order, duplicates removed
+  *.txt      : navigation message logs merged by week and tow
+  stat.json  : per message statistics added up (see rcvstat)
+
+"""
+
+from heapq import merge
+import multiprocessing as mp
+import os
+import tempfile
+
+from rcvio import open_mmap
+from rcvscan import frames
+
+
+def next_frame(dec, buff, k):
+    """ offset of the first frame at or after k, of the first frame of an
+        epoch if the decoder has a message at the epoch start (epoch_mid,
+        e.g. [~~] of JPS), as the observation messages of the epoch refer
+        to the satellites of a preceding message """
+    epoch_mid = getattr(dec, 'epoch_mid', None)
+    for k_, _ in frames(dec, buff, k, filt=False):
+        if epoch_mid is None or dec.msg_id(buff, k_) == epoch_mid:
+            return k_
+    return len(buff)
+
+
+def split(dec, buff, nchunk, ovl=0):
+    """ split buff into chunks (ks, k0, k1) at verified frame boundaries,
+        ks is the start of the lead-in section of ovl bytes before k0 """
+    n = len(buff)
+    bnd = [0]
+    for i in range(1, nchunk):
+        k = next_frame(dec, buff, max(n*i//nchunk, bnd[-1]))
+        if k > bnd[-1] and k < n:
+            bnd.append(k)
+    bnd.append(n)
+
+    rng = []
+    for k0, k1 in zip(bnd[:-1], bnd[1:]):
+        ks = k0
+        if k0 > 0 and ovl > 0:
+            ks = min(next_frame(dec, buff, max(k0-ovl, 0)), k0)
+        rng.append((ks, k0, k1))
+    return rng
+
+
+def handles(dec):
+    """ names of the open output files of a decoder """
+    return [s[3:] for s in dir(dec)
+            if s.startswith('fh_') and getattr(dec, s) is not None]
+
+
+def mute(dec):
+    """ redirect the output files of a decoder to the null device """
+    fh = {}
+    null = open(os.devnull, 'w')
+    for s in handles(dec):
+        fh[s] = getattr(dec, 'fh_'+s)
+        setattr(dec, 'fh_'+s, null)
+    return fh
+
+
+def unmute(dec, fh):
+    """ restore the output files of a decoder """
+    null = None
+    for s in fh:
+        null = getattr(dec, 'fh_'+s)
+        setattr(dec, 'fh_'+s, fh[s])
+    if null is not None:
+        null.close()
+
+    # the chunk output starts with its own RINEX OBS header
+    if dec.re is not None:
+        dec.re.rnx_obs_header_sent = False
+
+    # an epoch pending from the lead-in section is not output
+    if hasattr(dec, 'drop_obs'):
+        dec.drop_obs()
+
+    # the ephemerides of the lead-in section are output again
+    if dec.re is not None:
+        dec.re.rec_eph = {}
+    if hasattr(dec, 'eph_cache'):
+        dec.eph_cache.clear()
+
+
+def chunk_frames(dec, buff, rng=None):
+    """ yield (offset, length) of the frames of a chunk, the frames in the
+        lead-in section are decoded with muted output """
+    if rng is None:
+        yield from frames(dec, buff)
+        return
+
+    ks, k0, k1 = rng
+    fh = mute(dec) if ks < k0 else None
+    for k, len_ in frames(dec, buff, ks, k1):
+        if fh is not None and k >= k0:
+            unmute(dec, fh)
+            fh = None
+        yield k, len_
+
+    if fh is not None:
+        unmute(dec, fh)
+
+
+def header(fh):
+    """ read the lines of a RINEX header """
+    hdr = []
+    for line in fh:
+        hdr.append(line)
+        if 'END OF HEADER' in line:
+            break
+    return hdr
+
+
+def records(fh):
+    """ yield (key, text) of RINEX records starting with '>' """
+    rec = []
+    for line in fh:
+        if line.startswith('>') and len(rec) > 0:
+            yield rec[0][2:29], ''.join(rec)
+            rec = []
+        rec.append(line)
+    if len(rec) > 0:
+        yield rec[0][2:29], ''.join(rec)
+
+
+def logkey(line):
+    """ sort key (week, tow) of a navigation message log line """
+    v = line.split(maxsplit=2)
+    return int(v[0]), float(v[1])
+
+
+def merge_obs(fo, files):
+    """ merge RINEX OBS epochs by epoch time """
+    fh = [open(f, 'r') for f in files]
+    hdr = [header(f) for f in fh]
+    hdr = next((h for h in hdr if len(h) > 0), [])
+    fo.writelines(hdr)
+
+    key_ = None
+    for key, rec in merge(*[records(f) for f in fh], key=lambda r: r[0]):
+        if key != key_:
+            fo.write(rec)
+        key_ = key
+
+    for f in fh:
+        f.close()
+
+
+def merge_nav(fo, files):
+    """ concatenate RINEX NAV records and remove duplicates """
+    rec_ = set()
+    for file in files:
+        with open(file, 'r') as f:
+            header(f)
+            for _, rec in records(f):
+                if rec not in rec_:
+                    fo.write(rec)
+                    rec_.add(rec)
+
+
+def merge_log(fo, files):
+    """ merge navigation message logs by week and tow """
+    fh = [open(f, 'r') for f in files]
+    fo.writelines(merge(*fh, key=logkey))
+    for f in fh:
+        f.close()
+
+
+def decode_chunks(decode, dec, f, opt, args):
+    """ decode file f in chunks using a pool of worker processes,
+        decode(f, opt, args, rng, prefix) decodes a single chunk,
+        the merged output is written into the files of decoder dec """
+    with open_mmap(f) as buff:
+        rng = split(dec, buff, args.chunks, args.overlap*1024)
+
+    bdir = os.path.dirname(f)
+    with tempfile.TemporaryDirectory(dir=bdir if bdir else None) as tmp:
+        prefix = [os.path.join(tmp, "{:03d}_".format(i))
+                  for i in range(len(rng))]
+
+        with mp.Pool(processes=args.jobs) as pool:
+            pool.starmap(decode, [(f, opt, args, rng[i], prefix[i])
+                                  for i in range(len(rng))])
+
+        for s in handles(dec):
+            fo = getattr(dec, 'fh_'+s)
+            files = [p+getattr(dec, 'file_'+s) for p in prefix]
+            if s == 'rnxobs':
+                merge_obs(fo, files)
+            elif s == 'rnxnav':
+                merge_nav(fo, files)
+            else:
+                merge_log(fo, files)
+
+        # per message statistics of the workers
+        stat = getattr(dec, 'stat', None)
+        if stat is not None:
+            for p in prefix:
+                stat.merge(p+'stat.json')
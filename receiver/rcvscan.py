@@ -0,0 +1,107 @@
+"""
+Frame scanner for receiver messages decoders
+
+The decoder class provides the frame layout:
+
+  preamble   : regular expression (bytes) matching the frame start
+  sync_len   : number of bytes required to read the message length
+  crc_len    : number of checksum bytes following the message
+  msg_len()  : message length from the frame header
+  check_crc(): checksum verification of the frame
+  msg_skip() : (optional) True for a message id not needed for the
+               enabled output
+  frame_sep  : (optional) regular expression (bytes) matching the bytes
+               between two frames, e.g. CR/LF of JPS
+
+Frames of skipped message ids are passed over by their length without
+verifying the checksum if the next frame starts right after them, i.e.
+right after the separator if given.
+Otherwise the checksum is verified as usual, so that a false preamble
+does not hide the following frames.
+
+"""
+
+import re
+
+_pattern = {}
+_sep = {}
+
+
+def preamble(dec):
+    """ compiled preamble pattern of a decoder class """
+    key = type(dec)
+    if key not in _pattern:
+        _pattern[key] = re.compile(dec.preamble)
+    return _pattern[key]
+
+
+def separator(dec):
+    """ compiled frame separator pattern of a decoder class, or None """
+    key = type(dec)
+    if key not in _sep:
+        sep = getattr(dec, 'frame_sep', None)
+        _sep[key] = None if sep is None else re.compile(sep)
+    return _sep[key]
+
+
+def frames(dec, buff, k=0, maxlen=None, eof=True, filt=True):
+    """ yield (offset, length) of the checksum-verified frames in buff
+        and return the offset where the scan stopped. if eof is False,
+        more data follows buff and the scan stops at an incomplete frame.
+        if filt is False, the frames skipped by msg_skip() are included
+    """
+    pat = preamble(dec)
+    sep = separator(dec)
+    if maxlen is None:
+        maxlen = len(buff)
+    skip = getattr(dec, 'msg_skip', None) if filt else None
+
+    while True:
+        m = pat.search(buff, k, maxlen)
+        if m is None:
+            # a preamble may be split at the end of buff
+            return k if eof else max(k, maxlen-dec.sync_len)
+        k = m.start()
+        if k+dec.sync_len > maxlen:
+            return k
+
+        len_ = dec.msg_len(buff, k)
+        if not eof and len_ >= dec.sync_len and \
+                k+len_+dec.crc_len > maxlen:
+            return k
+        if len_ < dec.sync_len or k+len_+dec.crc_len > maxlen:
+            k += 1
+            continue
+
+        if skip is not None and skip(dec.msg_id(buff, k)):
+            # pass over the frame if the next frame follows
+            k1 = k2 = k+len_+dec.crc_len
+            if sep is not None:
+                k2 = sep.match(buff, k1, maxlen).end()
+            if (eof and k2 >= maxlen-2) or pat.match(buff, k2, maxlen) or \
+                    dec.check_crc(buff, k):
+                k = k1
+            else:
+                k += 1
+            continue
+
+        if not dec.check_crc(buff, k):
+            k += 1
+            continue
+
+        yield k, len_
+        k += len_+dec.crc_len
+
+
+def msg_set(dec, mid_t):
+    """ message ids of mid_t {mid: rcvOpt flags} needed for the enabled
+        output, i.e. any of the flags is set or no flags are given """
+    return {mid for mid, flags in mid_t.items()
+            if not flags or any(enabled(dec, f) for f in flags)}
+
+
+def enabled(dec, flag):
+    """ output of an rcvOpt flag is enabled, the flag of a log of pages
+        (e.g. flg_gale6) also if taps are registered for the pages (see
+        rcvtap) """
+    return getattr(dec, flag) or flag[4:] in getattr(dec, 'tap_t', {})
@@ -0,0 +1,220 @@
+"""
+Output sinks for receiver messages decoders
+
+The outputs of a decoder (fh_*) are text files opened by init_param() of
+rcvDec. set_sinks() replaces them by sinks:
+
+  fileSink  : text file written in blocks of nbuf characters
+  memSink   : in-memory store, the navigation messages as NumPy records
+              (see rcvarc) and the RINEX epochs and ephemerides as objects
+  queueSink : records put in batches onto a multiprocessing queue
+  nullSink  : records counted and discarded, e.g. for decoding benchmarks
+
+A sink takes text by write() and may take records instead:
+
+  put_nav(week, tow, prn, type_, blen, msg) : message of a navigation
+                                              log, see write_nav() of rcvwrt
+  put_rnx(name, args)                       : call of the RINEX encoder,
+                                              e.g. ('rnx_obs_body', (obs,))
+
+The RINEX encoder of the decoder is replaced by rnxSink, so that the text
+is formatted only for the sinks taking text. The arrays of an epoch may be
+views into a buffer of the decoder reused for the next epoch (rtcmDec),
+sinks keeping the epoch store a copy by copy_obs(), e.g.
+
+  dec = ubx(opt, prefix=prefix)
+  set_sinks(dec, lambda s, name: memSink(name))
+  ...
+  dec.file_close()
+  v = dec.fh_galinav.nav()  # records as from load_nav() of samples/navlog
+  obs = dec.fh_rnxobs.obs   # epochs as Obs
+
+"""
+
+import copy
+import os
+
+from rcvarc import navArc
+from rcvpar import handles
+
+
+def copy_obs(obs):
+    """ epoch with the arrays copied which are views into a buffer of the
+        decoder """
+    obs_ = copy.copy(obs)
+    for s in ('P', 'L', 'S', 'D', 'lli', 'sat'):
+        v = getattr(obs, s, None)
+        if getattr(v, 'base', None) is not None:
+            setattr(obs_, s, v.copy())
+    return obs_
+
+
+class rnxSink():
+    """ RINEX encoder of a decoder passing the records to the sinks taking
+        records """
+
+    def __init__(self, re):
+        self.__dict__['re'] = re
+
+    def __getattr__(self, name):
+        return getattr(self.re, name)
+
+    def __setattr__(self, name, v):
+        setattr(self.re, name, v)
+
+    def put(self, name, args, fh):
+        put_rnx = getattr(fh, 'put_rnx', None)
+        if put_rnx is not None:
+            put_rnx(name, args)
+        else:
+            getattr(self.re, name)(*args, fh=fh)
+
+    def rnx_nav_header(self, fh=None):
+        self.put('rnx_nav_header', (), fh)
+
+    def rnx_obs_header(self, ts=None, fh=None):
+        self.put('rnx_obs_header', (ts,), fh)
+
+    def rnx_obs_body(self, obs=None, fh=None):
+        self.put('rnx_obs_body', (obs,), fh)
+
+    def rnx_nav_body(self, eph=None, fh=None):
+        self.put('rnx_nav_body', (eph,), fh)
+
+    def rnx_gnav_body(self, geph=None, fh=None):
+        self.put('rnx_gnav_body', (geph,), fh)
+
+    def rnx_snav_body(self, seph=None, fh=None):
+        self.put('rnx_snav_body', (seph,), fh)
+
+
+class fileSink():
+    """ text file written in blocks of nbuf characters """
+
+    def __init__(self, name, nbuf=1 << 20):
+        self.name = name
+        self.nbuf = nbuf
+        self.buf = []
+        self.n = 0
+        self.fh = open(name, 'w')
+
+    def write(self, s):
+        self.buf.append(s)
+        self.n += len(s)
+        if self.n >= self.nbuf:
+            self.flush()
+
+    def writelines(self, lines):
+        for s in lines:
+            self.write(s)
+
+    def flush(self):
+        if self.buf:
+            self.fh.write(''.join(self.buf))
+            self.buf = []
+            self.n = 0
+        self.fh.flush()
+
+    def close(self):
+        self.flush()
+        self.fh.close()
+
+
+class memSink(navArc):
+    """ in-memory store of the records of an output """
+
+    def __init__(self, name=None):
+        super().__init__(name)
+        self.obs = []  # epochs as Obs
+        self.eph = []  # ephemerides as Eph, Geph, Seph
+
+    def put_rnx(self, name, args):
+        if name == 'rnx_obs_body':
+            self.obs.append(copy_obs(args[0]))
+        elif name in ('rnx_nav_body', 'rnx_gnav_body', 'rnx_snav_body'):
+            self.eph.append(args[0])
+
+    def nav(self):
+        """ navigation messages as array of records, see rcvarc """
+        return self.array()
+
+    def close(self):
+        pass
+
+
+class queueSink():
+    """ records of an output put onto queue q as (key, [(kind, v), ...])
+        in batches of nbatch, kind is 'nav', 'text' or the name of the
+        RINEX encoder method, (key, None) marks the end of the output """
+
+    def __init__(self, q, key=None, nbatch=256):
+        self.q = q
+        self.key = key
+        self.name = key
+        self.nbatch = nbatch
+        self.rec = []
+
+    def put(self, kind, v):
+        self.rec.append((kind, v))
+        if len(self.rec) >= self.nbatch:
+            self.flush()
+
+    def write(self, s):
+        self.put('text', s)
+
+    def put_nav(self, week, tow, prn, type_, blen, msg):
+        self.put('nav', (week, tow, prn, type_, blen, bytes(msg)))
+
+    def put_rnx(self, name, args):
+        if name == 'rnx_obs_body':
+            args = (copy_obs(args[0]),)
+        self.put(name, args)
+
+    def flush(self):
+        if self.rec:
+            self.q.put((self.key, self.rec))
+            self.rec = []
+
+    def close(self):
+        self.flush()
+        self.q.put((self.key, None))
+
+
+class nullSink():
+    """ records counted and discarded """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.nrec = 0  # messages and RINEX records other than headers
+
+    def write(self, s):
+        pass
+
+    def put_nav(self, week, tow, prn, type_, blen, msg):
+        self.nrec += 1
+
+    def put_rnx(self, name, args):
+        if not name.endswith('header'):
+            self.nrec += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def set_sinks(dec, sink):
+    """ replace the output files of a decoder by sink(s, name), where s is
+        the output, e.g. 'rnxobs' or 'galinav', and name the file name """
+    for s in handles(dec):
+        fh = getattr(dec, 'fh_'+s)
+        name = fh.name
+        fh.close()
+        os.remove(name)
+        setattr(dec, 'fh_'+s, sink(s, name))
+
+    if dec.re is not None:
+        dec.re = rnxSink(dec.re)
+        if getattr(dec, 'fh_rnxnav', None) is not None:
+            dec.re.rnx_nav_header(dec.fh_rnxnav)
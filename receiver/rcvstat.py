@@ -0,0 +1,121 @@
+"""
+Per message statistics for receiver messages decoders
+
+rcvStat is attached to a decoder instance and records for each message
+id the number of messages, the number of bytes and the cumulative
+decoding time. The message id is taken from the fixed header of a frame by
+msg_id(msg, k) of the decoder. The checksum failures are counted under the
+single id 'crc/unknown', as the header of a frame failing the checksum,
+e.g. at a false preamble, gives no valid message id.
+
+The statistics are returned by summary() and written as JSON when the
+decoder output files are closed by file_close(). With intra-file parallel
+decoding the frames of the lead-in sections are counted twice.
+
+"""
+
+import json
+import time
+
+CRC_KEY = 'crc/unknown'  # id of the checksum failures
+
+
+class rcvStat():
+    """ class for per message statistics of a decoder """
+
+    def __init__(self, dec, file=None):
+        self.dec = dec
+        self.file = file
+        self.stat = {}  # id: [count, bytes, time, crc errors]
+        self.attach()
+
+    def entry(self, mid):
+        s = self.stat.get(mid)
+        if s is None:
+            s = self.stat[mid] = [0, 0, 0.0, 0]
+        return s
+
+    def add(self, mid, nbyte, dt, n=1):
+        s = self.entry(mid)
+        s[0] += n
+        s[1] += nbyte
+        s[2] += dt
+
+    def crc_error(self):
+        self.entry(CRC_KEY)[3] += 1
+
+    def attach(self):
+        """ wrap the decoding methods of the decoder """
+        dec = self.dec
+        decode = dec.decode
+        check_crc = dec.check_crc
+        file_close = dec.file_close
+        msg_id = dec.msg_id
+        crc_len = dec.crc_len
+
+        def decode_(buff, len_, *args, **kwargs):
+            mid = msg_id(buff, 0)
+            t0 = time.perf_counter()
+            ret = decode(buff, len_, *args, **kwargs)
+            self.add(mid, len_+crc_len, time.perf_counter()-t0)
+            return ret
+
+        def check_crc_(msg, k):
+            if check_crc(msg, k):
+                return True
+            self.crc_error()
+            return False
+
+        def file_close_():
+            file_close()
+            if self.file is not None:
+                with open(self.file, 'w') as fh:
+                    json.dump(self.summary(), fh, indent=2)
+
+        dec.decode = decode_
+        dec.check_crc = check_crc_
+        dec.file_close = file_close_
+        dec.stat = self
+
+        # MeasEpoch blocks decoded in bulk (SBF)
+        if hasattr(dec, 'output_obs_bulk'):
+            output_obs_bulk = dec.output_obs_bulk
+
+            def output_obs_bulk_(buff, blks):
+                t0 = time.perf_counter()
+                ret = output_obs_bulk(buff, blks)
+                dt = time.perf_counter()-t0
+                nbyte = sum(dec.msg_len(buff, k) for k in blks)
+                self.add(msg_id(buff, blks[0]), nbyte, dt, len(blks))
+                return ret
+
+            dec.output_obs_bulk = output_obs_bulk_
+
+    def key(self, mid):
+        """ message id as string """
+        if hasattr(self.dec, 'msg_name') and not isinstance(mid, str):
+            return self.dec.msg_name(mid)
+        return str(mid)
+
+    def summary(self):
+        """ statistics per message id, sorted by decoding time """
+        res = {}
+        for mid, s in sorted(self.stat.items(), key=lambda v: -v[1][2]):
+            res[self.key(mid)] = {
+                'count': s[0],
+                'bytes': s[1],
+                'time': s[2],
+                'crc_errors': s[3],
+            }
+        return res
+
+    def merge(self, file):
+        """ add the statistics of a JSON file written by file_close() """
+        with open(file, 'r') as fh:
+            res = json.load(fh)
+        for mid, s in res.items():
+            v = self.entry(mid)
+            v[0] += s['count']
+            v[1] += s['bytes']
+            v[2] += s['time']
+            v[3] += s['crc_errors']
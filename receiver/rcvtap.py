@@ -0,0 +1,106 @@
+"""
+Taps of correction messages for receiver messages decoders
+
+The pages of the correction services are passed from a decoder to the
+registered taps as bytes right when they are decoded, in the same form as
+in the navigation message logs:
+
+  gale6  : Galileo HAS pages (E6-B)           -> hasTap
+  qzsl6  : QZSS L6 messages (MADOCA-PPP/CLAS)  -> l6Tap
+  bdsb2b : BDS PPP-B2b messages                -> b2bTap
+
+A tap is a callable tap(week, tow, prn, type_, msg) registered for the
+pages of a decoder by add_tap(dec, s, tap). The taps above forward the
+pages to the SSR decoders of cssrlib, e.g.
+
+  cs = cssr_has()
+  cnav = cnav_msg()
+  cnav.load_gmat(file_gm)
+  add_tap(sbfdec, 'gale6', hasTap(cs, cnav))
+
+The messages of the pages are decoded for the taps also if the log of the
+pages (e.g. flg_gale6) is disabled, the log is written only if it is
+enabled. Taps are called in the decoding process, i.e. not with
+intra-file parallel decoding.
+
+"""
+
+from binascii import hexlify
+
+from rcvscan import msg_set
+
+
+def add_tap(dec, s, tap):
+    """ register tap(week, tow, prn, type_, msg) for the pages s, the
+        messages of the pages are decoded from then on """
+    if not hasattr(dec, 'tap_t'):
+        dec.tap_t = {}
+    dec.tap_t.setdefault(s, []).append(tap)
+    if hasattr(dec, 'init_handler'):
+        dec.init_handler()
+    elif hasattr(dec, 'mid_t'):
+        dec.mid_use = msg_set(dec, dec.mid_t)
+
+
+def tap_page(dec, s, week, tow, prn, type_, msg):
+    """ pass a page to the taps registered for s """
+    tap_t = getattr(dec, 'tap_t', None)
+    if not tap_t or s not in tap_t:
+        return
+    for tap in tap_t[s]:
+        tap(week, tow, prn, type_, msg)
+
+
+class hasTap():
+    """ tap of Galileo HAS pages into cnav_msg and cssr_has """
+
+    def __init__(self, cs, cnav, prn=None):
+        self.cs = cs
+        self.cnav = cnav
+        self.prn = prn
+
+    def __call__(self, week, tow, prn, type_, msg):
+        if self.prn is not None and prn != self.prn:
+            return
+        self.cs.week = week
+        self.cs.tow0 = tow//3600*3600
+        # decode_cnav() expects the records of the text log
+        HASmsg = self.cnav.decode_cnav(tow, [{'nav': hexlify(msg)}])
+        if HASmsg is not None:
+            self.cs.msgtype = self.cnav.msgtype
+            self.cs.decode_cssr(HASmsg)
+
+
+class l6Tap():
+    """ tap of QZSS L6 messages into cssr_mdc or cssr (CLAS) """
+
+    def __init__(self, cs, prn=None, ch=None):
+        self.cs = cs
+        self.prn = prn
+        self.ch = ch
+
+    def __call__(self, week, tow, prn, type_, msg):
+        if self.prn is not None and prn != self.prn:
+            return
+        if self.ch is not None and type_ != self.ch:
+            return
+        self.cs.week = week
+        self.cs.tow0 = tow//3600*3600
+        self.cs.decode_l6msg(msg, 0)
+        if self.cs.fcnt == 5:  # end of sub-frame
+            self.cs.decode_cssr(bytes(self.cs.buff), 0)
+
+
+class b2bTap():
+    """ tap of BDS PPP-B2b messages into cssr_bds """
+
+    def __init__(self, cs, prn=None):
+        self.cs = cs
+        self.prn = prn
+
+    def __call__(self, week, tow, prn, type_, msg):
+        if self.prn is not None and prn != self.prn:
+            return
+        self.cs.week = week
+        self.cs.tow0 = tow//86400*86400
+        self.cs.decode_cssr(msg, 0)
@@ -0,0 +1,218 @@
+"""
+Background writer for the output files of receiver messages decoders
+
+fileWriter takes the place of the output files (fh_*) and of the RINEX
+encoder (re) of a decoder. Instead of formatting text, the decoder puts
+compact records onto a queue:
+
+  nav  : week, tow, prn, type, len and message bytes of a navigation
+         message log line, see write_nav()
+  rnx  : observation epoch, ephemeris or header for the RINEX encoder
+  text : text formatted by the decoder, e.g. by output_sbas()
+
+A writer thread takes the records from the queue in batches, formats
+them (hexlify() of whole messages, RINEX epochs and ephemerides) and
+writes the text of a batch with a single write() per file, so that
+decoding and formatting/output overlap, e.g.
+
+  dec = sbf(opt, prefix=prefix)
+  fileWriter(dec)
+  ...
+  dec.file_close()  # writes the pending records and stops the thread
+
+An error in the writer thread, e.g. a full disk, is kept and raised again
+by file_close() once the pending records are written.
+
+The RINEX records for other files than those of the decoder, i.e. the
+muted output of the lead-in section of a chunk (see rcvpar), are
+formatted to keep the state of the encoder and discarded.
+
+"""
+
+from binascii import hexlify
+import queue
+import threading
+
+from rcvpar import handles
+from rcvsink import copy_obs, rnxSink
+
+# record types
+NAV, TXT, RNX, SET, FLUSH, CLOSE, STOP = range(7)
+
+
+def nav_line(week, tow, prn, type_, blen, msg):
+    """ line of a navigation message log """
+    return "{:4d}\t{:6d}\t{:3d}\t{:1d}\t{:3d}\t{:s}\n".\
+        format(week, tow, prn, type_, blen, hexlify(msg).decode())
+
+
+def write_nav(fh, week, tow, prn, type_, blen, msg):
+    """ write a message to a navigation message log, the record is passed
+        as is if fh takes records (fileWriter, navArc, sinks of rcvsink) """
+    put_nav = getattr(fh, 'put_nav', None)
+    if put_nav is not None:
+        put_nav(week, tow, prn, type_, blen, msg)
+    else:
+        fh.write(nav_line(week, tow, prn, type_, blen, msg))
+
+
+class textBuf(list):
+    """ text of a file collected in a batch """
+
+    def write(self, s):
+        self.append(s)
+
+    def flush(self):
+        pass
+
+
+class queuedFile():
+    """ output file of a decoder written by the writer thread """
+
+    def __init__(self, wrt, fh):
+        self.wrt = wrt
+        self.fh = fh
+        self.name = getattr(fh, 'name', None)
+
+    def write(self, s):
+        self.wrt.put(TXT, self.fh, s)
+
+    def writelines(self, lines):
+        self.wrt.put(TXT, self.fh, ''.join(lines))
+
+    def put_nav(self, week, tow, prn, type_, blen, msg):
+        # the message is copied, buffers of the decoder are reused
+        self.wrt.put(NAV, self.fh, (week, tow, prn, type_, blen,
+                                    bytes(msg)))
+
+    def flush(self):
+        self.wrt.put(FLUSH, self.fh, None)
+
+    def close(self):
+        self.wrt.put(CLOSE, self.fh, None)
+
+
+class rnxQueue(rnxSink):
+    """ RINEX encoder of a decoder, the records are formatted by the
+        writer thread """
+
+    def __init__(self, wrt, re):
+        self.__dict__['wrt'] = wrt
+        self.__dict__['re'] = re
+
+    def __setattr__(self, name, v):
+        # applied to the encoder in order with the queued records
+        self.wrt.put(SET, None, (name, v))
+
+    def put(self, name, args, fh):
+        fh = fh.fh if isinstance(fh, queuedFile) else None
+        if name == 'rnx_obs_body':
+            # the epoch is copied, buffers of the decoder are reused
+            args = (copy_obs(args[0]),)
+        self.wrt.put(RNX, fh, (name, args))
+
+
+class fileWriter():
+    """ class for the background writer of the output files of a decoder,
+        nbatch records are formatted at once, the queue holds up to nq
+        records """
+
+    def __init__(self, dec, nbatch=4096, nq=65536):
+        self.dec = dec
+        self.re = dec.re
+        self.nbatch = nbatch
+        self.q = queue.Queue(maxsize=nq)
+        self.err = None
+        self.attach()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, kind, fh, v):
+        self.q.put((kind, fh, v))
+
+    def attach(self):
+        """ replace the output files and the RINEX encoder of the decoder """
+        dec = self.dec
+        for s in handles(dec):
+            setattr(dec, 'fh_'+s, queuedFile(self, getattr(dec, 'fh_'+s)))
+        if self.re is not None:
+            dec.re = rnxQueue(self, self.re)
+
+        file_close = dec.file_close
+
+        def file_close_():
+            file_close()
+            self.stop()
+
+        dec.file_close = file_close_
+
+    def stop(self):
+        """ write the pending records and stop the writer thread, the first
+            error in the thread is raised """
+        self.put(STOP, None, None)
+        self.thread.join()
+        if self.err is not None:
+            raise self.err
+
+    def run(self):
+        stop = False
+        while not stop:
+            rec = [self.q.get()]
+            while len(rec) < self.nbatch:
+                try:
+                    rec.append(self.q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self.write(rec)
+
+    def write(self, rec):
+        """ format a batch of records and write the text of each file """
+        buf = {}
+        stop = False
+        for kind, fh, v in rec:
+            try:
+                if kind == STOP:
+                    stop = True
+                elif kind == SET:
+                    setattr(self.re, *v)
+                elif kind == FLUSH:
+                    self.flush(fh, buf.pop(fh, None))
+                    fh.flush()
+                elif kind == CLOSE:
+                    self.flush(fh, buf.pop(fh, None))
+                    fh.close()
+                elif kind == RNX and hasattr(fh, 'put_rnx'):  # sink
+                    self.flush(fh, buf.pop(fh, None))
+                    fh.put_rnx(*v)
+                elif kind == RNX:
+                    name, args = v
+                    b = textBuf() if fh is None else buf.setdefault(
+                        fh, textBuf())
+                    getattr(self.re, name)(*args, fh=b)
+                elif hasattr(fh, 'put_nav'):  # sink taking records
+                    self.flush(fh, buf.pop(fh, None))
+                    if kind == NAV:
+                        fh.put_nav(*v)
+                    else:
+                        fh.write(v)
+                elif kind == NAV:
+                    buf.setdefault(fh, textBuf()).append(nav_line(*v))
+                else:
+                    buf.setdefault(fh, textBuf()).append(v)
+            except Exception as e:
+                if self.err is None:
+                    self.err = e
+
+        for fh, b in buf.items():
+            try:
+                self.flush(fh, b)
+            except Exception as e:
+                if self.err is None:
+                    self.err = e
+        return stop
+
+    def flush(self, fh, b):
+        """ write the text collected for a file """
+        if b:
+            fh.write(''.join(b))
@@ -0,0 +1,187 @@
+"""
+Loader for navigation message logs of the receiver decoders
+
+A log is given by the name of its text log (*.txt) with a message per
+line as week, tow, prn, type, len and the message as hex string. If the
+binary archive (*.npy) written by the decoders with --npy or converted by
+receiver/rcvarc.py is found next to it, the archive is loaded without
+parsing. A text log is parsed by np.loadtxt() and stored as archive, which
+serves as cache for the next runs as long as size and mtime of the text
+log given in <archive>.key are unchanged. The records have the fields
+
+  wn, tow, prn, type, len : fields of the text log
+  nav                     : message bytes, zero padded to the width
+
+The message of a record vn is bytes(vn['nav']). The record types and the
+line parser of the logs are those of receiver/rcvarc.py.
+
+"""
+
+from binascii import hexlify
+import numpy as np
+import os
+import sys
+
+from cssrlib.gnss import time2gpst
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '../receiver'))
+
+from rcvarc import nav_dtype, read_lines, time_index  # noqa: E402
+from rcvarc import join_nav  # noqa: E402, F401 (used by ssr2sp3)
+
+
+def read_text(file):
+    """ read a text log into records: wn tow prn type len hex, or
+        wn tow prn type : hex (SBAS) """
+    with open(file, 'rb') as fh:
+        maxlen = max(map(len, fh.read().splitlines()), default=1)
+    dtype = [('wn', '<i4'), ('tow', '<f8'), ('prn', '<i4'), ('type', '<i4'),
+             ('len', 'S8'), ('nav', 'S{}'.format(maxlen))]
+    try:
+        d = np.loadtxt(file, dtype=dtype, ndmin=1)
+        nav = hex2bin(d['nav'])
+    except ValueError:  # incomplete or malformed lines
+        return read_lines(file)
+
+    v = np.zeros(len(d), dtype=nav_dtype(max(nav.shape[1], 1)))
+    for s in ('wn', 'tow', 'prn', 'type'):
+        v[s] = d[s]
+    sbas = d['len'] == b':'
+    v['len'][sbas] = np.char.str_len(d['nav'][sbas])//2
+    v['len'][~sbas] = d['len'][~sbas].astype(int)
+    v['nav'][:, :nav.shape[1]] = nav
+    return v
+
+
+HEX = np.full(256, 255, dtype='u1')
+for k, c in enumerate('0123456789abcdef'):
+    HEX[ord(c)] = HEX[ord(c.upper())] = k
+
+
+def hex2bin(h):
+    """ convert hex strings into a zero padded byte array """
+    a = np.ascontiguousarray(h).view('u1').reshape(len(h), -1)
+    n = np.count_nonzero(a, axis=1)
+    width = (int(n.max(initial=0))+1)//2
+    a = np.pad(a, ((0, 0), (0, max(2*width-a.shape[1], 0))))[:, :2*width]
+    b = HEX[a]
+    b[a == 0] = 0
+    if np.any(b == 255) or np.any(n % 2):
+        raise ValueError('invalid hex string')
+    return (b[:, 0::2] << 4) | b[:, 1::2]
+
+
+def load_nav(file, ts=None, te=None):
+    """ load the records of a navigation message log, the records are
+        limited to the time window [ts, te) given as gtime_t """
+    arc = file.removesuffix('.txt')+'.npy'
+    if os.path.exists(file) and cache_key(file) != read_key(arc):
+        v = read_text(file)
+        idx = time_index(v)
+        write_cache(file, arc, v, idx)
+    else:
+        v = np.load(arc, mmap_mode='r')
+        idx = np.load(arc+'.idx') if os.path.exists(arc+'.idx') else None
+
+    if ts is None and te is None:
+        return v
+
+    if idx is None:
+        idx = time_index(v)
+    # records are in the order of the log, time can step back slightly
+    tmax = np.maximum.accumulate(idx['time'])
+    row = np.append(idx['row'], len(v))
+    k0 = 0 if ts is None else \
+        row[np.searchsorted(tmax, gpst_sec(ts), 'left')]
+    k1 = len(v) if te is None else \
+        row[np.searchsorted(tmax, gpst_sec(te), 'left')]
+    return v[k0:k1]
+
+
+class navFeed():
+    """ messages of a log grouped by epoch (tow), the messages of an epoch
+        are sorted by prn and type and returned as slice of the records """
+
+    def __init__(self, v, prn=None, type_=None):
+        """ prn and type_ limit the messages to a value or list of values """
+        v = select(v, prn, type_)
+        keys = [v[s] for s in ('type', 'prn') if s in v.dtype.names]
+        self.v = v[np.lexsort(keys+[v['tow']])]
+        self.tow, k = np.unique(self.v['tow'], return_index=True)
+        self.k = np.append(k, len(self.v))
+        self.i = 0  # next epoch for sequential access
+
+    def __len__(self):
+        return len(self.tow)
+
+    def __iter__(self):
+        for i, tow in enumerate(self.tow):
+            yield tow, self.v[self.k[i]:self.k[i+1]]
+
+    def get(self, tow, prn=None, type_=None):
+        """ messages of the epoch tow, optionally limited by prn and type_ """
+        i = self.i
+        if i >= len(self.tow) or self.tow[i] != tow:
+            i = np.searchsorted(self.tow, tow)
+            if i >= len(self.tow) or self.tow[i] != tow:
+                return self.v[0:0]
+        self.i = i+1
+        return select(self.v[self.k[i]:self.k[i+1]], prn, type_)
+
+
+def select(v, prn=None, type_=None):
+    """ records limited to prn and type_ given as value or list of values """
+    if prn is not None:
+        v = v[np.isin(v['prn'], prn)]
+    if type_ is not None:
+        v = v[np.isin(v['type'], type_)]
+    return v
+
+
+def cache_key(file):
+    """ key of a text log for the archive cache: size and mtime [ns] """
+    st = os.stat(file)
+    return '{} {}'.format(st.st_size, st.st_mtime_ns)
+
+
+def read_key(arc):
+    """ key of the text log an archive was cached from, or None """
+    try:
+        with open(arc+'.key', 'r') as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def write_cache(file, arc, v, idx):
+    """ store the records of a text log as archive, the cache is skipped
+        if it cannot be written """
+    try:
+        with open(arc, 'wb') as fh:
+            np.save(fh, v)
+        with open(arc+'.idx', 'wb') as fh:
+            np.save(fh, idx)
+        with open(arc+'.key', 'w') as fh:
+            fh.write(cache_key(file)+'\n')
+    except OSError:
+        pass
+
+
+def gpst_sec(t):
+    """ gtime_t to s since the GPS epoch """
+    week, tow = time2gpst(t)
+    return week*604800+tow
+
+
+def hexnav(v):
+    """ copy of records with the message as hex string, for functions
+        expecting the text log records, e.g. cnav_msg.decode_cnav() """
+    width = v.dtype['nav'].shape[0]
+    dtype = [('wn', '<i4'), ('tow', '<f8'), ('prn', '<i4'), ('type', '<i4'),
+             ('len', '<i4'), ('nav', 'S{}'.format(2*width))]
+    h = np.zeros(len(v), dtype=dtype)
+    for s in ('wn', 'tow', 'prn', 'type', 'len'):
+        h[s] = v[s]
+    h['nav'] = [hexlify(bytes(nav)) for nav in v['nav']]
+    return h
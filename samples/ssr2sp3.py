@@ -2,7 +2,6 @@
 SSR correction conversion to SP3 file format
 """
 
-from binascii import unhexlify
 import bitstruct as bs
 from copy import deepcopy
 from itertools import chain
@@ -26,6 +25,7 @@ from cssrlib.cssr_has import cssr_has, cnav_msg
 from cssrlib.cssr_mdc import cssr_mdc
 from cssrlib.cssr_pvs import cssr_pvs
 from cssrlib.rinex import rnxdec
+from navlog import load_nav, join_nav, hexnav
 
 
 def time2bsxstr(t):
@@ -143,9 +143,6 @@ if "qzsl6" in ssrfiles[0]:
     name = 'QZS0OPSMDC'
     step = 10
 
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S500')]
-
     prn_ref = 199  # QZSS PRN
     l6_ch = 1  # 0:L6D, 1:L6E
     atxfile = baseDirName+'../data/antex/igs20.atx'
@@ -155,9 +152,6 @@ elif "gale6" in ssrfiles[0]:
     name = 'ESA0OPSHAS'
     step = 10
 
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-
     if time > epoch2time([2025, 5, 15, 17, 18, 0]):
         atxfile = baseDirName+'../data/antex/igs20.atx'
     else:
@@ -168,9 +162,6 @@ elif "bdsb2b" in ssrfiles[0]:
     name = 'BDS0OPSPPP'
     step = 10
 
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-
     prn_ref = 59  # satellite PRN to receive BDS PPP correction
     atxfile = baseDirName+'../data/antex/igs20.atx'
 
@@ -179,9 +170,6 @@ elif "sbas" in ssrfiles[0]:
     name = 'PVS0OPSPPP'
     step = 32
 
-    dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-             ('type', 'int'), ('marker', 'S2'), ('nav', 'S124')]
-
     prn_ref = 122  # satellite PRN to receive PVS PPP correction
     atxfile = baseDirName+'../data/antex/igs20.atx'
 
@@ -256,9 +244,9 @@ cs.monlevel = 0
 
 # Load SSR corrections
 #
-v = np.array([], dtype=dtype)
-for ssrfile in ssrfiles:
-    v = np.append(v, np.genfromtxt(ssrfile, dtype=dtype))
+v = join_nav([load_nav(ssrfile) for ssrfile in ssrfiles])
+if cs.cssrmode == sc.GAL_HAS_SIS:
+    v = hexnav(v)  # decode_cnav() expects the message as hex string
 
 # Load ANTEX data for satellites and stations
 #
@@ -322,7 +310,7 @@ for vi in v:
         cs.week = week
         cs.tow0 = tow//3600*3600
 
-        msg = unhexlify(vi['nav'])
+        msg = bytes(vi['nav'])
         cs.decode_l6msg(msg, 0)
 
         if cs.fcnt == 5:  # end of sub-frame
@@ -339,7 +327,7 @@ for vi in v:
         cs.week = week
         cs.tow0 = tow//86400*86400
 
-        buff = unhexlify(vi['nav'])
+        buff = bytes(vi['nav'])
         cs.decode_cssr(buff, 0)
 
         hasNew = (tow % step == 0) and (cs.lc[0].cstat & 0xf) == 0xf
@@ -353,7 +341,7 @@ for vi in v:
         cs.tow0 = tow//86400*86400
         cs.time0 = time
 
-        buff = unhexlify(vi['nav'])
+        buff = bytes(vi['nav'])
         cs.decode_cssr(buff, 0)
         if (cs.lc[0].cstat & 0x6) != 0x6:
             continue
@@ -6,31 +6,26 @@ Interface Control Document Precise Point Positioning Service Signal PPP-B2b
 (Version 1.0) , July 2020
 
 """
-from binascii import unhexlify
-import numpy as np
 
 from cssrlib.cssr_bds import cssr_bds
+from navlog import load_nav, navFeed
 
 # receiver log
 file_has = '../data/bdsb2b.txt'
 
-dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-         ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-
-v = np.genfromtxt(file_has, dtype=dtype)
+v = load_nav(file_has)
 
 i = 0
-tow = np.unique(v['tow'])
+feed = navFeed(v)
 
 dec = cssr_bds()
 dec.monlevel = 2
 
 prn_a = 60
 
-for i, t in enumerate(tow):
-    vi = v[v['tow'] == t]
+for t, vi in feed:
     for vn in vi:
         prn = int(vn['prn'])
-        buff = unhexlify(vn['nav'])
+        buff = bytes(vn['nav'])
         if prn == prn_a:
             dec.decode_cssr(buff, 0)
@@ -1,7 +1,6 @@
 """
  static test for DGPS (QZSS SLAS)
 """
-from binascii import unhexlify
 from copy import deepcopy
 import matplotlib.pyplot as plt
 import matplotlib.dates as md
@@ -17,6 +16,7 @@ from cssrlib.peph import atxdec, searchpcv
 from cssrlib.pntpos import stdpos
 from cssrlib.dgps import dgpsDec
 from cssrlib.rinex import rnxdec
+from navlog import load_nav, navFeed
 
 
 # Select test case
@@ -179,9 +179,7 @@ if rnx.decode_obsh(obsfile) >= 0:
     while time > obs.t and obs.t.time != 0:
         obs = rnx.decode_obs()
 
-    dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-    v = np.genfromtxt(file_sbas, dtype=dtype)
+    feed = navFeed(load_nav(file_sbas), prn=prn_ref, type_=sbas_type)
 
     # Loop over number of epoch from file start
     #
@@ -200,10 +198,9 @@ if rnx.decode_obsh(obsfile) >= 0:
             t0.time = t0.time//30*30
             nav.time_p = t0
 
-        vi = v[(v['tow'] == tow) & (v['prn'] == prn_ref)
-               & (v['type'] == sbas_type)]
+        vi = feed.get(tow)
         if len(vi) > 0:
-            buff = unhexlify(vi['nav'][0])
+            buff = bytes(vi['nav'][0])
             cs.decode_cssr(buff, 0)
 
         # cs.check_validity(obs.t)
@@ -1,11 +1,11 @@
 """
 Emergency Warning Satellite Service (EWSS) sample
 """
-from binascii import unhexlify
 import numpy as np
 import bitstruct as bs
 from cssrlib.gnss import time2doy, epoch2time, gpst2time
 from cssrlib.ewss import jmaDec, camfDec
+from navlog import load_nav, navFeed
 import cartopy.crs as ccrs
 import cartopy.io.img_tiles as cimgt
 import matplotlib.pyplot as plt
@@ -49,22 +49,21 @@ params = []
 
 if True:
     if 'sbas' in file_sbas:  # SIS
-        dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-                 ('type', 'int'), ('marker', 'S2'), ('nav', 'S124')]
-        v = np.genfromtxt(file_sbas, dtype=dtype)
+        v = load_nav(file_sbas)
 
-    tow = np.unique(v['tow'])
+    feed = navFeed(v)
+    tow = feed.tow
     # Loop over number of epoch from file start
     #
     for ne in range(nep):
-        vi = v[(v['tow'] == tow[ne]) & (v['prn'] == prn_ref)]
+        vi = feed.get(tow[ne], prn=prn_ref)
 
         vi_dcr = vi[vi['type'] == 43]  # DCR
 
         if flg_dcr and len(vi_dcr) > 0:
             for vi_ in vi_dcr:
                 cs.time = gpst2time(vi_['wn'], vi_['tow'])
-                buff = unhexlify(vi_['nav'])
+                buff = bytes(vi_['nav'])
                 cs.decode(buff, 14)
                 print(cs.gen_msg(cs.dc))
 
@@ -77,7 +76,7 @@ if True:
         if flg_dcx and len(vi_dcx) > 0:
             for vi_ in vi_dcx:
                 csx.time = gpst2time(vi_['wn'], vi_['tow'])
-                buff = unhexlify(vi_['nav'])
+                buff = bytes(vi_['nav'])
 
                 sdmt, sdm = bs.unpack_from('u1u9', buff, 14)
                 # print(f"sdmt={sdmt} sdm={sdm:0b}")
@@ -9,6 +9,7 @@ import bitstruct as bs
 from binascii import unhexlify
 
 from cssrlib.cssr_has import cssr_has, cnav_msg
+from navlog import load_nav, navFeed
 
 # receiver log
 dataset = 0
@@ -16,9 +17,7 @@ dataset = 0
 if dataset == 0:
 
     file_has = '../data/gale6.txt'
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-    v = np.genfromtxt(file_has, dtype=dtype)
+    v = load_nav(file_has)
 
 else:
 
@@ -34,7 +33,7 @@ else:
         v[i]['nav'] = (b''.join(nav.split()))
 
 i = 0
-tow = np.unique(v['tow'])
+feed = navFeed(v)
 
 
 mid_ = -1
@@ -51,11 +50,10 @@ dec.monlevel = 2
 cnav = cnav_msg()
 cnav.load_gmat(file_gm)
 
-for i, t in enumerate(tow):
-    vi = v[v['tow'] == t]
+for t, vi in feed:
     for vn in vi:
         prn = (vn['prn'])
-        buff = unhexlify(vn['nav'])
+        buff = bytes(vn['nav']) if dataset == 0 else unhexlify(vn['nav'])
 
         i = 14
         if bs.unpack_from('u24', buff, i)[0] == 0xaf3bc3:
@@ -0,0 +1,57 @@
+"""
+ test of the epoch access to navigation message logs by navFeed of navlog
+
+ The messages of the epochs of a B2b and an SBAS log are read by get()
+ and by iteration, with and without prn and type filters. They must be
+ the messages selected from the log by the time of week, sorted by prn
+ and type.
+"""
+
+import numpy as np
+
+from navlog import navFeed, read_text
+
+files = [('../data/bdsb2b.txt', [59, 60], 6),
+         ('../data/doy2023-308/308c_sbas.txt', [128, 137], 1)]
+nmax = 6000
+
+
+def ref_epoch(v, tow, prn=None, type_=None):
+    """ messages of an epoch selected from the log """
+    vi = v[v['tow'] == tow]
+    if prn is not None:
+        vi = vi[np.isin(vi['prn'], prn)]
+    if type_ is not None:
+        vi = vi[np.isin(vi['type'], type_)]
+    return vi[np.lexsort([vi['type'], vi['prn']])]
+
+
+for file, prn, type_ in files:
+    v = read_text(file)[:nmax]
+    tow_ = np.unique(v['tow'])
+
+    for prn_, type__ in ((None, None), (prn, type_)):
+        feed = navFeed(v, prn=prn_, type_=type__)
+        ref = {tow: ref_epoch(v, tow, prn_, type__) for tow in tow_}
+        ref = {tow: vi for tow, vi in ref.items() if len(vi) > 0}
+
+        # iteration
+        assert len(feed) == len(ref)
+        for tow, vi in feed:
+            assert np.array_equal(vi, ref[tow]), tow
+
+        # sequential access by get(), the epochs missing in the log
+        # between them give no messages
+        feed = navFeed(v, prn=prn_, type_=type__)
+        for tow in np.arange(tow_[0], tow_[-1]+1.0):
+            vi = feed.get(tow)
+            assert np.array_equal(vi, ref.get(tow, v[0:0])), tow
+
+        # random access by get() with the filters applied per epoch
+        for tow in tow_[::-7]:
+            vi = feed.get(tow, prn=prn, type_=type_)
+            assert np.array_equal(vi, ref_epoch(v, tow, prn, type_)), tow
+
+        print("{:s} prn={} type={}: {:d} epochs, {:d} messages: ok".format(
+            file, prn_, type__, len(feed), sum(len(vi) for vi in
+                                               ref.values())))
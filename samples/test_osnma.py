@@ -18,8 +18,8 @@ import os
 import numpy as np
 import cssrlib.osnma as om
 from sys import exit as sys_exit
-from binascii import unhexlify
 import matplotlib.pyplot as plt
+from navlog import load_nav, navFeed
 
 tofst = -2  # time offset to synchronize tow
 mt_file = 'OSNMA_MerkleTree_20240115100000_newPKID_1.xml'
@@ -37,19 +37,12 @@ session = 'h'
 
 file_galinav = f'../data/doy{year}-{doy:03d}/{doy:03d}{session}_galinav.txt'
 
-dtype_ = [('tow', 'i8'), ('wn', 'i8'), ('prn', 'i8'),
-          ('mt', 'i8'), ('k', 'i8'), ('nma', 'S10'),
-          ('wt', 'i8'), ('nav', 'S32')]
-
-dtype_ = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-          ('type', 'int'), ('len', 'int'), ('nav', 'S512')]
-
-v = np.genfromtxt(file_galinav, dtype=dtype_)
+v = load_nav(file_galinav)
 
 i = 0
 
-v = v[v['type'] == 0]  # E1 only
-tow = np.unique(v['tow'])
+feed = navFeed(v, type_=0)  # E1 only
+tow = feed.tow
 ntow = len(tow)
 nsat = np.zeros((ntow, 3), dtype=int)
 vstatus = np.zeros(ntow, dtype=int)
@@ -60,12 +53,12 @@ vstatus = np.zeros(ntow, dtype=int)
 nep = 1799
 
 for i, t in enumerate(tow[0:nep]):
-    vi = v[v['tow'] == t]
+    vi = feed.get(t)
     for vn in vi:
         tow_ = int(vn['tow'])+tofst
         prn = int(vn['prn'])
         nma.prn_a = prn
-        msg = unhexlify(vn['nav'])  # I/NAV (120bit+120bit)
+        msg = bytes(vn['nav'])  # I/NAV (120bit+120bit)
         nav, nma_b = nma.load_gal_inav(msg)
         nma.save_gal_inav(nav, prn, tow_)
         if nma_b[0] != 0:  # for connected satellite
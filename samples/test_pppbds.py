@@ -1,7 +1,6 @@
 """
  static test for PPP (BeiDou PPP)
 """
-from binascii import unhexlify
 from copy import deepcopy
 import matplotlib.pyplot as plt
 import numpy as np
@@ -18,6 +17,7 @@ from cssrlib.cssr_bds import cssr_bds
 from cssrlib.pppssr import pppos
 from cssrlib.rinex import rnxdec
 from cssrlib.plot import plot_enu
+from navlog import load_nav, navFeed
 
 # Select test case
 #
@@ -60,12 +60,10 @@ doy = int(time2doy(time))
 
 nep = 900*4
 
-dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-         ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-v = np.genfromtxt(file_bds, dtype=dtype)
-
 prn_ref = 59  # satellite PRN to receive BDS PPP collection
 
+feed = navFeed(load_nav(file_bds), prn=prn_ref)
+
 pos_ref = ecef2pos(xyz_ref)
 
 # Define signals to be processed
@@ -211,9 +209,9 @@ if rnx.decode_obsh(obsfile) >= 0:
             t0.time = t0.time//30*30
             nav.time_p = t0
 
-        vi = v[(v['tow'] == tow) & (v['prn'] == prn_ref)]
+        vi = feed.get(tow)
         if len(vi) > 0:
-            buff = unhexlify(vi['nav'][0])
+            buff = bytes(vi['nav'][0])
             # prn, rev = bs.unpack_from('u6u6', buff, 0)
             cs.decode_cssr(buff, 0)
 
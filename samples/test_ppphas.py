@@ -18,6 +18,7 @@ from cssrlib.cssr_has import cssr_has, cnav_msg
 from cssrlib.pppssr import pppos
 from cssrlib.rinex import rnxdec
 from cssrlib.plot import plot_enu
+from navlog import load_nav, hexnav, navFeed
 
 
 # Select test case
@@ -83,9 +84,9 @@ if fromSbfConvert:
 
 else:
 
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S124')]
-    v = np.genfromtxt(file_has, dtype=dtype)
+    v = load_nav(file_has)
+
+feed = navFeed(v)
 
 # Define signals to be processed
 #
@@ -244,7 +245,9 @@ if rnx.decode_obsh(obsfile) >= 0:
             t0.time = t0.time//30*30
             nav.time_p = t0
 
-        vi = v[v['tow'] == tow]
+        vi = feed.get(tow)
+        if not fromSbfConvert:
+            vi = hexnav(vi)
 
         HASmsg = cnav.decode_cnav(tow, vi)  # decode CNAV pages
         if HASmsg is not None:
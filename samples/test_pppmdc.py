@@ -1,7 +1,6 @@
 """
  static test for PPP (MADOCA PPP)
 """
-from binascii import unhexlify
 from copy import deepcopy
 import matplotlib.pyplot as plt
 import numpy as np
@@ -16,6 +15,7 @@ from cssrlib.cssr_mdc import cssr_mdc
 from cssrlib.pppssr import pppos
 from cssrlib.rinex import rnxdec
 from cssrlib.plot import plot_enu
+from navlog import load_nav, navFeed
 
 # Select test case
 #
@@ -70,9 +70,7 @@ if l6_mode == 1:
         print("ERROR: cannot open L6 message file {}!".format(file_l6))
         sys_exit(-1)
 else:
-    dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-             ('type', 'int'), ('len', 'int'), ('nav', 'S500')]
-    v = np.genfromtxt(file_l6, dtype=dtype)
+    feed = navFeed(load_nav(file_l6))
 
 prn_ref = 199  # QZSS PRN
 l6_ch = 1  # 0:L6D, 1:L6E
@@ -269,11 +267,11 @@ if rnx.decode_obsh(obsfile) >= 0:
                 cs.week = week
                 cs.decode_cssr(cs.buff, 0)
         else:  # multi-channel mode
-            vi_ = v[v['tow'] == tow]
+            vi_ = feed.get(tow)
 
             vi = vi_[(vi_['type'] == l6_ch) & (vi_['prn'] == prn_ref)]
             if len(vi) > 0:
-                cs.decode_l6msg(unhexlify(vi['nav'][0]), 0)
+                cs.decode_l6msg(bytes(vi['nav'][0]), 0)
                 if cs.fcnt == 5:  # end of sub-frame
                     cs.decode_cssr(bytes(cs.buff), 0)
 
@@ -282,7 +280,7 @@ if rnx.decode_obsh(obsfile) >= 0:
                 vi = vi_[(vi_['type'] == l6_ch_ext) &
                          (vi_['prn'] == prn_ref_ext)]
                 if len(vi) > 0:
-                    cs_.decode_l6msg(unhexlify(vi['nav'][0]), 0)
+                    cs_.decode_l6msg(bytes(vi['nav'][0]), 0)
                     if cs_.sid == 1:  # end of sub-frame
                         cs.decode_cssr(bytes(cs_.buff_p), 0)
             if file_stec is not None:  # STEC read from file
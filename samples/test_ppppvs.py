@@ -1,7 +1,6 @@
 """
  static test for PPP (PVS PPP)
 """
-from binascii import unhexlify
 from copy import deepcopy
 import matplotlib.pyplot as plt
 import numpy as np
@@ -19,6 +18,7 @@ from cssrlib.pppssr import pppos
 from cssrlib.rinex import rnxdec
 from cssrlib.cssr_pvs import decode_sinca_line
 from cssrlib.plot import plot_enu
+from navlog import load_nav, navFeed
 
 # Select test case
 #
@@ -200,9 +200,11 @@ if rnx.decode_obsh(obsfile) >= 0:
         obs = rnx.decode_obs()
 
     if 'sbas' in file_pvs:  # SIS
-        dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-                 ('type', 'int'), ('marker', 'S2'), ('nav', 'S124')]
-        v = np.genfromtxt(file_pvs, dtype=dtype)
+        if sbas_type == 0:  # L1
+            type_ = range(31)
+        else:  # DFMC L5
+            type_ = range(31, 64)
+        feed = navFeed(load_nav(file_pvs), prn=prn_ref, type_=type_)
     elif 'DAS' in file_pvs:  # DAS
         fc = open(file_pvs, 'rt')
     else:
@@ -228,14 +230,10 @@ if rnx.decode_obsh(obsfile) >= 0:
 
         if 'sbas' in file_pvs:  # SIS
 
-            vi = v[(v['tow'] == tow) & (v['prn'] == prn_ref)]
-            if sbas_type == 0:  # L1
-                vi = vi[vi['type'] <= 30]
-            else:  # DFMC L5
-                vi = vi[vi['type'] > 30]
+            vi = feed.get(tow)
 
             if len(vi) > 0:
-                buff = unhexlify(vi['nav'][0])
+                buff = bytes(vi['nav'][0])
                 cs.decode_cssr(buff, 0)
         else:  # DAS
             for line in fc:
@@ -14,8 +14,8 @@ from cssrlib.gnss import rSigRnx, sys2str, epoch2time
 from cssrlib.peph import atxdec, searchpcv
 from cssrlib.ppprtk import ppprtkpos
 from cssrlib.rinex import rnxdec
-from binascii import unhexlify
 from cssrlib.plot import plot_enu
+from navlog import load_nav, navFeed
 
 l6_mode = 0  # 0: from receiver log, 1: from archive on QZSS
 dataset = 2
@@ -208,9 +208,7 @@ if rnx.decode_obsh(obsfile) >= 0:
                            .format(l6file))
             sys_exit(-1)
     else:
-        dtype = [('wn', 'int'), ('tow', 'int'), ('prn', 'int'),
-                 ('type', 'int'), ('len', 'int'), ('nav', 'S500')]
-        v = np.genfromtxt(file_l6, dtype=dtype)
+        feed = navFeed(load_nav(file_l6), type_=l6_ch)
 
     # Skip epoch until start time
     #
@@ -228,15 +226,15 @@ if rnx.decode_obsh(obsfile) >= 0:
                 cs.week = week
                 cs.decode_cssr(cs.buff, 0)
         else:
-            vi = v[(v['tow'] == tow) & (v['type'] == l6_ch)]
+            vi = feed.get(tow)
             vi_p1 = vi[vi['prn'] == prn_p1]
             vi_p2 = vi[vi['prn'] == prn_p2]
             if len(vi_p1) > 0:
-                cs.decode_l6msg(unhexlify(vi_p1['nav'][0]), 0)
+                cs.decode_l6msg(bytes(vi_p1['nav'][0]), 0)
                 if cs.fcnt == 5:  # end of sub-frame
                     cs.decode_cssr(bytes(cs.buff), 0)
             if len(vi_p2) > 0:
-                cs_.decode_l6msg(unhexlify(vi_p2['nav'][0]), 0)
+                cs_.decode_l6msg(bytes(vi_p2['nav'][0]), 0)
                 if cs_.fcnt == 5:  # end of sub-frame
                     cs_.decode_cssr(bytes(cs_.buff), 0)
 
@@ -15,18 +15,16 @@ Note:
 
 import os
 from sys import exit as sys_exit
-from binascii import unhexlify
 import numpy as np
 from cssrlib.gnss import prn2sat, uGNSS
 from cssrlib.qznma import qznma, uNavId
 import matplotlib.pyplot as plt
+from navlog import load_nav, navFeed
 
 if not os.path.exists('../data/pubkey/qznma/002.der'):
     print('please install public key file from QSS.')
     sys_exit(0)
 
-dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-         ('type', 'int'), ('len', 'int'), ('nav', 'S512')]
 msg_nav_t = {uNavId.GPS_LNAV: 'LNAV', uNavId.GPS_CNAV: 'CNAV',
              uNavId.GPS_CNAV2: 'CNAV2',
              uNavId.GAL_FNAV: 'F/NAV', uNavId.GAL_INAV: 'I/NAV'}
@@ -51,7 +49,7 @@ elif navmode == uNavId.GPS_CNAV:
 elif navmode == uNavId.GPS_CNAV2:
     navfile = bdir+f'{doy:03d}{session}_qzscnav2.txt'
 
-v = np.genfromtxt(navfile, dtype=dtype)
+v = load_nav(navfile)
 
 if navmode == uNavId.GPS_CNAV:
     v = v[v['type'] == 26]  # L5 CNAV only
@@ -70,11 +68,14 @@ if flg_gnss:
     qz.load_navmsg_inav(navfile_galinav)
     qz.load_navmsg_fnav(navfile_galfnav)
 
-    vn = np.genfromtxt(navfile_n, dtype=dtype)
+    vn = load_nav(navfile_n)
 
 
 # tow_ = np.unique(v['tow'])
 tow_ = np.arange(v['tow'][0], v['tow'][-1])
+feed = navFeed(v)
+if flg_gnss:
+    feed_n = navFeed(vn, type_=1)
 nep = len(tow_)
 # nep = 1200
 
@@ -82,20 +83,20 @@ nsat = np.zeros((nep, 4), dtype=int)
 vstatus = np.zeros(nep, dtype=int)
 
 for k in range(nep):
-    vi_ = v[v['tow'] == tow_[k]]
+    vi_ = feed.get(tow_[k])
 
     for vi in vi_:
-        msg = unhexlify(vi['nav'])
+        msg = bytes(vi['nav'])
         sat = prn2sat(uGNSS.QZS, vi['prn'])
         qz.decode(tow_[k], msg, None, sat, navmode)
 
     if flg_gnss:
-        vin_ = vn[(vn['tow'] == tow_[k]) & (vn['type'] == 1)]
+        vin_ = feed_n.get(tow_[k])
         if prn_ref > 0:
             vin_ = vin_[vin_['prn'] == prn_ref]
 
         for vin in vin_:
-            msg_n = unhexlify(vin['nav'])
+            msg_n = bytes(vin['nav'])
             qz.decode(tow_[k], None, msg_n, sat, navmode)
 
     nsat[k, 0] = qz.count_tracked_sat(tow_[k])
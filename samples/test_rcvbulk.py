@@ -0,0 +1,58 @@
+"""
+ test of the bulk MeasEpoch decoding of receiver/decode_sbf.py
+
+ A synthetic SBF log with an epoch without satellites is decoded block by
+ block and in bulk by output_obs_bulk(). The RINEX OBS files must be
+ identical except for the creation date in the header.
+"""
+
+import os
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from decode_sbf import sbf  # noqa: E402
+from rcvscan import frames  # noqa: E402
+
+week = 2300
+tow = 100.0
+
+opt = rcvOpt()
+opt.flg_rnxobs = True
+
+sats = rb.satellites(12)
+buff = rb.gen_sbf(sats, 2, week, tow, 3, 1.0) + \
+    rb.gen_sbf([], 2, week, tow+3.0, 1, 1.0) + \
+    rb.gen_sbf(sats[:8], 2, week, tow+4.0, 3, 1.0)
+
+
+def decode(tmpdir, bulk):
+    """ lines of the RINEX OBS file of the log """
+    dec = sbf(opt, prefix=os.path.join(tmpdir, 'bulk_' if bulk else 'blk_'))
+    dec.monlevel = 0
+    blks = []
+    for k, len_ in frames(dec, buff):
+        if bulk:
+            blks.append(k)
+        else:
+            dec.decode(buff[k:k+len_], len_)
+    if bulk:
+        dec.output_obs_bulk(buff, blks)
+    dec.file_close()
+    with open(dec.fh_rnxobs.name) as fh:
+        return [s for s in fh if 'PGM / RUN BY / DATE' not in s]
+
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    ref = decode(tmpdir, False)
+    obs = decode(tmpdir, True)
+
+nep = sum(1 for s in ref if s.startswith('>'))
+print("{:d} lines, {:d} epochs".format(len(ref), nep))
+assert nep == 7
+assert any(s.startswith('>') and s.split()[8] == '0' for s in ref)
+assert obs == ref
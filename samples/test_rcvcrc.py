@@ -0,0 +1,73 @@
+"""
+ test of the checksums of receiver/rcvcrc.py
+
+ The checksums of random data of various lengths are compared with
+ bit-wise reference implementations.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+from rcvcrc import crc16, crc24q, crc32, crc8, fletcher8  # noqa: E402
+
+
+def crc16_ref(data):
+    """ CRC-16-CCITT computed bit-wise """
+    crc = 0
+    for c in data:
+        crc ^= c << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xffff
+    return crc
+
+
+def crc32_ref(data):
+    """ NovAtel CRC-32 computed bit-wise """
+    crc = 0
+    for c in data:
+        crc ^= c
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xedb88320 if crc & 1 else crc >> 1
+    return crc
+
+
+def fletcher8_ref(data):
+    """ UBX 8-bit Fletcher checksum computed per byte """
+    cka = ckb = 0
+    for c in data:
+        cka = (cka+c) & 0xff
+        ckb = (ckb+cka) & 0xff
+    return cka, ckb
+
+
+def crc8_ref(data):
+    """ GREIS checksum computed per byte """
+    res = 0
+    for c in data:
+        res = (((res << 2) | (res >> 6)) ^ c) & 0xff
+    return ((res << 2) | (res >> 6)) & 0xff
+
+
+def crc24q_ref(data):
+    """ RTCM 3 CRC-24Q computed bit-wise """
+    crc = 0
+    for c in data:
+        crc ^= c << 16
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1864cfb) if crc & 0x800000 else crc << 1
+            crc &= 0xffffff
+    return crc
+
+
+for n in list(range(64))+[1000, 4095, 65535+6]:
+    data = memoryview(os.urandom(n))
+    assert crc16(data) == crc16_ref(data), n
+    assert crc32(data) == crc32_ref(data), n
+    assert fletcher8(data) == fletcher8_ref(data), n
+    assert crc8(data) == crc8_ref(data), n
+    assert crc24q(data) == crc24q_ref(data), n
+
+print("checksums ok")
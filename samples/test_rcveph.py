@@ -0,0 +1,83 @@
+"""
+ test of the ephemeris cache of receiver/rcveph.py with a time window
+
+ GPS LNAV subframes of a navigation message log are packed into SBF
+ GPSRawCA blocks. The second half of the log is decoded with a muted
+ lead-in section before it, as for --start, and without lead-in. The
+ ephemerides broadcast in the lead-in section and again in the window
+ must be output, i.e. the window gives at least the ephemerides of the
+ decoding without lead-in.
+"""
+
+import os
+import struct as st
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+from navlog import read_text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+from decode_sbf import sbf  # noqa: E402
+from rcvcrc import crc16  # noqa: E402
+from rcveph import ephCache  # noqa: E402
+from rcvpar import chunk_frames  # noqa: E402
+
+file_lnav = '../data/doy2024-305/305a_gpslnav.txt'
+nmax = 2000
+lead = 30.0
+
+
+def gpsrawca(week, tow, prn, msg):
+    """ SBF GPSRawCA block of an LNAV subframe """
+    blk = st.pack('<LHBBBBBB', int(tow*1e3), week, prn, 1, 0, 0, 0, 0)
+    for i in range(10):
+        blk += st.pack('<L', int.from_bytes(msg[i*4:i*4+4], 'big'))
+    hdr = st.pack('<HH', 4017, 8+len(blk))
+    return b'$@'+st.pack('<H', crc16(hdr+blk))+hdr+blk
+
+
+def decode(prefix, buff, rng):
+    """ ephemerides (sat, iode, toe) of the decoding of a byte range """
+    opt = rcvOpt()
+    opt.flg_rnxnav = True
+    opt.flg_gpslnav = True
+    dec = sbf(opt, prefix=prefix)
+    dec.monlevel = 0
+    ephCache(dec)
+    file = dec.fh_rnxnav.name
+    for k, len_ in chunk_frames(dec, buff, rng):
+        dec.decode(buff[k:k+len_], len_)
+    dec.file_close()
+
+    with open(file) as fh:
+        rec = fh.read().split('END OF HEADER')[1].split('> EPH')[1:]
+    eph = set()
+    for r in rec:
+        s = r.splitlines()
+        eph.add((s[1][:3], float(s[2][4:23]), float(s[4][4:23])))
+    return eph
+
+
+v = read_text(file_lnav)[:nmax]
+blks = [gpsrawca(int(vn['wn']), vn['tow'], int(vn['prn']),
+                 bytes(vn['nav'])[:40]) for vn in v]
+off = [0]
+for b in blks:
+    off.append(off[-1]+len(b))
+buff = b''.join(blks)
+
+i0 = nmax//2
+i_ = min(i for i in range(i0+1) if v['tow'][i] >= v['tow'][i0]-lead)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    ref = decode(os.path.join(tmpdir, 'ref_'), buff,
+                 (off[i0], off[i0], len(buff)))
+    eph = decode(os.path.join(tmpdir, 'eph_'), buff,
+                 (off[i_], off[i0], len(buff)))
+
+print("without lead-in: {:d} ephemerides, with lead-in: {:d}".
+      format(len(ref), len(eph)))
+assert len(ref) > 0
+assert ref <= eph, ref-eph
@@ -0,0 +1,35 @@
+"""
+ test of the epoch index of receiver/rcvidx.py
+
+ The index of a synthetic RTCM 3 log is built with a reference week and
+ loaded again with another one. The stored index must not be used, as the
+ times of the RTCM messages are given in the reference week.
+"""
+
+import os
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from rcvidx import load  # noqa: E402
+
+tow = 100.0
+nep = 20
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    path = os.path.join(tmpdir, 'test.rtc')
+    with open(path, 'wb') as fh:
+        fh.write(rb.gen_rtcm(rb.satellites(8), 2, 2275, tow, nep, 1.0))
+
+    for week in (2275, 2275, 2276):
+        dec = rb.decoder('rtcm', rcvOpt(), os.path.join(tmpdir, 'test_'),
+                         week)
+        idx = load(dec, path)
+        print("weekref={:d}: {:d} rows".format(week, len(idx)))
+        assert len(idx) > 0
+        assert idx['time'].min() == week*604800+tow
+        assert idx['time'].max() == week*604800+tow+nep-1
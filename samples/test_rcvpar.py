@@ -0,0 +1,56 @@
+"""
+ test of the intra-file parallel decoding of receiver/rcvpar.py
+
+ A synthetic JPS log is decoded at once and in 2 to 8 chunks, the merged
+ RINEX and navigation message logs of the chunks must be identical to
+ those of the sequential decoding.
+"""
+
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+
+rcvdir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      '../receiver')
+sys.path.insert(0, rcvdir)
+
+import rcvbench as rb  # noqa: E402
+
+log = 'jps_test.jps'  # outputs test_*
+nep = 400
+nchunk = range(2, 9)
+
+
+def decode(tmpdir, name, args):
+    """ decode the log in directory tmpdir/name, return the outputs """
+    bdir = os.path.join(tmpdir, name)
+    os.mkdir(bdir)
+    os.link(os.path.join(tmpdir, log), os.path.join(bdir, log))
+    subprocess.run([sys.executable, os.path.join(rcvdir, 'decode_jps.py'),
+                    log, '-j', '2']+args, cwd=bdir, check=True,
+                   stdout=subprocess.DEVNULL)
+    out = {}
+    for f in sorted(glob.glob(os.path.join(bdir, 'test_*'))):
+        with open(f, 'r') as fh:
+            out[os.path.basename(f)] = [s for s in fh if 'PGM' not in s]
+    return out
+
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    with open(os.path.join(tmpdir, log), 'wb') as fh:
+        fh.write(rb.gen_jps(rb.satellites(24), 3, 2300, 100.0, nep, 1.0))
+
+    ref = decode(tmpdir, 'ref', [])
+    nobs = sum(1 for s in ref['test_rnx.obs'] if s.startswith('>'))
+    print("sequential: {:d} epochs".format(nobs))
+    assert nobs == nep
+
+    for n in nchunk:
+        out = decode(tmpdir, 'c{:d}'.format(n), ['-c', str(n),
+                                                 '--overlap', '16'])
+        assert out.keys() == ref.keys(), n
+        for f in ref:
+            assert out[f] == ref[f], (n, f)
+        print("{:d} chunks: ok".format(n))
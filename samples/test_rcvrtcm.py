@@ -0,0 +1,85 @@
+"""
+ test of the RTCM 3 decoder of receiver/decode_rtcm.py
+
+ The ephemerides of a recorded RTCM 3 log are decoded with the other
+ messages skipped, their weeks must be referred to the GPS week of the log
+ given as weekref.
+
+ The epochs of a synthetic MSM4 log of 97 satellites, more than the
+ initial epoch buffer holds, are kept by a memSink. Each kept epoch must
+ give the pseudoranges of its own time, i.e. it is not overwritten by the
+ next epoch decoded into the buffer.
+"""
+
+import os
+import sys
+import tempfile
+
+from cssrlib.gnss import sat2prn, uGNSS
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from decode_rtcm import rtcmDec  # noqa: E402
+from rcvio import open_mmap  # noqa: E402
+from rcvscan import frames  # noqa: E402
+from rcvsink import memSink, set_sinks  # noqa: E402
+
+file_rtcm = '../data/doy2023-229/idd2023229c.rtc'
+weekref = 2275  # 2023-08-17
+
+opt = rcvOpt()
+opt.flg_rnxnav = True
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = rtcmDec(opt, prefix=os.path.join(tmpdir, 'idd_'), gnss_t='GRECJ')
+    dec.monlevel = 0
+    dec.set_week(weekref)
+
+    with open_mmap(file_rtcm) as buff:
+        for k, len_ in frames(dec, buff):
+            dec.decode(buff[k:k+len_], len_)
+    dec.file_close()
+
+    # first line of the records: sat yyyy mm dd hh mm ss ...
+    with open(dec.fh_rnxnav.name) as fh:
+        lines = fh.read().split('END OF HEADER')[1].splitlines()
+    eph = [s.split()[1:4] for s in lines if s[:1].isalpha()]
+
+print("{:d} ephemerides".format(len(eph)))
+assert len(eph) > 0
+
+for ep in eph:
+    assert ep in (['2023', '08', '16'], ['2023', '08', '17']), ep
+print("ephemeris times: ok")
+
+# epochs of more satellites than the epoch buffer
+sats = rb.satellites(97)
+nep = 3
+sys_t = {uGNSS.GPS: 'G', uGNSS.GAL: 'E', uGNSS.BDS: 'C', uGNSS.QZS: 'J'}
+
+opt = rcvOpt()
+opt.flg_rnxobs = True
+buff = rb.gen_rtcm(sats, 2, weekref, 100.0, nep, 1.0)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = rb.decoder('rtcm', opt, os.path.join(tmpdir, 'msm_'), weekref)
+    assert len(sats) > len(dec.buf.sat)
+    set_sinks(dec, lambda s, name: memSink(name))
+    for k, len_ in frames(dec, buff):
+        dec.decode(buff[k:k+len_], len_)
+    dec.file_close()
+
+obs = dec.fh_rnxobs.obs
+nsat = [len(o.sat) for o in obs]
+print("{:d} epochs of {} satellites".format(len(obs), nsat))
+assert len(obs) == nep
+for ne, o in enumerate(obs):
+    assert len(o.sat) == len(sats)
+    for sat, P in zip(o.sat, o.P.max(axis=1)):
+        sys_, prn = sat2prn(sat)
+        i = sats.index((sys_t[sys_], prn))
+        rng, _, _ = rb.geometry(i, sys_t[sys_], float(ne))
+        assert abs(P-rng) < 1.0, (ne, sat, P, rng)
+print("epochs kept: ok")
@@ -0,0 +1,41 @@
+"""
+ test of the block dispatch of receiver/decode_sbf.py
+
+ A synthetic SBF log of MeasEpoch blocks is decoded with the RINEX OBS
+ output disabled, i.e. without handler for the blocks. The time of the
+ decoder must follow the block headers nevertheless.
+"""
+
+import os
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from decode_sbf import sbf  # noqa: E402
+from rcvscan import frames  # noqa: E402
+
+week = 2300
+tow = 100.0
+nep = 10
+
+opt = rcvOpt()
+opt.flg_rnxnav = True
+
+buff = rb.gen_sbf(rb.satellites(8), 2, week, tow, nep, 1.0)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = sbf(opt, prefix=os.path.join(tmpdir, 'test_'))
+    dec.monlevel = 0
+    assert dec.msg_skip(4027)
+
+    for k, len_ in frames(dec, buff, filt=False):
+        dec.decode(buff[k:k+len_], len_)
+        print("week={:d} tow={:.1f}".format(dec.week, dec.tow))
+    dec.file_close()
+
+assert dec.week == week
+assert dec.tow == tow+nep-1
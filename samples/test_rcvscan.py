@@ -0,0 +1,71 @@
+"""
+ test of the frame scanner of receiver/rcvscan.py
+
+ The messages of a synthetic JPS log are iterated by frames() with the
+ table-driven checksum and by the byte loop with sync() and the checksum
+ computed per byte, as the JPS decoder before the frame scanner (cases
+ jps_frames and jps_bytes of receiver/rcvbench.py). Both must find all
+ epochs, the throughput of each is printed in bytes/s.
+
+ Frames of message ids not needed for the output are passed over by their
+ length if the next frame starts right after them (for JPS after CR/LF).
+ A false SBF preamble with such an id and a length ending a few bytes
+ before the next block must not hide the block in between.
+"""
+
+import os
+import struct as st
+import sys
+import tempfile
+import time
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from rcvscan import frames  # noqa: E402
+
+nep = 600
+
+msg = bytes(rb.gen_jps(rb.satellites(32), 3, 2300, 100.0, nep, 1.0))
+dec = rb.decoder('jps', rcvOpt(), None, 2300)
+
+res = {}
+for case, loop in (('jps_bytes', True), ('jps_frames', False)):
+    t0 = time.perf_counter()
+    ks = rb.scan_jps(dec, msg, loop=loop)
+    t1 = time.perf_counter()
+    nep_ = sum(1 for k in ks if msg[k:k+2] == b'~~')
+    res[case] = len(msg)/(t1-t0)
+    print("{:10s} {:10.0f} bytes/s {:d} epochs".format(case, res[case], nep_))
+    assert nep_ == nep
+
+print("speedup: {:.1f}".format(res['jps_frames']/res['jps_bytes']))
+assert res['jps_frames'] > res['jps_bytes']
+
+# frames of the needed ids, the others are skipped without checksum
+opt = rcvOpt()
+opt.flg_rnxnav = True
+with tempfile.TemporaryDirectory() as tmpdir:
+    prefix = os.path.join(tmpdir, 'test_')
+    dec = rb.decoder('jps', opt, prefix, 2300)
+    ks = [k for k, _ in frames(dec, msg, filt=False)]
+    ks_ = [k for k, _ in frames(dec, msg)]
+    assert ks_ == [k for k in ks if not dec.msg_skip(dec.msg_id(msg, k))]
+    check_crc, ncrc = dec.check_crc, []
+    dec.check_crc = lambda buff, k: ncrc.append(k) or check_crc(buff, k)
+    assert [k for k, _ in frames(dec, msg)] == ks_
+    print("jps: {:d} frames, {:d} needed, {:d} checksums".
+          format(len(ks), len(ks_), len(ncrc)))
+    assert ncrc == ks_
+
+    opt.flg_rnxobs = True
+    msg = rb.gen_sbf(rb.satellites(8), 2, 2300, 100.0, 3, 1.0)
+    dec = rb.decoder('sbf', opt, prefix, 2300)
+    len_ = dec.msg_len(msg, 0)
+    hdr = b'$@\x00\x00'+st.pack('<HH', 5999, 8+len_-4)  # false preamble
+    assert dec.msg_skip(5999)
+    ks = [k for k, _ in frames(dec, hdr+msg)]
+    print("sbf: {:d} blocks after false preamble".format(len(ks)))
+    assert ks == [len(hdr)+len_*i for i in range(3)]
@@ -0,0 +1,42 @@
+"""
+ test of the per message statistics of receiver/rcvstat.py
+
+ A frame of a synthetic UBX log is corrupted and false preambles are
+ inserted between the frames. The checksum failures must be counted under
+ the single id 'crc/unknown' and the other frames under their ids.
+"""
+
+import os
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from rcvscan import frames  # noqa: E402
+from rcvstat import CRC_KEY, rcvStat  # noqa: E402
+
+nep = 10
+
+opt = rcvOpt()
+opt.flg_rnxobs = True
+
+buff = bytearray(rb.gen_ubx(rb.satellites(8), 2, 2300, 100.0, nep, 1.0))
+buff[20] ^= 0xff  # payload of the first frame
+k = len(buff)-(int.from_bytes(buff[4:6], 'little')+8)  # last frame
+buff[k:k] = b'\xb5\x62\x02\x15\x04\x00abcd\x00\x00'  # false preamble
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = rb.decoder('ubx', opt, os.path.join(tmpdir, 'test_'), 2300)
+    rcvStat(dec)
+    for k, len_ in frames(dec, buff):
+        dec.decode(buff[k:k+len_], len_)
+    dec.file_close()
+    res = dec.stat.summary()
+
+print(res)
+assert set(res) == {CRC_KEY, dec.stat.key(dec.msg_id(buff, 0))}
+assert res[CRC_KEY]['count'] == 0 and res[CRC_KEY]['crc_errors'] == 2
+assert sum(s['count'] for s in res.values()) == nep-1
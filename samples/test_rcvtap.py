@@ -0,0 +1,61 @@
+"""
+ test of the taps of correction messages of receiver/rcvtap.py
+
+ Galileo HAS pages of a navigation message log are packed into SBF
+ GALRawCNAV blocks and decoded with the log of the pages (flg_gale6)
+ disabled, the pages must be passed to the registered taps unchanged and
+ the log must not be written.
+"""
+
+import os
+import struct as st
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+from navlog import read_text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+from decode_sbf import sbf  # noqa: E402
+from rcvcrc import crc16  # noqa: E402
+from rcvscan import frames  # noqa: E402
+from rcvtap import add_tap  # noqa: E402
+
+file_has = '../data/gale6.txt'
+nmax = 600
+
+
+def galrawcnav(week, tow, prn, msg):
+    """ SBF GALRawCNAV block of a HAS page """
+    blk = st.pack('<LHBBBBBB', int(tow*1e3), week, prn+70, 1, 0, 19, 0, 0)
+    for i in range(16):
+        blk += st.pack('<L', int.from_bytes(msg[i*4:i*4+4], 'big'))
+    hdr = st.pack('<HH', 4024, 8+len(blk))
+    return b'$@'+st.pack('<H', crc16(hdr+blk))+hdr+blk
+
+
+v = read_text(file_has)[:nmax]
+pages = [(int(vn['wn']), int(vn['tow']), int(vn['prn']),
+          bytes(vn['nav'])[:62].ljust(64, b'\0')) for vn in v]
+buff = b''.join(galrawcnav(*p) for p in pages)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = sbf(rcvOpt(), prefix=os.path.join(tmpdir, 'test_'))
+    dec.monlevel = 0
+    assert dec.msg_skip(4024)
+
+    rec = []
+    add_tap(dec, 'gale6', lambda week, tow, prn, type_, msg:
+            rec.append((week, tow, prn, msg)))
+    assert not dec.msg_skip(4024)
+
+    for k, len_ in frames(dec, buff):
+        dec.decode(buff[k:k+len_], len_)
+    dec.file_close()
+    logs = os.listdir(tmpdir)
+
+print("{:d} pages passed to the tap".format(len(rec)))
+assert rec == pages
+assert logs == [], logs
+print("log of the pages not written: ok")
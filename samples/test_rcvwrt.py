@@ -0,0 +1,60 @@
+"""
+ test of the background writer of receiver/rcvwrt.py
+
+ A synthetic SBF log is decoded with the RINEX output written by the
+ writer thread to a file failing on write, the error must be raised by
+ file_close() of the decoder.
+"""
+
+import errno
+import os
+import sys
+import tempfile
+
+from cssrlib.rawnav import rcvOpt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../receiver'))
+
+import rcvbench as rb  # noqa: E402
+from decode_sbf import sbf  # noqa: E402
+from rcvscan import frames  # noqa: E402
+from rcvwrt import fileWriter  # noqa: E402
+
+
+class fullFile():
+    """ output file on a full disk """
+
+    def write(self, s):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+opt = rcvOpt()
+opt.flg_rnxobs = True
+
+buff = rb.gen_sbf(rb.satellites(8), 2, 2300, 100.0, 10, 1.0)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    dec = sbf(opt, prefix=os.path.join(tmpdir, 'test_'))
+    dec.monlevel = 0
+    dec.fh_rnxobs.close()
+    dec.fh_rnxobs = fullFile()
+    fileWriter(dec)
+
+    for k, len_ in frames(dec, buff):
+        dec.decode(buff[k:k+len_], len_)
+
+    try:
+        dec.file_close()
+    except OSError as e:
+        err = e
+    else:
+        err = None
+
+print("error in the writer: {}".format(err))
+assert err is not None and err.errno == errno.ENOSPC
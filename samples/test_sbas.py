@@ -1,7 +1,6 @@
 """
  static test for SBAS (L1 or DFMC)
 """
-from binascii import unhexlify
 from copy import deepcopy
 import matplotlib.pyplot as plt
 import matplotlib.dates as md
@@ -16,6 +15,7 @@ from cssrlib.pntpos import stdpos
 from cssrlib.sbas import sbasDec
 from cssrlib.rinex import rnxdec
 from cssrlib.cssr_pvs import decode_sinca_line
+from navlog import load_nav, navFeed
 
 
 # Select test case
@@ -206,9 +206,15 @@ if rnx.decode_obsh(obsfile) >= 0:
         obs = rnx.decode_obs()
 
     if 'sbas' in file_sbas:  # SIS
-        dtype = [('wn', 'int'), ('tow', 'float'), ('prn', 'int'),
-                 ('type', 'int'), ('marker', 'S2'), ('nav', 'S124')]
-        v = np.genfromtxt(file_sbas, dtype=dtype)
+        if len(prn_ref) == 1:
+            prn = prn_ref
+        else:
+            prn = range(prn_ref[0], prn_ref[1]+1)
+        if sbas_type == 0:  # L1
+            type_ = range(29)
+        else:  # DFMC L5
+            type_ = [31, 32, 34, 35, 36, 37]
+        feed = navFeed(load_nav(file_sbas), prn=prn, type_=type_)
     elif 'DAS' in file_sbas:  # DAS
         fc = open(file_sbas, 'rt')
     else:
@@ -234,19 +240,10 @@ if rnx.decode_obsh(obsfile) >= 0:
 
         if 'sbas' in file_sbas:  # SIS
 
-            if len(prn_ref) == 1:
-                vi = v[(v['tow'] == tow) & (v['prn'] == prn_ref)]
-            else:
-                vi = v[(v['tow'] == tow) & (v['prn'] >= prn_ref[0]) &
-                       (v['prn'] <= prn_ref[1])]
-            if sbas_type == 0:  # L1
-                vi = vi[vi['type'] <= 28]
-            else:  # DFMC L5
-                vi = vi[(vi['type'] == 31) | (vi['type'] == 32) |
-                        ((vi['type'] >= 34) & (vi['type'] <= 37))]
+            vi = feed.get(tow)
             if len(vi) > 0:
                 for vi_ in vi:
-                    buff = unhexlify(vi_['nav'])
+                    buff = bytes(vi_['nav'])
                     cs.decode_cssr(buff, 0, src=sbas_type, prn=vi_['prn'])
 
         else:  # DAS